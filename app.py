@@ -1,9 +1,21 @@
+import contextvars
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
-from core.data_loader import load_data, get_known_values
-from core.nlu import extract_filters_with_groq # Use the new Groq NLU function
-from core.search import find_properties
-from components.ui import render_property_card
-from core.summarizer import generate_summary_from_results, generate_not_found_summary
+import numpy as np
+import pandas as pd
+from core.data_loader import load_data, build_index, build_facets, get_known_values, connect_data_service
+from core.data_service import DATA_SERVICE_SOCKET
+from core.nlu import extract_filters_with_groq, matched_filters, query_cache, backend, circuit_breaker
+from core.search import match_positions, rank_properties
+from core.conversation import ConversationState
+from core.history import ChatHistory
+from core.assets import ThumbnailCache
+from core import telemetry
+from core.telemetry import tracer
+from components.ui import CardModelCache, render_property_card
+from core.summarizer import generate_summary_from_stats, generate_not_found_summary
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -14,75 +26,230 @@ st.set_page_config(
 
 # --- Load Data and Initial Values (Cached) ---
 # This runs only once at the start of the session.
+# With DATA_SERVICE_SOCKET set, the shared dataset server holds the data for
+# every worker on the node and this process only keeps the NLU vocabulary.
+data_service = connect_data_service(DATA_SERVICE_SOCKET) if DATA_SERVICE_SOCKET else None
 with st.spinner("Loading property data..."):
-    df = load_data()
-    known_values = get_known_values(df)
+    if data_service is not None:
+        known_values = data_service.known_values()
+    else:
+        df = load_data()
+        index = build_index(df)
+        facets = build_facets(index)
+        known_values = get_known_values(df)
+
+# Number of top-ranked property cards shown per reply
+RESULTS_TO_DISPLAY = 5
+# Longest wait for the thumbnails of a new reply; later cards use the remote image
+CARD_IMAGE_WAIT_SECONDS = 0.3
+
+# --- Background Workers ---
+@st.cache_resource
+def get_executor():
+    """
+    A thread pool shared by all sessions, so the LLM calls of concurrent chats
+    run in the background while each script thread keeps rendering.
+    """
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="chat-pipeline")
+
+@st.cache_resource
+def get_thumbnail_cache():
+    """Card thumbnails on local disk, fetched in the background and shared by all sessions."""
+    return ThumbnailCache()
+
+@st.cache_resource
+def get_card_models():
+    """Card display strings memoized by row id, shared by all sessions."""
+    return CardModelCache()
+
+thumbnails = get_thumbnail_cache()
+card_models = get_card_models()
+
+def search(filters, conversation):
+    """
+    Returns (positions, top_results, stats, version) for the turn's merged
+    filters, refining the session's previous matches when the filters only
+    narrow them. version is the dataset version the positions point into.
+    """
+    within = conversation.positions_to_refine(filters)
+    if data_service is not None:
+        return data_service.search(filters, RESULTS_TO_DISPLAY, within=within, version=conversation.version)
+    positions = match_positions(filters, index, within=within)
+    results, stats = rank_properties(filters, index, k=RESULTS_TO_DISPLAY, facets=facets, positions=positions)
+    return positions, results, stats, dataset_version()
+
+def load_rows(row_ids, version=None):
+    """
+    Materializes the rows with the given ids of the shared dataset. Empty when
+    the ids were stored against a version that is no longer served.
+    """
+    row_ids = np.asarray(row_ids, dtype=np.int64)
+    if data_service is not None:
+        rows = data_service.rows(row_ids, version)
+        return rows if rows is not None else pd.DataFrame()
+    return index.take(row_ids[row_ids < index.size])
+
+def dataset_version():
+    if data_service is not None:
+        return data_service.version
+    return df.attrs.get("version_id")
+
+def render_cards(models, wait_seconds=0.0):
+    """
+    Renders card models one by one with their cached thumbnails. With
+    wait_seconds, each card first waits for its in-flight thumbnail until a
+    shared deadline, so the first cards show while later ones still load.
+    """
+    deadline = time.monotonic() + wait_seconds
+    with st.container():
+        for model in models:
+            render_property_card(model, thumbnails.wait_for(model.image_url, deadline - time.monotonic()))
+
+def render_answer(placeholder, summary, results):
+    """Shows a reply's summary and top cards in placeholder, replacing what it held."""
+    with placeholder.container():
+        st.write(summary)
+        st.write("Here are the top matching properties for you:")
+        render_cards(card_models.for_frame(results, dataset_version()), CARD_IMAGE_WAIT_SECONDS)
+
+def render_results(message):
+    """
+    Renders the property cards of a message's stored row ids. Ids kept from an
+    older dataset version now name other rows, so those get a notice instead.
+    """
+    if message.version == dataset_version():
+        models = card_models.get_many(message.result_ids, lambda ids: load_rows(ids, message.version), message.version)
+        # A swap between the check and the fetch leaves rows missing
+        if len(models) == len(message.result_ids):
+            render_cards(models)
+            return
+    st.info("These results are out of date: the listings have been updated since. Ask again to see the current ones.")
 
 # --- Main App UI ---
 st.title("🤖 NoBrokerage AI Property Finder")
 st.caption("Ask me to find properties, like 'Show me 2BHKs in Pune under 1 Cr '")
 
+# --- Sidebar Metrics ---
+cache_stats = query_cache.stats()
+st.sidebar.metric("NLU cache hit rate", f"{cache_stats['hit_rate']:.0%}", help=f"{cache_stats['hits']} hits / {cache_stats['misses']} misses")
+st.sidebar.caption(f"LLM backend: {backend.name} (circuit {circuit_breaker.state.replace('_', '-')})")
+if data_service is not None:
+    st.sidebar.caption(f"Dataset: shared server, version {data_service.version}")
+
 # --- Session State Initialization for Chat History ---
+# Messages keep row ids into the shared dataset, never copies of the rows
 if "messages" not in st.session_state:
-    st.session_state.messages = [{"role": "assistant", "content": "How can I help you find your dream property today?"}]
+    st.session_state.messages = ChatHistory()
+    st.session_state.messages.append("assistant", "How can I help you find your dream property today?")
+
+# The filters narrowed down so far, so follow-ups like "only ready ones" refine them
+if "conversation" not in st.session_state:
+    st.session_state.conversation = ConversationState()
+conversation = st.session_state.conversation
+
+# Groups the turns of this chat in the query log
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
 # --- Display Chat History ---
 # This loop runs on every interaction to show the conversation so far.
+# Only the latest results are rendered as cards; older ones are collapsed.
+expanded_ids = st.session_state.messages.expanded_ids()
 for msg in st.session_state.messages:
-    with st.chat_message(msg["role"]):
-        st.write(msg["content"])
-        # If the message from the assistant has search results, display them as cards
-        if "results" in msg and not msg["results"].empty:
-            for _, row in msg["results"].iterrows():
-                render_property_card(row)
+    with st.chat_message(msg.role):
+        st.write(msg.content)
+        if msg.has_results:
+            if msg.message_id in expanded_ids or st.toggle(f"Show the {len(msg.result_ids)} properties", key=f"results-{msg.message_id}"):
+                render_results(msg)
 
 # --- Handle User Input and Generate Response ---
 if prompt := st.chat_input("e.g., 3bhk apartment in Ravet over 1 crore..."):
     # 1. Add user's message to history and display it
-    st.session_state.messages.append({"role": "user", "content": prompt})
+    st.session_state.messages.append("user", prompt)
     st.chat_message("user").write(prompt)
 
-    # 2. Generate and display the assistant's response
-    with st.chat_message("assistant"):
-        with st.spinner("Analyzing your query and searching properties..."):
-            
-            # --- Core Logic ---
-            # a. Use the Groq LLM to understand the query and extract filters
-            filters = extract_filters_with_groq(prompt, known_values)
-            
-            # b. Search the database with the extracted filters
-            results_df = find_properties(df, filters)
-            
-            # --- Construct and Display Response ---
-            if "error" in filters:
-                response_summary = f"Sorry, I encountered an error: {filters['error']}"
-                st.write(response_summary)
-                st.session_state.messages.append({"role": "assistant", "content": response_summary})
-
-            elif not results_df.empty:
-                # --- NEW: Generate the intelligent summary FIRST ---
-                response_summary = generate_summary_from_results(results_df, filters)
-                st.write(response_summary)
-
-                # --- NEW: Limit the results for display AFTER analysis ---
-                # We use head(5) here now, instead of in the search.py file.
-                results_to_display = results_df.head(5)
-
-                # Display property cards for the limited results
-                st.write("Here are the top matching properties for you:")
-                for _, row in results_to_display.iterrows():
-                    render_property_card(row)
-
-                # Add the full response (summary + display data) to session state
-                st.session_state.messages.append({
-                    "role": "assistant", 
-                    "content": response_summary, 
-                    "results": results_to_display
-                })
-            
+    # 2. Generate and display the assistant's response, timing each stage of the turn
+    with tracer.turn(), st.chat_message("assistant"):
+        telemetry.record("session", st.session_state.session_id)
+        telemetry.record("query", prompt)
+        telemetry.record("follow_up", bool(conversation.filters))
+
+        # --- Core Logic ---
+        # a. Start the LLM filter extraction in the background
+        #    (in a copy of this context, so its stages join the turn's trace)
+        nlu_future = get_executor().submit(contextvars.copy_context().run, extract_filters_with_groq, prompt, known_values)
+
+        # b. While it is in flight, search with what the local parse matched
+        #    and show that answer; it stays up when the LLM agrees with it
+        answer = st.empty()
+        with telemetry.span("search.optimistic"):
+            local_delta = matched_filters(prompt, known_values)
+            optimistic_search = None
+            if local_delta and "invalid_location" not in local_delta:
+                optimistic_filters = conversation.apply(local_delta)
+                optimistic_search = search(optimistic_filters, conversation)
+        shown_delta = None
+        if optimistic_search is not None and optimistic_search[2]["count"] > 0 and not nlu_future.done():
+            thumbnails.prefetch(optimistic_search[1]['first_image'])
+            with telemetry.span("render.optimistic"):
+                optimistic_summary = generate_summary_from_stats(optimistic_search[2], optimistic_filters)
+                render_answer(answer, optimistic_summary, optimistic_search[1])
+            shown_delta = local_delta
+
+        # c. Merge the extracted filters into the session's search and rank
+        #    the matches, reusing the optimistic search when the LLM agrees
+        #    with the local parse. Only the top results are materialized;
+        #    the summary uses the aggregates.
+        with st.spinner("Analyzing your query and searching properties..."), telemetry.span("nlu.wait"):
+            delta = nlu_future.result()
+        telemetry.record("delta", delta)
+        if "error" not in delta:
+            filters = conversation.apply(delta)
+            if optimistic_search is not None and delta == local_delta:
+                positions, results_to_display, result_stats, version = optimistic_search
             else:
-                # This handles both "impossible_query" and regular no-match scenarios
-                # --- NEW: Generate a specific "not found" message using the filters ---
+                with telemetry.span("search"):
+                    positions, results_to_display, result_stats, version = search(filters, conversation)
+            conversation.update(filters, positions, version)
+            telemetry.record("search_filters", filters)
+            telemetry.record("result_count", result_stats["count"])
+
+        # --- Construct and Display Response ---
+        # Each answer replaces the optimistic one, if that was shown
+        if "error" in delta:
+            response_summary = f"Sorry, I encountered an error: {delta['error']}"
+            answer.write(response_summary)
+            st.session_state.messages.append("assistant", response_summary)
+
+        elif result_stats["count"] > 0:
+            if delta == shown_delta:
+                # The LLM read the query as the local parse did: the cards on screen stand
+                response_summary = optimistic_summary
+            else:
+                # Fetch the card thumbnails in the background while the summary is written
+                thumbnails.prefetch(results_to_display['first_image'])
+                with telemetry.span("summary"):
+                    response_summary = generate_summary_from_stats(result_stats, filters)
+                with telemetry.span("render"):
+                    render_answer(answer, response_summary, results_to_display)
+
+            # Add the response to session state, keeping only the row ids of the cards
+            st.session_state.messages.append("assistant", response_summary, results_to_display.index.to_numpy(), version)
+
+        else:
+            # This handles both "impossible_query" and regular no-match scenarios
+            # --- NEW: Generate a specific "not found" message using the filters ---
+            with telemetry.span("summary"):
                 fallback_response = generate_not_found_summary(filters)
-                st.write(fallback_response)
-                st.session_state.messages.append({"role": "assistant", "content": fallback_response})
+            with telemetry.span("render"):
+                answer.write(fallback_response)
+            st.session_state.messages.append("assistant", fallback_response)
+
+# --- Current Search ---
+# Rendered last so it already reflects the filters of this turn
+if conversation.filters:
+    st.sidebar.caption("Current search")
+    st.sidebar.json(conversation.filters)
+    if st.sidebar.button("New search"):
+        conversation.clear()
+        st.rerun()
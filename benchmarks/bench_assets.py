@@ -0,0 +1,93 @@
+"""
+Benchmark of the card asset pipeline against a slow local image host.
+
+Generates --images JPEG photos and serves them through LocalFileFetcher with
+--latency seconds per request. Each simulated reply picks 5 result images
+(popular listings come up more often), starts their prefetch, spends
+--summary-ms on the summary and then renders the cards, which only read the
+thumbnail cache. Reports how long the cards took to get their images, how
+many came from local thumbnails, and the cache size against its byte budget,
+next to the time fetching the same images inline would have taken.
+
+    python benchmarks/bench_assets.py --turns 300 --latency 0.2 --summary-ms 150
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import wait
+
+import numpy as np
+from PIL import Image
+
+import common  # puts the repository root on sys.path
+
+from core.assets import LocalFileFetcher, ThumbnailCache
+
+CARDS_PER_REPLY = 5
+
+
+def make_images(directory, count, seed=0):
+    """Writes count 1600x1200 noisy JPEGs (the size of typical listing photos) and returns their URLs."""
+    rng = np.random.default_rng(seed)
+    urls = []
+    for i in range(count):
+        pixels = rng.integers(0, 255, size=(120, 160, 3), dtype=np.uint8)
+        Image.fromarray(pixels).resize((1600, 1200)).save(os.path.join(directory, f"{i}.jpg"), quality=85)
+        urls.append(f"https://images.example.com/{i}.jpg")
+    return urls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=300, help="replies to simulate")
+    parser.add_argument("--images", type=int, default=400, help="distinct listing images")
+    parser.add_argument("--latency", type=float, default=0.2, help="image host latency in seconds")
+    parser.add_argument("--summary-ms", type=float, default=150, help="time between prefetch and card render")
+    parser.add_argument("--budget-mb", type=float, default=4, help="thumbnail cache byte budget")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as host_dir, tempfile.TemporaryDirectory() as cache_dir:
+        urls = make_images(host_dir, args.images)
+        cache = ThumbnailCache(cache_dir, max_bytes=int(args.budget_mb * 2**20), fetcher=LocalFileFetcher(host_dir, args.latency))
+        rng = np.random.default_rng(1)
+        # Zipf-like popularity over the listings
+        weights = 1.0 / np.arange(1, args.images + 1)
+        weights /= weights.sum()
+
+        render_ms, local_cards, wait_ms = [], 0, []
+        for _ in range(args.turns):
+            reply = [urls[i] for i in rng.choice(args.images, size=CARDS_PER_REPLY, replace=False, p=weights)]
+            futures = cache.prefetch(reply)
+            time.sleep(args.summary_ms / 1000)
+            start = time.perf_counter()
+            images = [cache.get(url) for url in reply]
+            render_ms.append((time.perf_counter() - start) * 1000)
+            local_cards += sum(image is not None for image in images)
+            # Let stragglers land, as the next message would come later
+            started = time.perf_counter()
+            wait(futures)
+            wait_ms.append((time.perf_counter() - started) * 1000)
+
+        stats = cache.stats()
+        report = {
+            "turns": args.turns,
+            "latency_ms": args.latency * 1000,
+            "summary_ms": args.summary_ms,
+            "card_images_p50_ms": round(float(np.percentile(render_ms, 50)), 3),
+            "card_images_p99_ms": round(float(np.percentile(render_ms, 99)), 3),
+            "inline_fetch_ms_per_reply": round(args.latency * 1000 * CARDS_PER_REPLY, 1),
+            "cards_with_local_thumbnail": round(local_cards / (args.turns * CARDS_PER_REPLY), 3),
+            "fetches": stats["fetches"],
+            "failures": stats["failures"],
+            "cache_mb": round(stats["bytes"] / 2**20, 2),
+            "budget_mb": args.budget_mb,
+            "cache_entries": stats["entries"],
+            "source_mb_per_image": round(os.path.getsize(os.path.join(host_dir, "0.jpg")) / 2**20, 3),
+        }
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Offline benchmark of the full chat path: NLU, search, ranking and summary.
+
+Runs with the local deterministic LLM backend (no network, no API key), which
+answers after --latency seconds plus up to --jitter seconds of seeded random
+delay. Every query misses the NLU cache and the fast path, so each turn pays
+one backend call; with --timeout below the slowest calls, the per-call
+deadline and the circuit breaker are exercised and the p99 stays bounded.
+
+    python benchmarks/bench_chat_path.py --turns 200 --latency 0.05 --jitter 0.5 --timeout 0.3
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+
+import numpy as np
+
+from common import chdir_to_repo_root, percentiles
+
+chdir_to_repo_root()
+
+
+def make_queries(known_values, turns, seed=0):
+    """Vague queries (so the fast path defers to the LLM) over real localities."""
+    rng = np.random.default_rng(seed)
+    localities = sorted(known_values["localities"])
+    types = sorted(known_values["property_types"])
+    return [
+        f"something cozy like a {types[rng.integers(len(types))]} around {localities[rng.integers(len(localities))]} for my family no {i}"
+        for i in range(turns)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200, help="chat turns to run")
+    parser.add_argument("--latency", type=float, default=0.05, help="base backend latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.5, help="extra uniform backend delay in seconds")
+    parser.add_argument("--timeout", type=float, default=0.3, help="per-call deadline in seconds")
+    args = parser.parse_args()
+
+    os.environ["NLU_BACKEND"] = "local"
+    os.environ["NLU_LOCAL_LATENCY"] = str(args.latency)
+    os.environ["NLU_LOCAL_JITTER"] = str(args.jitter)
+    os.environ["NLU_TIMEOUT"] = str(args.timeout)
+    os.environ["NLU_SLOW_CALL_SECONDS"] = str(args.timeout)
+    os.environ.pop("NLU_CACHE_PATH", None)
+
+    from core import nlu
+    from core.conversation import ConversationState
+    from core.data_loader import load_data, build_index, build_facets, get_known_values
+    from core.search import match_positions, rank_properties
+    from core.summarizer import generate_summary_from_stats, generate_not_found_summary
+
+    df = load_data()
+    index = build_index(df)
+    facets = build_facets(index)
+    known_values = get_known_values(df)
+    queries = make_queries(known_values, args.turns)
+
+    timings = []
+    breaker_open_turns = 0
+    for query in queries:
+        conversation = ConversationState()
+        start = time.perf_counter()
+        # The NLU debug output would drown the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            delta = nlu.extract_filters_with_groq(query, known_values)
+        if "error" not in delta:
+            filters = conversation.apply(delta)
+            positions = match_positions(filters, index)
+            _, stats = rank_properties(filters, index, k=5, facets=facets, positions=positions)
+            if stats["count"]:
+                generate_summary_from_stats(stats, filters)
+            else:
+                generate_not_found_summary(filters)
+        timings.append(time.perf_counter() - start)
+        breaker_open_turns += nlu.circuit_breaker.state != "closed"
+
+    timings_ms = np.array(timings) * 1000
+    report = {
+        "turns": args.turns,
+        "backend": nlu.backend.name,
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "timeout": args.timeout,
+        **percentiles(timings_ms),
+        "turns_with_open_circuit": breaker_open_turns,
+        "turns_per_second": args.turns / float(np.sum(timings)),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark for fuzzy entity resolution (core/entities.py EntityIndex).
+
+Builds synthetic catalogues of project-like names, then times exact lookups,
+misspelled lookups (one typo each) and the linear edit-distance scan the
+index replaces, reporting microseconds per lookup and the typo recall.
+
+    python benchmarks/bench_entities.py --sizes 1000 10000 100000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+import common  # puts the repository root on sys.path
+
+from core.entities import EntityIndex, compact_key, edit_distance
+
+WORDS = [
+    'royal', 'green', 'park', 'heights', 'residency', 'gardens', 'vista', 'sky', 'palm', 'county',
+    'elite', 'orchid', 'lake', 'view', 'meadows', 'crest', 'avenue', 'enclave', 'towers', 'nest',
+]
+LETTERS = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+
+
+def make_catalogue(size, seed=0):
+    """Returns size distinct names like 'sky orchid kelvaro'."""
+    rng = np.random.default_rng(seed)
+    names = set()
+    while len(names) < size:
+        suffix = ''.join(LETTERS[rng.integers(0, 26, 7)])
+        names.add(f"{WORDS[rng.integers(0, len(WORDS))]} {WORDS[rng.integers(0, len(WORDS))]} {suffix}")
+    return sorted(names)
+
+
+def misspell(name, rng):
+    """Applies one random substitution, deletion or transposition to a letter of name."""
+    chars = list(name)
+    letters = [i for i, c in enumerate(chars[:-1]) if c.isalpha() and chars[i + 1].isalpha()]
+    i = letters[rng.integers(0, len(letters))]
+    kind = rng.integers(0, 3)
+    if kind == 0:
+        chars[i] = 'z' if chars[i] != 'z' else 'q'
+    elif kind == 1:
+        del chars[i]
+    else:
+        chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    return ''.join(chars)
+
+
+def linear_resolve(keys, values, text, max_distance):
+    """Reference lookup without an index: edit distance against every known value."""
+    key = compact_key(text)
+    best, best_distance = None, max_distance + 1
+    for candidate, value in zip(keys, values):
+        distance = edit_distance(key, candidate, max_distance)
+        if distance < best_distance:
+            best, best_distance = value, distance
+    return best
+
+
+def per_lookup_us(func, queries):
+    start = time.perf_counter()
+    results = [func(query) for query in queries]
+    return (time.perf_counter() - start) / len(queries) * 1e6, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help="catalogue sizes")
+    parser.add_argument('--queries', type=int, default=1000, help="lookups timed per catalogue")
+    parser.add_argument('--linear-queries', type=int, default=10, help="lookups timed for the linear scan")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    report = {'queries': args.queries, 'catalogues': {}}
+    for size in args.sizes:
+        names = make_catalogue(size)
+        start = time.perf_counter()
+        index = EntityIndex(names)
+        build_seconds = time.perf_counter() - start
+
+        targets = [names[i] for i in rng.integers(0, size, args.queries)]
+        typos = [misspell(name, rng) for name in targets]
+        exact_us, _ = per_lookup_us(index.resolve, targets)
+        fuzzy_us, resolved = per_lookup_us(index.resolve, typos)
+        recall = sum(got == want for got, want in zip(resolved, targets)) / len(targets)
+
+        linear = typos[:args.linear_queries]
+        linear_us, _ = per_lookup_us(lambda q: linear_resolve(index.keys, index.values, q, index.max_distance(compact_key(q))), linear)
+
+        report['catalogues'][size] = {
+            'build_seconds': build_seconds,
+            'exact_us_per_lookup': exact_us,
+            'misspelled_us_per_lookup': fuzzy_us,
+            'linear_scan_us_per_lookup': linear_us,
+            'misspelled_recall': recall,
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Cold-start benchmark for the master dataset: CSV parse + cleaning vs. the
+memory-mapped binary bundle written by preprocessing.py.
+
+Each load runs in a fresh Python process so the timings and peak RSS are what
+a new Streamlit worker would see.
+
+    python benchmarks/bench_load.py --rows 200000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import pandas as pd
+
+from common import REPO_ROOT
+
+from core.bundle import bundle_path_for, write_bundle
+from core.data_loader import prepare_master_frame
+
+# Runs inside the child process; prints {"seconds": ..., "max_rss_mb": ...}
+CHILD_SCRIPT = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import pandas as pd
+if {mode!r} == "csv":
+    from core.data_loader import prepare_master_frame
+    df = prepare_master_frame(pd.read_csv({csv!r}))
+else:
+    from core.bundle import read_bundle
+    df = read_bundle({bundle!r}, source_csv={csv!r})
+elapsed = time.perf_counter() - start
+try:
+    # ru_maxrss survives exec and would report the parent's peak, so prefer VmHWM
+    with open("/proc/self/status") as f:
+        rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+except OSError:
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"rows": len(df), "seconds": elapsed, "max_rss_mb": rss_kb / 1024}}))
+"""
+
+
+def make_dataset(rows, directory):
+    """Replicates data/master_properties.csv up to the requested row count."""
+    source = pd.read_csv(os.path.join(REPO_ROOT, "data", "master_properties.csv"))
+    repeats = -(-rows // len(source))
+    df = pd.concat([source] * repeats, ignore_index=True).head(rows)
+    csv_path = os.path.join(directory, "master_properties.csv")
+    df.to_csv(csv_path, index=False)
+    write_bundle(prepare_master_frame(pd.read_csv(csv_path)), bundle_path_for(csv_path), source_csv=csv_path)
+    return csv_path
+
+
+def run_child(mode, csv_path):
+    script = CHILD_SCRIPT.format(root=REPO_ROOT, mode=mode, csv=csv_path, bundle=bundle_path_for(csv_path))
+    output = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="rows in the synthetic master dataset")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = make_dataset(args.rows, directory)
+        report = {"rows": args.rows, "csv": run_child("csv", csv_path), "bundle": run_child("bundle", csv_path)}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
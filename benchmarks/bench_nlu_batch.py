@@ -0,0 +1,143 @@
+"""
+Throughput benchmark for the batch NLU API against a local mock Groq server.
+
+Starts an OpenAI-compatible /chat/completions server in a separate process on
+localhost (so it does not compete with the client for the GIL) that answers
+after --latency seconds and rejects every --reject-every-th request with a
+429, then extracts a batch of queries (with duplicates) sequentially and with
+the concurrent scheduler, checking both return the same ordered results.
+
+    python benchmarks/bench_nlu_batch.py --queries 2000 --unique 500
+"""
+import argparse
+import json
+import multiprocessing
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import common  # puts the repository root on sys.path
+
+from core.llm import GroqBackend
+from core.nlu import MODEL_NAME, query_cache
+from core.nlu_batch import extract_filters_batch
+
+KNOWN_VALUES = {
+    "cities": {"pune", "mumbai"},
+    "localities": {"ravet", "kharadi", "chembur", "shivajinagar"},
+    "project_names": {"pristine02", "queens glory"},
+    "property_types": {"1bhk", "2bhk", "3bhk"},
+}
+
+
+class MockGroqHandler(BaseHTTPRequestHandler):
+    """Answers chat completions with a fixed filter object after a delay."""
+
+    # Keep-alive, so the client's pooled connections are actually reused
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency = 0.05
+    reject_every = 0
+    # Shared with the benchmark process (a multiprocessing.Value)
+    requests = None
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.requests.get_lock():
+            self.requests.value += 1
+            reject = self.reject_every and self.requests.value % self.reject_every == 0
+        time.sleep(self.latency)
+        if reject:
+            self._reply(429, {"error": {"message": "rate limited", "type": "rate_limit"}}, {"retry-after": "0"})
+            return
+        # Echo part of the query so every distinct query gets a distinct answer
+        query = body["messages"][0]["content"].rsplit('User Query: "', 1)[-1].split('"', 1)[0]
+        content = json.dumps({"city": "pune", "note": query})
+        self._reply(200, {
+            "id": "mock", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+
+    def _reply(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port_queue, requests, latency, reject_every):
+    """Runs the mock server until the process is terminated."""
+    MockGroqHandler.requests = requests
+    MockGroqHandler.latency = latency
+    MockGroqHandler.reject_every = reject_every
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockGroqHandler)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def make_queries(total, unique):
+    """Queries the fast path cannot answer confidently, so each unique one reaches the server."""
+    base = [f"something nice and quiet near landmark number {i} please" for i in range(unique)]
+    return [base[i % unique] for i in range(total)]
+
+
+def run(queries, base_url, requests, **kwargs):
+    query_cache.clear()
+    requests.value = 0
+    concurrency = kwargs.get("concurrency", 1)
+    start = time.perf_counter()
+    backend = GroqBackend(MODEL_NAME, api_key="mock-key", max_connections=concurrency, base_url=base_url)
+    results = extract_filters_batch(queries, KNOWN_VALUES, backend=backend, **kwargs)
+    seconds = time.perf_counter() - start
+    return results, {
+        "seconds": seconds,
+        "queries_per_second": len(queries) / seconds,
+        "server_requests": requests.value,
+        "errors": sum("error" in result for result in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=2000, help="queries in the batch")
+    parser.add_argument("--unique", type=int, default=500, help="distinct queries among them")
+    parser.add_argument("--latency", type=float, default=0.05, help="mock server latency in seconds")
+    parser.add_argument("--reject-every", type=int, default=20, help="answer every n-th request with a 429 (0 = never)")
+    parser.add_argument("--concurrency", type=int, default=32, help="requests in flight for the concurrent run")
+    parser.add_argument("--rps", type=float, default=0, help="rate limit for the concurrent run (0 = none)")
+    args = parser.parse_args()
+
+    requests = multiprocessing.Value("i", 0)
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(port_queue, requests, args.latency, args.reject_every), daemon=True)
+    server.start()
+    base_url = f"http://127.0.0.1:{port_queue.get(timeout=30)}"
+
+    queries = make_queries(args.queries, args.unique)
+    try:
+        sequential, sequential_report = run(queries, base_url, requests, concurrency=1, requests_per_second=0)
+        concurrent, concurrent_report = run(queries, base_url, requests, concurrency=args.concurrency, requests_per_second=args.rps)
+    finally:
+        server.terminate()
+
+    assert sequential == concurrent, "concurrent results differ from sequential ones"
+    assert all(result.get("note") == query for result, query in zip(concurrent, queries) if "error" not in result)
+    report = {
+        "queries": args.queries,
+        "unique": args.unique,
+        "latency": args.latency,
+        "sequential": sequential_report,
+        f"concurrency_{args.concurrency}": concurrent_report,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
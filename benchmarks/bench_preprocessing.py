@@ -0,0 +1,105 @@
+"""
+Benchmark of the vectorized preprocessing functions.
+
+Builds a synthetic feed of variant rows and times every vectorized function
+against its row-wise reference in preprocessing.py (tests/test_preprocessing.py
+checks that they agree). The row-wise versions are timed on --reference-rows
+only (they take minutes at 1M rows) and reported per row.
+
+    python benchmarks/bench_preprocessing.py --rows 1000000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+import common  # puts the repository root on sys.path
+
+import preprocessing as pp
+
+SLUG_WORDS = ['luxury', 'pristine02', 'modelcolony', 'shivajinagar', 'chembur', 'ravet', 'camp', 'kharadi', 'thane']
+SUMMARY_SNIPPETS = [
+    'swimming pool and gym', 'a fitness center', 'club house', 'covered car parking', 'high speed elevator',
+    'kids area', '24x7 cctv security', 'great connectivity', 'close to schools', 'near hospital',
+    'malls nearby', 'contemporary features', 'modern infrastructure', 'quiet neighbourhood', '',
+]
+
+# Average number of configuration variants listed per project
+VARIANTS_PER_PROJECT = 25
+
+
+def make_feed(rows, seed=0):
+    """Returns a DataFrame shaped like the merged feed, with messy values included."""
+    rng = np.random.default_rng(seed)
+    # Slugs and summaries are project-level fields repeated on every variant
+    projects = max(rows // VARIANTS_PER_PROJECT, 1)
+    words = np.array(SLUG_WORDS)
+    project_slugs = (
+        pd.Series(words[rng.integers(0, len(words), projects)])
+        + '-' + pd.Series(words[rng.integers(0, len(words), projects)])
+        + '-' + pd.Series(np.array(['pune', 'mumbai', 'delhi'])[rng.integers(0, 3, projects)])
+        + '-' + pd.Series(rng.integers(100000, 999999, projects).astype(str))
+    )
+    snippets = np.array(SUMMARY_SNIPPETS)
+    project_summaries = pd.Series(snippets[rng.integers(0, len(snippets), projects)]) + ' ' + pd.Series(snippets[rng.integers(0, len(snippets), projects)])
+    project_summaries[rng.random(projects) < 0.2] = np.nan
+    project_of_row = rng.integers(0, projects, rows)
+    slugs = project_slugs.iloc[project_of_row].reset_index(drop=True)
+    summaries = project_summaries.iloc[project_of_row].reset_index(drop=True)
+    bhk = pd.Series(np.array(['1BHK', '2BHK', '3BHK', '4.5BHK', 'Office', 'House_Villa', '1RK '])[rng.integers(0, 7, rows)])
+    bathrooms = pd.Series(rng.integers(0, 14, rows).astype(float))
+    bathrooms[rng.random(rows) < 0.05] = np.nan
+    # Listing prices are quoted in round thousands, so many variants share a price
+    prices = pd.Series(rng.integers(500, 500000, rows).astype(float) * 1000)
+    return pd.DataFrame({'slug': slugs, 'summary': summaries, 'bhk': bhk, 'bathrooms': bathrooms, 'price': prices})
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def row_wise(feed):
+    return {
+        'bathrooms': lambda: feed.apply(pp.clean_bathrooms, axis=1),
+        'location': lambda: feed['slug'].apply(pp.extract_location_from_slug).set_axis(['city', 'locality'], axis=1),
+        'amenities': lambda: feed['summary'].apply(pp.extract_amenities),
+        'price': lambda: feed['price'].apply(pp.format_price),
+    }
+
+
+def vectorized(feed):
+    return {
+        'bathrooms': lambda: pp.clean_bathrooms_vectorized(feed),
+        'location': lambda: pp.extract_location_vectorized(feed['slug']),
+        'amenities': lambda: pp.extract_amenities_vectorized(feed['summary'])[0],
+        'price': lambda: pp.format_price_vectorized(feed['price']),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000, help="rows in the synthetic feed")
+    parser.add_argument('--reference-rows', type=int, default=50000, help="rows used to time the row-wise functions")
+    args = parser.parse_args()
+
+    feed = make_feed(args.rows)
+    sample = feed.head(args.reference_rows)
+
+    report = {'rows': args.rows, 'reference_rows': len(sample), 'functions': {}}
+    for name, func in vectorized(feed).items():
+        _, vector_seconds = timed(func)
+        _, reference_seconds = timed(row_wise(sample)[name])
+        report['functions'][name] = {
+            'vectorized_seconds': vector_seconds,
+            'row_wise_us_per_row': reference_seconds / len(sample) * 1e6,
+            'vectorized_us_per_row': vector_seconds / args.rows * 1e6,
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
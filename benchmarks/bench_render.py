@@ -0,0 +1,85 @@
+"""
+Micro-benchmark of a chat rerun with a long history, before and after card
+render models.
+
+Runs a Streamlit script (through streamlit.testing's AppTest, so every widget
+call is real) that renders --replies assistant replies of 5 property cards
+each, all of them expanded, as when a user has opened every older result.
+
+  - rows: the cards are rebuilt from the dataset rows on every rerun
+    (index.take + iterrows + formatting each card), as before
+  - models: the cards come from the CardModelCache memoized by row id and
+    are emitted in one container per reply
+
+Reports the time the script spent rendering cards per rerun, averaged over
+--reruns reruns after a warm-up, for each mode.
+
+    python benchmarks/bench_render.py --replies 50 --reruns 20
+"""
+import argparse
+import json
+import os
+
+from common import chdir_to_repo_root
+
+
+def rerun_script():
+    """The benchmarked page; reads its parameters from the environment."""
+    import os
+    import time
+
+    import numpy as np
+    import streamlit as st
+
+    from components.ui import CardModelCache, render_property_card, render_property_cards
+    from core.data_loader import load_data, build_index
+
+    df = load_data()
+    index = build_index(df)
+
+    @st.cache_resource
+    def get_card_models():
+        return CardModelCache()
+
+    card_models = get_card_models()
+    rng = np.random.default_rng(0)
+    history = [rng.choice(index.size, size=5, replace=False) for _ in range(int(os.environ["BENCH_REPLIES"]))]
+
+    start = time.perf_counter()
+    for result_ids in history:
+        with st.chat_message("assistant"):
+            st.write("Here are the top matching properties for you:")
+            if os.environ["BENCH_MODE"] == "rows":
+                for _, row in index.take(result_ids).iterrows():
+                    render_property_card(row)
+            else:
+                render_property_cards(card_models.get_many(result_ids, index.take))
+    st.session_state.setdefault("render_seconds", []).append(time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--replies", type=int, default=50, help="assistant replies in the history")
+    parser.add_argument("--reruns", type=int, default=20, help="reruns timed per mode")
+    args = parser.parse_args()
+
+    from streamlit.testing.v1 import AppTest
+
+    chdir_to_repo_root()
+    os.environ["BENCH_REPLIES"] = str(args.replies)
+    report = {"replies": args.replies, "cards": args.replies * 5, "reruns": args.reruns}
+    for mode in ("rows", "models"):
+        os.environ["BENCH_MODE"] = mode
+        app = AppTest.from_function(rerun_script, default_timeout=120)
+        for _ in range(args.reruns + 1):
+            app.run()
+        assert not app.exception, app.exception
+        # The first run loads the data and fills the caches
+        timings = app.session_state["render_seconds"][1:]
+        report[f"{mode}_render_ms_per_rerun"] = round(sum(timings) / len(timings) * 1000, 2)
+    report["speedup"] = round(report["rows_render_ms_per_rerun"] / report["models_render_ms_per_rerun"], 2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark of the semantic index: offline build time and query latency.
+
+Builds synthetic listings whose texts are drawn from the words of the real
+summaries and amenities in data/ (--rows-per-text rows share each project
+text, as variants of one project do), writes the index as in a bundle and
+memory-maps it back, then times per query:
+
+  - embed: turning the description into a vector
+  - rank_all: ranking every listing (a description-only query)
+  - rank_filtered: ranking the listings matched by a ~10% structured filter
+  - top_k: the 5 best listings over all of them
+
+    python benchmarks/bench_semantic.py --sizes 100000 1000000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from common import REPO_ROOT
+
+from core.semantic import SemanticIndex, SEMANTIC_EXTRAS, build_semantic_index, text_features
+
+QUERIES = [
+    "quiet family-friendly place near schools",
+    "peaceful living with good connectivity",
+    "luxury homes close to hospitals and shopping malls",
+    "well ventilated modern apartment",
+    "gated community with a big garden for kids",
+]
+
+
+def make_listings(rows, rows_per_text, seed=0):
+    """A frame with the semantic text columns, sampled from the real vocabulary."""
+    rng = np.random.default_rng(seed)
+    master = pd.read_csv(os.path.join(REPO_ROOT, "data", "master_properties.csv"))
+    vocabulary = sorted({
+        word for text in pd.concat([master["summary"], master["amenities"]]).dropna()
+        for word in text_features(text) if " " not in word
+    })
+    amenities = master["amenities"].dropna().unique()
+    projects = -(-rows // rows_per_text)
+    summaries = np.array([" ".join(rng.choice(vocabulary, size=rng.integers(20, 80))) for _ in range(projects)], dtype=object)
+    project_amenities = amenities[rng.integers(len(amenities), size=projects)]
+    project_ids = rng.integers(projects, size=rows)
+    return pd.DataFrame({"summary": summaries[project_ids], "amenities": project_amenities[project_ids]})
+
+
+def per_query_ms(func, repeats):
+    start = time.perf_counter()
+    for i in range(repeats):
+        func(QUERIES[i % len(QUERIES)])
+    return round((time.perf_counter() - start) / repeats * 1000, 3)
+
+
+def bench_size(rows, rows_per_text, repeats):
+    df = make_listings(rows, rows_per_text)
+    start = time.perf_counter()
+    arrays = build_semantic_index(df)
+    build_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name in SEMANTIC_EXTRAS:
+            np.save(os.path.join(directory, f"{name}.npy"), arrays[name])
+        mapped = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in SEMANTIC_EXTRAS}
+        semantic = SemanticIndex.from_arrays(mapped, rows)
+
+        everything = np.arange(rows, dtype=np.int64)
+        filtered = np.sort(np.random.default_rng(1).choice(rows, size=rows // 10, replace=False))
+        semantic.rank(QUERIES[0], everything, k=5)  # fault the pages in
+        return {
+            "rows": rows,
+            "texts": int(semantic.vectors.shape[0]),
+            "dimensions": semantic.dimensions,
+            "matrix_mb": round(semantic.vectors.nbytes / 2**20, 1),
+            "build_seconds": round(build_seconds, 3),
+            "embed_ms": per_query_ms(semantic.embed, repeats),
+            "rank_all_ms": per_query_ms(lambda q: semantic.scores(q, everything), repeats),
+            "rank_filtered_ms": per_query_ms(lambda q: semantic.scores(q, filtered), repeats),
+            "top_k_ms": per_query_ms(lambda q: semantic.rank(q, everything, k=5), repeats),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000], help="listings per synthetic dataset")
+    parser.add_argument("--rows-per-text", type=int, default=4, help="listings sharing each project text")
+    parser.add_argument("--repeats", type=int, default=50, help="queries timed per measurement")
+    args = parser.parse_args()
+    report = [bench_size(rows, args.rows_per_text, args.repeats) for rows in args.sizes]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+End-to-end benchmark suite for preprocessing and the chat path.
+
+For each size, builds a synthetic raw feed by cloning the raw tables in data/
+(with new ids, project names, localities and prices), then times:
+
+  - the preprocessing steps (load, merge, transform, write outputs)
+  - load_data from the CSV and from the bundle, get_known_values,
+    build_index and build_facets
+  - per query of a realistic mix: create_llm_prompt, extract_filters_with_groq
+    (on the local deterministic backend, so no network), find_properties
+    (legacy scan and index), rank_properties and the two summary builders
+
+The report is JSON, tagged with the git commit, so runs can be diffed across
+commits; --baseline flags metrics that got slower than an earlier report.
+
+    python benchmarks/bench_suite.py --sizes 1000 100000 1000000 --output bench.json
+    python benchmarks/bench_suite.py --sizes 1000 --baseline bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import common
+from common import REPO_ROOT
+
+# The LLM is replaced by the deterministic in-process backend
+os.environ["NLU_BACKEND"] = "local"
+os.environ.pop("NLU_CACHE_PATH", None)
+
+import preprocessing as pp
+from core import nlu
+from core.bundle import bundle_path_for
+from core.conversation import ConversationState
+from core.data_loader import load_data, build_index, build_facets, get_known_values
+from core.search import find_properties, rank_properties
+from core.summarizer import generate_summary_from_results, generate_summary_from_stats
+
+LOCALITY_WORDS = ['baner', 'wakad', 'aundh', 'hinjewadi', 'kothrud', 'powai', 'andheri', 'borivali', 'kandivali', 'thane']
+NAME_WORDS = ['royal', 'green', 'vista', 'orchid', 'palm', 'crest', 'meadows', 'enclave', 'towers', 'heights']
+
+# Query kinds of the mix and their share of the traffic
+QUERY_MIX = {
+    "simple": 0.4,
+    "amenity_budget": 0.2,
+    "follow_up": 0.15,
+    "typo": 0.1,
+    "vague": 0.1,
+    "invalid_location": 0.05,
+}
+FOLLOW_UPS = ["only ready ones", "under 80 lakh", "with gym", "what about 3bhk", "cheaper than 2 cr"]
+
+
+# --- Synthetic Data ---
+def _letters(number):
+    """0 -> '', 1 -> 'a', 26 -> 'z', 27 -> 'aa': suffixes that keep slug parts non-numeric."""
+    text = ""
+    while number > 0:
+        number, digit = divmod(number - 1, 26)
+        text = chr(97 + digit) + text
+    return text
+
+
+def make_raw_tables(rows, seed=0):
+    """Clones the raw tables in data/ until the variant table has `rows` rows."""
+    rng = np.random.default_rng(seed)
+    base = pp.load_raw_tables(os.path.join(REPO_ROOT, pp.DATA_DIR))
+    copies = -(-rows // len(base['variant']))
+    # The catalogue of localities grows with the data, like a real feed
+    localities = [
+        LOCALITY_WORDS[i % len(LOCALITY_WORDS)] + _letters(i // len(LOCALITY_WORDS))
+        for i in range(min(2000, len(LOCALITY_WORDS) + copies // 5))
+    ]
+
+    tables = {name: [] for name in base}
+    for copy in range(copies):
+        suffix = f"x{copy}"
+        project = base['project'].copy()
+        project['id'] = project['id'] + suffix
+        if copy:
+            project['projectName'] = project['projectName'] + f" {NAME_WORDS[copy % len(NAME_WORDS)]} {copy}"
+            parts = project['slug'].str.split('-')
+            project['slug'] = [
+                '-'.join(p[:-3] + [localities[rng.integers(len(localities))], p[-2], str(rng.integers(100000, 999999))])
+                if len(p) >= 3 else slug
+                for p, slug in zip(parts, project['slug'])
+            ]
+        address = base['address'].copy()
+        address['id'] = address['id'] + suffix
+        address['projectId'] = address['projectId'] + suffix
+        config = base['config'].copy()
+        config['id'] = config['id'] + suffix
+        config['projectId'] = config['projectId'] + suffix
+        variant = base['variant'].copy()
+        variant['id'] = variant['id'] + suffix
+        variant['configurationId'] = variant['configurationId'] + suffix
+        prices = pd.to_numeric(variant['price'], errors='coerce')
+        variant['price'] = (prices * rng.uniform(0.8, 1.2, len(prices)) / 1000).round() * 1000
+        for name, table in (('project', project), ('address', address), ('config', config), ('variant', variant)):
+            tables[name].append(table)
+
+    tables = {name: pd.concat(parts, ignore_index=True) for name, parts in tables.items()}
+    tables['variant'] = tables['variant'].head(rows)
+    return tables
+
+
+def write_raw_tables(tables, data_dir):
+    for name, filename in pp.RAW_FILES.items():
+        tables[name].to_csv(os.path.join(data_dir, filename), index=False)
+
+
+def make_query_mix(known_values, count, seed=0):
+    """Returns (kind, query) pairs drawn from QUERY_MIX over the dataset's values."""
+    rng = np.random.default_rng(seed)
+    cities = sorted(known_values["cities"])
+    localities = sorted(known_values["localities"])
+    types = sorted(t for t in known_values["property_types"] if "bhk" in t) or sorted(known_values["property_types"])
+    kinds = rng.choice(list(QUERY_MIX), size=count, p=list(QUERY_MIX.values()))
+
+    def pick(values):
+        return values[rng.integers(len(values))]
+
+    queries = []
+    for i, kind in enumerate(kinds):
+        if kind == "simple":
+            query = f"{pick(types)} in {pick(cities)}"
+        elif kind == "amenity_budget":
+            query = f"{pick(types)} in {pick(localities)} under {rng.integers(5, 300)} lakh with {pick(['gym', 'pool', 'parking'])}"
+        elif kind == "follow_up":
+            query = pick(FOLLOW_UPS)
+        elif kind == "typo":
+            locality = pick(localities)
+            cut = rng.integers(1, max(len(locality) - 1, 2))
+            query = f"{pick(types)} in {locality[:cut] + locality[cut + 1:] if len(locality) > 4 else locality}"
+        elif kind == "vague":
+            query = f"something spacious near good schools around {pick(localities)} for a family of {i % 7 + 2}"
+        else:
+            query = f"{pick(types)} in {pick(['dehradun', 'jaipur', 'indore'])}"
+        queries.append((str(kind), query))
+    return queries
+
+
+# --- Timing ---
+def seconds(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def bench_preprocessing(data_dir):
+    timings = {}
+    tables, timings["load_raw_tables"] = seconds(pp.load_raw_tables, data_dir)
+    merged, timings["merge_tables"] = seconds(pp.merge_tables, tables)
+    master, timings["transform"] = seconds(pp.transform, merged)
+    _, timings["write_outputs"] = seconds(pp.write_outputs, master, data_dir)
+    return {name: round(value, 6) for name, value in timings.items()}, len(master)
+
+
+def bench_loading(csv_path):
+    timings = {}
+    bundle = bundle_path_for(csv_path)
+    # Hide the bundle to time the CSV fallback
+    shutil.move(bundle, bundle + ".off")
+    load_data.clear()
+    _, timings["load_data_csv"] = seconds(load_data, csv_path)
+    shutil.move(bundle + ".off", bundle)
+    load_data.clear()
+    df, timings["load_data_bundle"] = seconds(load_data, csv_path)
+    get_known_values.clear()
+    known_values, timings["get_known_values"] = seconds(get_known_values, df)
+    build_index.clear()
+    index, timings["build_index"] = seconds(build_index, df)
+    build_facets.clear()
+    facets, timings["build_facets"] = seconds(build_facets, index)
+    return {name: round(value, 6) for name, value in timings.items()}, df, index, facets, known_values
+
+
+def bench_queries(queries, df, index, facets, known_values):
+    """Times every chat-path function per query; returns mean microseconds per call."""
+    totals = {name: 0.0 for name in (
+        "create_llm_prompt", "extract_filters", "find_properties_scan", "find_properties_index",
+        "rank_properties", "generate_summary_from_results", "generate_summary_from_stats",
+    )}
+    nlu.query_cache.clear()
+    # Build the per-dataset prompt structures outside the timed loop
+    nlu.create_llm_prompt("warm up", known_values)
+    conversation = ConversationState()
+    for kind, query in queries:
+        _, elapsed = seconds(nlu.create_llm_prompt, query, known_values)
+        totals["create_llm_prompt"] += elapsed
+        with contextlib.redirect_stdout(io.StringIO()):
+            delta, elapsed = seconds(nlu.extract_filters_with_groq, query, known_values)
+        totals["extract_filters"] += elapsed
+        if kind != "follow_up":
+            conversation.clear()
+        filters = conversation.apply(delta) if "error" not in delta else {}
+        conversation.update(filters, None)
+
+        results, elapsed = seconds(find_properties, df, filters)
+        totals["find_properties_scan"] += elapsed
+        _, elapsed = seconds(find_properties, df, filters, index)
+        totals["find_properties_index"] += elapsed
+        (_, stats), elapsed = seconds(rank_properties, filters, index, 5, facets)
+        totals["rank_properties"] += elapsed
+        _, elapsed = seconds(generate_summary_from_results, results, filters)
+        totals["generate_summary_from_results"] += elapsed
+        _, elapsed = seconds(generate_summary_from_stats, stats, filters)
+        totals["generate_summary_from_stats"] += elapsed
+    return {name: round(total / len(queries) * 1e6, 3) for name, total in totals.items()}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(report, baseline, threshold):
+    """Returns the metrics that are more than `threshold` times slower than the baseline."""
+    sections = ("preprocessing_seconds", "loading_seconds", "query_us")
+    return common.compare(report, baseline, threshold, [f"sizes.*.{section}.*" for section in sections])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000], help="master rows per synthetic dataset")
+    parser.add_argument("--queries", type=int, default=200, help="queries in the mix per dataset")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "queries": args.queries,
+        "query_mix": QUERY_MIX,
+        "sizes": {},
+    }
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as data_dir:
+            write_raw_tables(make_raw_tables(size), data_dir)
+            with contextlib.redirect_stdout(io.StringIO()):
+                preprocessing, rows = bench_preprocessing(data_dir)
+                loading, df, index, facets, known_values = bench_loading(os.path.join(data_dir, pp.MASTER_FILE))
+            queries = make_query_mix(known_values, args.queries)
+            report["sizes"][str(size)] = {
+                "rows": rows,
+                "localities": len(known_values["localities"]),
+                "project_names": len(known_values["project_names"]),
+                "preprocessing_seconds": preprocessing,
+                "loading_seconds": loading,
+                "query_us": bench_queries(queries, df, index, facets, known_values),
+            }
+            del df, index, facets
+            load_data.clear()
+            build_index.clear()
+            build_facets.clear()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Helpers shared by the benchmark scripts. Importing this module puts the
+repository root on sys.path, so the scripts can import the app's modules when
+run as `python benchmarks/<script>.py`.
+"""
+import fnmatch
+import os
+import sys
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+PERCENTILES = (50, 90, 99)
+
+
+def chdir_to_repo_root():
+    """For scripts that load the app's data through its default relative paths."""
+    os.chdir(REPO_ROOT)
+
+
+def percentiles(values_ms) -> dict:
+    """The PERCENTILES and the maximum of latencies in milliseconds."""
+    values_ms = np.asarray(values_ms, dtype=float)
+    if not len(values_ms):
+        return {}
+    report = {f"p{p}_ms": round(float(np.percentile(values_ms, p)), 3) for p in PERCENTILES}
+    report["max_ms"] = round(float(values_ms.max()), 3)
+    return report
+
+
+def _metrics(report, prefix=""):
+    """The numeric leaves of a nested report, keyed by their dotted path."""
+    for key, value in report.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _metrics(value, name + ".")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+def compare(report, baseline, threshold, lower_is_better, higher_is_better=()):
+    """
+    Returns the metrics of report more than `threshold` times worse than in
+    baseline. Metrics are named by their dotted path in the report (e.g.
+    "stages.search.p99_ms"); lower_is_better and higher_is_better are
+    fnmatch patterns of the names to check in each direction.
+    """
+    before = dict(_metrics(baseline))
+    regressions = []
+    for name, value in _metrics(report):
+        old = before.get(name)
+        if not old:
+            continue
+        if any(fnmatch.fnmatchcase(name, pattern) for pattern in lower_is_better):
+            worse = value > old * threshold
+        elif any(fnmatch.fnmatchcase(name, pattern) for pattern in higher_is_better):
+            worse = value * threshold < old
+        else:
+            continue
+        if worse:
+            regressions.append(f"{name}: {old} -> {value} ({value / old:.2f}x)")
+    return regressions
@@ -0,0 +1,214 @@
+"""
+Replays a captured query log against the current tree and reports throughput
+and latency percentiles, for catching performance regressions on real traffic.
+
+The log comes from the app running with TELEMETRY_SINKS=querylog (see
+core/telemetry.py): one line per chat turn with the query, the extracted
+filters, the result count, the stage timings and the raw LLM response. Each
+app process writes its own log; pass them all to replay the traffic of every
+worker. Their rotated files are read too, and the turns merged by time.
+
+Each turn goes through the NLU (the LLM answers with its recorded response,
+after its recorded latency times --llm-latency-scale), the search and the
+summary. The turns of one chat session run in order, on one conversation, so
+follow-ups refine as they did live; --concurrency sessions run at a time.
+
+  - find: find_properties over the index, then the summary from the results
+  - ranked: the app's path (match, refine, rank the top results, summary from
+    the aggregates)
+
+Turns whose filters or result count differ from the log are counted, so a
+replay also shows when a change altered the answers.
+
+    python benchmarks/replay_queries.py logs/queries-*.jsonl --concurrency 8 --output replay.json
+    python benchmarks/replay_queries.py logs/queries-*.jsonl --concurrency 8 --baseline replay.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import common
+from common import percentiles
+
+common.chdir_to_repo_root()
+
+
+def load_sessions(log_paths, repeat=1):
+    """The logged turns that carry a query, grouped by session in time order."""
+    from core.telemetry import read_query_log
+
+    traces = [trace for path in log_paths for trace in read_query_log(path)]
+    # Stable, so turns logged within the same millisecond keep their log order
+    traces.sort(key=lambda trace: trace.get("timestamp", 0))
+    sessions = OrderedDict()
+    for trace in traces:
+        attributes = trace.get("attributes", {})
+        if attributes.get("query"):
+            sessions.setdefault(attributes.get("session"), []).append(trace)
+    return [turns for _ in range(repeat) for turns in sessions.values()]
+
+
+def recorded_responses(sessions):
+    """query -> (LLM response text, seconds the call took) of the logged LLM calls."""
+    responses = {}
+    for turns in sessions:
+        for trace in turns:
+            attributes = trace["attributes"]
+            if "llm_response" in attributes:
+                seconds = trace["stages_ms"].get("nlu.llm_call", 0.0) / 1000
+                responses[attributes["query"]] = (attributes["llm_response"], seconds)
+    return responses
+
+
+class TraceCollector:
+    """A telemetry sink that keeps the finished traces in memory."""
+
+    def __init__(self):
+        self.traces = []
+        self._lock = threading.Lock()
+
+    def emit(self, trace):
+        with self._lock:
+            self.traces.append(trace)
+
+
+def as_logged(value):
+    """value as it reads back from the log's JSON."""
+    return json.loads(json.dumps(value, default=str, sort_keys=True))
+
+
+def compare(report, baseline, threshold):
+    """Returns the percentiles more than `threshold` times slower, and a throughput more than that much lower."""
+    return common.compare(report, baseline, threshold, ("latency.*.p*_ms", "stages.*.p*_ms"), ("turns_per_second",))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("logs", nargs="+", help="query logs written by the querylog telemetry sink")
+    parser.add_argument("--concurrency", type=int, default=4, help="chat sessions replayed at a time")
+    parser.add_argument("--search", choices=("find", "ranked"), default="find", help="search path to replay")
+    parser.add_argument("--llm-latency-scale", type=float, default=0.0, help="multiplier of the recorded LLM latencies (0: answer at once)")
+    parser.add_argument("--repeat", type=int, default=1, help="times to replay the log (later passes hit the NLU cache)")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    os.environ.pop("NLU_CACHE_PATH", None)
+
+    from core import nlu
+    from core.conversation import ConversationState
+    from core.data_loader import load_data, build_index, build_facets, get_known_values
+    from core.llm import ReplayBackend
+    from core.search import find_properties, match_positions, rank_properties
+    from core.summarizer import generate_summary_from_results, generate_summary_from_stats, generate_not_found_summary
+    from core.telemetry import Tracer, span, record
+
+    sessions = load_sessions(args.logs, args.repeat)
+    turns = sum(len(session) for session in sessions)
+    if not turns:
+        sys.exit(f"No chat turns with a query in {', '.join(args.logs)}")
+
+    # The NLU debug output would drown the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = load_data()
+        index = build_index(df)
+        facets = build_facets(index)
+        known_values = get_known_values(df)
+    nlu.backend = ReplayBackend(recorded_responses(sessions), nlu.prompt_query, nlu.answer_prompt_locally, args.llm_latency_scale)
+    collector = TraceCollector()
+    tracer = Tracer([collector])
+
+    def replay_session(session):
+        conversation = ConversationState()
+        for logged in session:
+            attributes = logged["attributes"]
+            if not attributes.get("follow_up", True):
+                conversation.clear()
+            with tracer.turn("replay_turn"):
+                query = attributes["query"]
+                with span("nlu"):
+                    delta = nlu.extract_filters_with_groq(query, known_values)
+                record("filters_changed", "delta" in attributes and as_logged(delta) != attributes["delta"])
+                if "error" in delta:
+                    continue
+                filters = conversation.apply(delta)
+                if args.search == "find":
+                    with span("search"):
+                        results = find_properties(df, filters, index)
+                    count = len(results)
+                    # find_properties searches the whole index every turn
+                    positions = None
+                    with span("summary"):
+                        if count:
+                            generate_summary_from_results(results, filters)
+                        else:
+                            generate_not_found_summary(filters)
+                else:
+                    with span("search"):
+                        positions = match_positions(filters, index, within=conversation.positions_to_refine(filters))
+                        _, stats = rank_properties(filters, index, k=5, facets=facets, positions=positions)
+                    count = stats["count"]
+                    with span("summary"):
+                        if count:
+                            generate_summary_from_stats(stats, filters)
+                        else:
+                            generate_not_found_summary(filters)
+                conversation.update(filters, positions)
+                record("result_count", count)
+                record("results_changed", "result_count" in attributes and count != attributes["result_count"])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor, contextlib.redirect_stdout(io.StringIO()):
+        list(executor.map(replay_session, sessions))
+    elapsed = time.perf_counter() - start
+
+    traces = collector.traces
+    stage_names = sorted({stage for trace in traces for stage in trace.stages})
+    report = {
+        "logs": args.logs,
+        "sessions": len(sessions),
+        "turns": turns,
+        "concurrency": args.concurrency,
+        "search": args.search,
+        "llm_latency_scale": args.llm_latency_scale,
+        "seconds": round(elapsed, 3),
+        "turns_per_second": round(turns / elapsed, 2),
+        "latency": {"turn": percentiles([trace.duration * 1000 for trace in traces])},
+        "stages": {
+            stage: percentiles([trace.stages[stage] * 1000 for trace in traces if stage in trace.stages])
+            for stage in stage_names
+        },
+        "llm_responses_replayed": nlu.backend.replayed,
+        "llm_responses_missing": nlu.backend.missing,
+        "nlu_sources": {
+            source: sum(str(trace.attributes.get("nlu_source")) == source for trace in traces)
+            for source in sorted({str(trace.attributes.get("nlu_source")) for trace in traces})
+        },
+        "filters_changed": sum(bool(trace.attributes.get("filters_changed")) for trace in traces),
+        "results_changed": sum(bool(trace.attributes.get("results_changed")) for trace in traces),
+    }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
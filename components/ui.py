@@ -1,41 +1,136 @@
+import threading
+from collections import OrderedDict
+
 import streamlit as st
 
-def render_property_card(prop):
+# Listings whose card models are kept per process
+CARD_CACHE_SIZE = 4096
+
+class CardModel:
     """
-    Renders a single property card with an image, details, and a CTA link.
+    The display strings of one property card, built once per listing.
+    Immutable, so one instance is shared by every session that shows it.
     """
+
+    __slots__ = ("row_id", "title", "image_url", "location", "project", "property_type", "status", "price", "amenities", "cta_url")
+
+    def __init__(self, row_id, title, image_url, location, project, property_type, status, price, amenities, cta_url):
+        for name, value in zip(self.__slots__, (row_id, title, image_url, location, project, property_type, status, price, amenities, cta_url)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    @classmethod
+    def from_row(cls, prop, row_id=None):
+        """Formats a listing row (a Series or a dict with the master columns)."""
+        # Display top 3 amenities if available
+        amenities_str = prop.get('amenities', '') # Use .get() for safety
+        amenities = None
+        if isinstance(amenities_str, str) and 'no amenities' not in amenities_str.lower() and 'not specified' not in amenities_str.lower():
+            amenities_list = [a.strip() for a in amenities_str.split(',')[:3]]
+            amenities = "✨ **Amenities:** " + " | ".join(amenities_list)
+        return cls(
+            row_id=row_id,
+            title=prop['title'],
+            image_url=prop['first_image'],
+            location=f"**📍 {prop['city']}, {prop['locality']}**",
+            project=f"**Project:** {prop['project_name']}",
+            property_type=f"**Type:** {prop['bhk'].upper()}",
+            status=f"**Status:** {prop['possession_status'].replace('_', ' ').title()}",
+            # Make the price more prominent
+            price=f"#### Price: {prop['price_formatted']}",
+            amenities=amenities,
+            cta_url="https://nobrokerage.com" + prop['cta_url'],
+        )
+
+
+class CardModelCache:
+    """
+    Card models memoized by row id, so cards repeated across reruns and
+    sessions are formatted once. Bounded, least recently used out first.
+    Tied to one dataset version; pass a new version to start over.
+    """
+
+    def __init__(self, max_entries=CARD_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.version = None
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, row_ids, load_rows, version=None) -> list:
+        """
+        Returns the models of row_ids in order. load_rows(missing_ids) must
+        return a DataFrame of the missing rows indexed by row id; ids it does
+        not return are skipped.
+        """
+        with self._lock:
+            if version != self.version:
+                self._models.clear()
+                self.version = version
+            models = {}
+            for row_id in map(int, row_ids):
+                model = self._models.get(row_id)
+                if model is not None:
+                    self._models.move_to_end(row_id)
+                    models[row_id] = model
+        missing = [row_id for row_id in map(int, row_ids) if row_id not in models]
+        if missing:
+            rows = load_rows(missing)
+            built = {row_id: CardModel.from_row(row, row_id) for row_id, row in zip(rows.index, rows.to_dict('records'))}
+            with self._lock:
+                if version == self.version:
+                    self._models.update(built)
+                    while len(self._models) > self.max_entries:
+                        self._models.popitem(last=False)
+            models.update(built)
+        return [models[row_id] for row_id in map(int, row_ids) if row_id in models]
+
+    def for_frame(self, rows, version=None) -> list:
+        """The models of the rows of a result DataFrame indexed by row id."""
+        return self.get_many(rows.index, lambda missing: rows.loc[missing], version)
+
+
+def _render_card(model, image=None):
     # Use a container with a border for better visual separation
     with st.container(border=True):
         # UPDATED: Changed column ratio from [1, 2] to [1, 3] to make the image smaller.
         col1, col2 = st.columns([1, 3])
 
         with col1:
-            # st.image(prop['first_image'],  width='stretch')
-            st.image(prop['first_image'], width='stretch')
-
+            st.image(image if image is not None else model.image_url, width='stretch')
 
         with col2:
             # Use a slightly smaller header for the title to save space
-            st.subheader(prop['title'], divider='rainbow')
-            
+            st.subheader(model.title, divider='rainbow')
+
             # Sub-columns for better layout of details
             detail_col1, detail_col2 = st.columns(2)
             with detail_col1:
-                st.markdown(f"**📍 {prop['city']}, {prop['locality']}**")
-                st.markdown(f"**Project:** {prop['project_name']}")
+                st.markdown(model.location)
+                st.markdown(model.project)
             with detail_col2:
-                st.markdown(f"**Type:** {prop['bhk'].upper()}")
-                st.markdown(f"**Status:** {prop['possession_status'].replace('_', ' ').title()}")
-            
-            # Make the price more prominent
-            st.markdown(f"#### Price: {prop['price_formatted']}")
-            
-            # Display top 3 amenities if available
-            amenities_str = prop.get('amenities', '') # Use .get() for safety
-            if isinstance(amenities_str, str) and 'no amenities' not in amenities_str.lower() and 'not specified' not in amenities_str.lower():
-                amenities_list = [a.strip() for a in amenities_str.split(',')[:3]]
-                st.write("✨ **Amenities:** " + " | ".join(amenities_list))
+                st.markdown(model.property_type)
+                st.markdown(model.status)
+
+            st.markdown(model.price)
+            if model.amenities:
+                st.write(model.amenities)
 
             # Add a button for the call to action
-            st.link_button("View Details", "https://nobrokerage.com" + prop['cta_url'])
+            st.link_button("View Details", model.cta_url)
+
+def render_property_card(prop, image=None):
+    """
+    Renders a single property card with an image, details, and a CTA link.
+    prop is a CardModel or a listing row. image is the locally cached
+    thumbnail, if any; otherwise the browser loads the remote first image itself.
+    """
+    _render_card(prop if isinstance(prop, CardModel) else CardModel.from_row(prop), image)
 
+def render_property_cards(models, images=None):
+    """Renders a batch of card models in one container; images is an optional parallel list."""
+    images = images or [None] * len(models)
+    with st.container():
+        for model, image in zip(models, images):
+            _render_card(model, image)
@@ -0,0 +1,76 @@
+import re
+import numpy as np
+import pandas as pd
+
+# Fixed amenity vocabulary shared by preprocessing and search.
+# Each canonical amenity owns one bit in the 'amenity_mask' column; the order
+# of this dict defines the bit positions, so only ever append to it.
+AMENITY_KEYWORDS = {
+    'Swimming Pool': ['pool', 'swimming'],
+    'Gymnasium': ['gym', 'gymnasium', 'fitness center'],
+    'Clubhouse': ['clubhouse', 'club house'],
+    'Car Parking': ['parking', 'car park'],
+    'Lift': ['lift', 'elevator'],
+    'Kids Play Area': ['play area', 'kids area'],
+    'Security': ['security', 'cctv'],
+    'Good Connectivity': ['connectivity'],
+    'Nearby Schools': ['schools', 'school'],
+    'Nearby Hospitals': ['hospitals', 'hospital'],
+    'Shopping Access': ['shopping', 'malls'],
+    'Modern Living': ['modern living', 'contemporary features'],
+    'Good Infrastructure': ['infrastructure']
+}
+
+AMENITY_BITS = {amenity: 1 << i for i, amenity in enumerate(AMENITY_KEYWORDS)}
+
+def find_amenities(text) -> list:
+    """Returns the canonical amenities whose keywords appear in the text, in vocabulary order."""
+    if pd.isna(text):
+        return []
+    text = str(text).lower()
+    return [amenity for amenity, keywords in AMENITY_KEYWORDS.items() if any(keyword in text for keyword in keywords)]
+
+def amenity_mask(text) -> int:
+    """Encodes every amenity mentioned in the text as an integer bitmask."""
+    mask = 0
+    for amenity in find_amenities(text):
+        mask |= AMENITY_BITS[amenity]
+    return mask
+
+def resolve_query_amenities(amenities):
+    """
+    Resolves the amenity terms from the NLU output to a required bitmask.
+    Returns (mask, unresolved_terms) so that terms outside the vocabulary can
+    still be matched against the free-text 'amenities' column.
+    """
+    required_mask = 0
+    unresolved = []
+    for term in amenities:
+        term_mask = amenity_mask(term)
+        if term_mask:
+            required_mask |= term_mask
+        else:
+            unresolved.append(term)
+    return required_mask, unresolved
+
+# One alternation over every keyword, longest first. Wrapping it in a lookahead
+# lets findall report overlapping matches, so it behaves exactly like the
+# per-keyword `keyword in text` checks in find_amenities.
+_KEYWORD_BITS = {keyword: AMENITY_BITS[amenity] for amenity, keywords in AMENITY_KEYWORDS.items() for keyword in keywords}
+_KEYWORD_PATTERN = re.compile(
+    "(?=(" + "|".join(re.escape(k) for k in sorted(_KEYWORD_BITS, key=len, reverse=True)) + "))"
+)
+
+def amenity_masks(texts: pd.Series) -> pd.Series:
+    """Vectorized amenity_mask: one regex pass over the whole column."""
+    lowered = texts.fillna("").astype(str).str.lower()
+    matches = pd.Series(lowered.str.findall(_KEYWORD_PATTERN).to_numpy(), dtype=object)
+    bits = matches.explode().dropna().map(_KEYWORD_BITS)
+    masks = np.zeros(len(texts), dtype=np.int64)
+    # bitwise_or.at tolerates several keywords setting the same bit of a row
+    np.bitwise_or.at(masks, bits.index.to_numpy(), bits.to_numpy(dtype=np.int64))
+    return pd.Series(masks, index=texts.index)
+
+def amenity_names(mask: int) -> list:
+    """Decodes a bitmask back into canonical amenity names, in vocabulary order."""
+    return [amenity for amenity, bit in AMENITY_BITS.items() if mask & bit]
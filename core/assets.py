@@ -0,0 +1,280 @@
+import ast
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+import httpx
+import numpy as np
+import pandas as pd
+
+# --- Card Assets ---
+# Property cards show the first image of each listing. The image lists are
+# parsed once per distinct list when the master frame is prepared, and the
+# thumbnails are served from a bounded cache on local disk. The thumbnails of
+# a reply's top results are fetched in a thread pool while its summary is
+# written, and a card only ever reads the cache: on a miss it falls back to the
+# remote URL instead of waiting, so rendering never waits on the image host.
+ASSET_CACHE_DIR = os.environ.get("ASSET_CACHE_DIR", os.path.join(tempfile.gettempdir(), "nobrokerage-thumbnails"))
+ASSET_CACHE_MAX_BYTES = int(float(os.environ.get("ASSET_CACHE_MAX_MB", 256)) * 2**20)
+ASSET_FETCH_WORKERS = int(os.environ.get("ASSET_FETCH_WORKERS", 8))
+ASSET_FETCH_TIMEOUT = float(os.environ.get("ASSET_FETCH_TIMEOUT", 5))
+# Bounding box of the stored thumbnails, in pixels
+THUMBNAIL_SIZE = (480, 360)
+THUMBNAIL_QUALITY = 80
+
+
+# --- Image Lists ---
+def parse_image_list(text) -> list:
+    """Returns the URLs of a stringified image list ('["https://..."]'), or []."""
+    if not isinstance(text, str):
+        return []
+    try:
+        urls = json.loads(text)
+    except ValueError:
+        # Older exports use Python literals with single quotes
+        try:
+            urls = ast.literal_eval(text)
+        except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+            return []
+    if not isinstance(urls, list):
+        return []
+    return [url.strip().strip('"') for url in urls if isinstance(url, str) and url.strip()]
+
+
+def parse_image_lists(series):
+    """
+    Parses a column of stringified image lists into a compact form: (offsets,
+    url_codes, urls), where the URLs of row i are urls[url_codes[offsets[i]:offsets[i + 1]]].
+    Each distinct list is parsed once.
+    """
+    list_codes, lists = pd.factorize(series, use_na_sentinel=False)
+    parsed = [parse_image_list(text) for text in lists]
+    lengths = np.fromiter((len(urls) for urls in parsed), dtype=np.int64, count=len(parsed))
+    url_codes, urls = pd.factorize(pd.Series([url for urls in parsed for url in urls], dtype=object))
+    list_offsets = np.zeros(len(parsed) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=list_offsets[1:])
+
+    # Lay the rows out from their lists' URL ranges
+    row_lengths = lengths[list_codes]
+    offsets = np.zeros(len(series) + 1, dtype=np.int64)
+    np.cumsum(row_lengths, out=offsets[1:])
+    starts = np.repeat(list_offsets[:-1][list_codes] - offsets[:-1], row_lengths)
+    row_url_codes = url_codes[starts + np.arange(offsets[-1])].astype(np.int32)
+    return offsets, row_url_codes, np.asarray(urls, dtype=object)
+
+
+def first_image_urls(series, placeholder):
+    """The first URL of each row's image list, or placeholder for rows without one."""
+    offsets, url_codes, urls = parse_image_lists(series)
+    has_image = offsets[1:] > offsets[:-1]
+    first = np.full(len(series), placeholder, dtype=object)
+    first[has_image] = urls[url_codes[offsets[:-1][has_image]]]
+    return pd.Series(first, index=series.index)
+
+
+# --- Fetchers ---
+class HttpFetcher:
+    """Fetches assets over HTTP(S) on a pooled keep-alive client."""
+
+    def __init__(self, timeout=ASSET_FETCH_TIMEOUT, max_connections=ASSET_FETCH_WORKERS):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(
+                        timeout=self.timeout,
+                        follow_redirects=True,
+                        limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                    )
+        return self._client
+
+    def __call__(self, url) -> bytes:
+        response = self._get_client().get(url)
+        response.raise_for_status()
+        return response.content
+
+
+class LocalFileFetcher:
+    """
+    Serves assets from a local directory by their URL path, standing in for the
+    image host in tests and benchmarks. latency (seconds) simulates the network.
+    """
+
+    def __init__(self, root, latency=0.0):
+        self.root = root
+        self.latency = latency
+
+    def __call__(self, url) -> bytes:
+        if self.latency:
+            time.sleep(self.latency)
+        with open(os.path.join(self.root, urlsplit(url).path.lstrip("/")), "rb") as f:
+            return f.read()
+
+
+def make_thumbnail(data, size=THUMBNAIL_SIZE, quality=THUMBNAIL_QUALITY):
+    """Downscales an image to fit size and re-encodes it as JPEG; None if it is not an image."""
+    from PIL import Image, UnidentifiedImageError
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.thumbnail(size)
+            output = io.BytesIO()
+            image.convert("RGB").save(output, format="JPEG", quality=quality, optimize=True)
+    except (UnidentifiedImageError, OSError, ValueError):
+        return None
+    return output.getvalue()
+
+
+# --- Thumbnail Cache ---
+class ThumbnailCache:
+    """
+    Card thumbnails on local disk, bounded by a byte budget with LRU eviction.
+
+    get() never blocks on the network: it returns the cached thumbnail or None.
+    prefetch() fetches missing ones in a thread pool; concurrent requests for
+    the same URL share one fetch. The recency order survives restarts through
+    the files' modification times.
+    """
+
+    def __init__(self, directory=ASSET_CACHE_DIR, max_bytes=ASSET_CACHE_MAX_BYTES, fetcher=None,
+                 workers=ASSET_FETCH_WORKERS, thumbnail_size=THUMBNAIL_SIZE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.fetcher = fetcher or HttpFetcher()
+        self.thumbnail_size = thumbnail_size
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.failures = 0
+        # key -> size in bytes, least recently used first
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="asset-prefetch")
+        os.makedirs(directory, exist_ok=True)
+        self._load_existing()
+
+    @staticmethod
+    def key(url) -> str:
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.jpg")
+
+    def _load_existing(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".jpg") and entry.is_file():
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        with self._lock:
+            for _, key, size in sorted(files):
+                self._entries[key] = size
+                self._bytes += size
+            self._evict_locked()
+
+    def _evict_locked(self):
+        while self._bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def get(self, url):
+        """Returns the cached thumbnail bytes for url, or None without fetching."""
+        if not url:
+            return None
+        key = self.key(url)
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        try:
+            path = self._path(key)
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            # Evicted by another thread in the meantime
+            return None
+
+    def wait_for(self, url, timeout):
+        """Like get(), but first waits up to timeout seconds for an in-flight fetch of url."""
+        if url and timeout > 0:
+            with self._lock:
+                future = self._pending.get(self.key(url))
+            if future is not None:
+                wait([future], timeout=timeout)
+        return self.get(url)
+
+    def prefetch(self, urls) -> list:
+        """Starts fetching the thumbnails of urls that are neither cached nor in flight. Returns their futures."""
+        futures = []
+        with self._lock:
+            for url in dict.fromkeys(urls):
+                if not url:
+                    continue
+                key = self.key(url)
+                if key in self._entries:
+                    continue
+                future = self._pending.get(key)
+                if future is None:
+                    future = self._executor.submit(self._fetch, url, key)
+                    self._pending[key] = future
+                futures.append(future)
+        return futures
+
+    def _fetch(self, url, key):
+        try:
+            with self._lock:
+                self.fetches += 1
+            thumbnail = make_thumbnail(self.fetcher(url), self.thumbnail_size)
+            if thumbnail is None or len(thumbnail) > self.max_bytes:
+                raise ValueError(f"no storable thumbnail for {url}")
+            path = self._path(key)
+            with open(f"{path}.{threading.get_ident()}.tmp", "wb") as f:
+                f.write(thumbnail)
+            os.replace(f"{path}.{threading.get_ident()}.tmp", path)
+            with self._lock:
+                self._bytes += len(thumbnail) - self._entries.pop(key, 0)
+                self._entries[key] = len(thumbnail)
+                self._evict_locked()
+            return True
+        except Exception:
+            # The card keeps using the remote URL
+            with self._lock:
+                self.failures += 1
+            return False
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "fetches": self.fetches,
+                "failures": self.failures,
+                "in_flight": len(self._pending),
+            }
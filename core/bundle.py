@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+# A "bundle" is a directory holding the prepared master dataset as plain .npy
+# files that can be memory-mapped. Numeric columns are stored as-is; string
+# columns are dictionary-encoded as integer codes plus a UTF-8 blob of the
+# unique values, and read back as Categoricals over the mapped codes, so
+# workers on one box share all column pages through the OS page cache.
+#
+# Each write goes to a fresh directory under "<bundle>.versions/", and the
+# bundle path is a symlink that is swapped to it in one rename. Readers never
+# see a half-written dataset, and processes that still map an older version
+# keep their pages after it is pruned.
+BUNDLE_VERSION = 1
+# Published versions kept on disk, the current one included
+KEEP_VERSIONS = 2
+MANIFEST_FILE = "manifest.json"
+
+
+def bundle_path_for(csv_path: str) -> str:
+    """Returns the default bundle directory next to a master CSV file."""
+    return os.path.splitext(csv_path)[0] + ".bundle"
+
+
+def file_sha1(path: str) -> str:
+    """Hashes a file so a bundle can be checked against the CSV it was built from."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_signature(path: str) -> dict:
+    """Size and modification time of a file, checked before hashing it again."""
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _codes_dtype(categories: int):
+    """The smallest code type pandas keeps for that many categories, so it uses the codes without a copy."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _write_strings(directory, name, series):
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    encoded = [str(value).encode("utf-8") for value in uniques]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(value) for value in encoded])
+    np.save(os.path.join(directory, f"{name}.codes.npy"), codes.astype(_codes_dtype(len(encoded))))
+    np.save(os.path.join(directory, f"{name}.offsets.npy"), offsets)
+    with open(os.path.join(directory, f"{name}.values.bin"), "wb") as f:
+        f.write(b"".join(encoded))
+
+
+def _read_strings(directory, name):
+    codes = np.load(os.path.join(directory, f"{name}.codes.npy"), mmap_mode="r")
+    offsets = np.load(os.path.join(directory, f"{name}.offsets.npy"))
+    with open(os.path.join(directory, f"{name}.values.bin"), "rb") as f:
+        blob = f.read()
+    # Decode each unique value once; code -1 is a missing value
+    categories = [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+    # The codes were written by write_bundle; validating them would read every page
+    return pd.Categorical.from_codes(codes, categories, validate=False)
+
+
+def write_bundle(df: pd.DataFrame, directory: str, source_csv: str = None, extras: dict = None):
+    """
+    Writes the prepared DataFrame as a new memory-mappable bundle version and
+    publishes it at `directory`. Returns the version id.
+
+    extras maps names to arrays built from the same frame (e.g. the semantic
+    index), published together with it; see read_bundle_extras.
+    """
+    version_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    target = os.path.join(directory + ".versions", version_id)
+    os.makedirs(target)
+    columns = []
+    for name in df.columns:
+        series = df[name]
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            values = series.to_numpy()
+            np.save(os.path.join(target, f"{name}.npy"), values)
+            columns.append({"name": name, "kind": "numeric", "dtype": str(values.dtype)})
+        else:
+            _write_strings(target, name, series)
+            columns.append({"name": name, "kind": "string"})
+    for name, values in (extras or {}).items():
+        np.save(os.path.join(target, f"extra.{name}.npy"), values)
+
+    manifest = {
+        "version": BUNDLE_VERSION,
+        "version_id": version_id,
+        "rows": len(df),
+        "columns": columns,
+        "extras": sorted(extras or {}),
+        "source_sha1": file_sha1(source_csv) if source_csv else None,
+        "source_signature": file_signature(source_csv) if source_csv else None,
+    }
+    with open(os.path.join(target, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    _publish(directory, target)
+    _prune_versions(directory + ".versions", keep=os.path.basename(target))
+    return version_id
+
+
+def _publish(directory, target):
+    """Points the bundle path at target with an atomic symlink swap."""
+    link = f"{directory}.link-{os.getpid()}"
+    try:
+        os.symlink(os.path.relpath(target, os.path.dirname(os.path.abspath(directory))), link)
+    except OSError:
+        # No symlinks (e.g. unprivileged Windows): move the version into place instead
+        shutil.rmtree(directory, ignore_errors=True)
+        os.rename(target, directory)
+        return
+    if os.path.isdir(directory) and not os.path.islink(directory):
+        # A bundle from before versioning; a directory cannot be renamed over
+        shutil.rmtree(directory)
+    os.replace(link, directory)
+
+
+def _prune_versions(versions_dir, keep):
+    """Removes all but the newest KEEP_VERSIONS published versions."""
+    try:
+        names = sorted(os.listdir(versions_dir))
+    except FileNotFoundError:
+        return
+    for name in names[:-KEEP_VERSIONS]:
+        if name != keep:
+            shutil.rmtree(os.path.join(versions_dir, name), ignore_errors=True)
+
+
+def bundle_version(directory: str):
+    """
+    Returns the id of the version currently published at directory, or None.
+    Cheap enough to poll for new versions.
+    """
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE)) as f:
+            return json.load(f).get("version_id")
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _built_from(manifest, source_csv) -> bool:
+    """Whether the bundle was built from source_csv; hashes it only when its size or mtime changed."""
+    if manifest.get("source_signature") == file_signature(source_csv):
+        return True
+    return manifest.get("source_sha1") == file_sha1(source_csv)
+
+
+def bundle_built_from(directory: str, source_csv: str) -> bool:
+    """Whether a bundle of this format is published at directory and was built from source_csv."""
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+    return manifest.get("version") == BUNDLE_VERSION and _built_from(manifest, source_csv)
+
+
+def read_bundle(directory: str, source_csv: str = None):
+    """
+    Loads a bundle written by write_bundle, memory-mapping its arrays.
+    Returns None when the bundle is missing, from another version, or was
+    built from a different CSV than source_csv.
+    """
+    # Resolve the published version once, so a swap mid-read cannot mix versions
+    directory = os.path.realpath(directory)
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+    if manifest.get("version") != BUNDLE_VERSION:
+        return None
+    if source_csv and os.path.exists(source_csv) and not _built_from(manifest, source_csv):
+        return None
+
+    data = {}
+    for column in manifest["columns"]:
+        name = column["name"]
+        if column["kind"] == "numeric":
+            data[name] = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+        else:
+            data[name] = _read_strings(directory, name)
+    df = pd.DataFrame(data, copy=False)
+    # Where the extras of this exact version are (see read_bundle_extras)
+    df.attrs["bundle_path"] = directory
+    df.attrs["version_id"] = manifest.get("version_id")
+    return df
+
+
+def read_bundle_extras(directory: str, names):
+    """
+    Memory-maps the named extra arrays of a bundle. Pass the "bundle_path"
+    attribute of a frame from read_bundle to get the extras of its version.
+    Returns None when the bundle has none of them.
+    """
+    directory = os.path.realpath(directory)
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE)) as f:
+            available = set(json.load(f).get("extras", []))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if not available.intersection(names):
+        return None
+    return {
+        name: np.load(os.path.join(directory, f"extra.{name}.npy"), mmap_mode="r") if name in available else None
+        for name in names
+    }
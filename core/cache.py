@@ -0,0 +1,177 @@
+import copy
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Number words the users type for Indian price units, mapped to their multiplier in Rupees.
+_UNIT_MULTIPLIERS = {
+    "cr": 10000000, "crore": 10000000, "crores": 10000000,
+    "l": 100000, "lac": 100000, "lacs": 100000, "lakh": 100000, "lakhs": 100000,
+    "k": 1000,
+}
+_AMOUNT_PATTERN = re.compile(
+    r"(?<![\w.])(\d[\d,]*(?:\.\d+)?)\s*(crores|crore|cr|lakhs|lakh|lacs|lac|l|k)?(?![\w])"
+)
+_BHK_PATTERN = re.compile(r"(\d)\s*-?\s*bhks?\b")
+
+
+def _normalize_amount(match):
+    number, unit = match.group(1), match.group(2)
+    value = float(number.replace(",", ""))
+    if unit:
+        value *= _UNIT_MULTIPLIERS[unit]
+    elif value < 1000:
+        # Small bare numbers are counts (e.g. "2 bathrooms"), not prices
+        return match.group(0)
+    return str(int(round(value)))
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a user query so near-identical phrasings share one cache key.
+    Case, whitespace, trailing punctuation, "2 bhk"/"2bhk" and price formats
+    like "1 cr", "1crore", "100 lakh" and "1,00,00,000" are all collapsed.
+    """
+    text = " ".join(str(query).lower().split())
+    text = text.strip(" .?!")
+    text = _BHK_PATTERN.sub(r"\1bhk", text)
+    return _AMOUNT_PATTERN.sub(_normalize_amount, text)
+
+
+def fingerprint_known_values(known_values: dict) -> str:
+    """Returns a stable hash of known_values, used to invalidate stale cache entries."""
+    canonical = {key: sorted(str(v) for v in values) for key, values in (known_values or {}).items()}
+    payload = json.dumps(canonical, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class QueryCache:
+    """
+    An LRU cache with TTL eviction for NLU filter extraction results.
+
+    Entries are keyed on the normalized query and tagged with a fingerprint of
+    the known_values they were extracted against and of `namespace` (whatever
+    else shaped the answers, e.g. the prompt and the model), so a data refresh
+    or a prompt change invalidates them. When disk_path is set, entries are
+    also written to a small SQLite file that survives Streamlit restarts.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=24 * 3600, disk_path=None, namespace=""):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._known_values_ref = None
+        self._db = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS nlu_cache ("
+                "key TEXT PRIMARY KEY, fingerprint TEXT, filters TEXT, created REAL)"
+            )
+            self._db.commit()
+
+    def _check_fingerprint(self, known_values):
+        # Skip re-hashing when the caller passes the same known_values object again
+        if known_values is self._known_values_ref and self._fingerprint is not None:
+            return self._fingerprint
+        self._known_values_ref = known_values
+        fingerprint = fingerprint_known_values(known_values)
+        if self.namespace:
+            fingerprint = hashlib.sha1(f"{self.namespace}\n{fingerprint}".encode("utf-8")).hexdigest()
+        if fingerprint != self._fingerprint:
+            # known_values changed: everything extracted against the old values is stale
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM nlu_cache WHERE fingerprint != ?", (fingerprint,))
+                self._db.commit()
+            self._fingerprint = fingerprint
+        return fingerprint
+
+    def _is_expired(self, created):
+        return self.ttl_seconds is not None and time.time() - created > self.ttl_seconds
+
+    def get(self, query, known_values):
+        """Returns a copy of the cached filters for the query, or None on a miss."""
+        key = normalize_query(query)
+        with self._lock:
+            fingerprint = self._check_fingerprint(known_values)
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT filters, created FROM nlu_cache WHERE key = ? AND fingerprint = ?",
+                    (key, fingerprint),
+                ).fetchone()
+                if row:
+                    entry = (json.loads(row[0]), row[1])
+                    self._entries[key] = entry
+
+            if entry is not None and self._is_expired(entry[1]):
+                self._evict(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[0])
+
+    def put(self, query, known_values, filters):
+        """Stores the extracted filters for the query."""
+        key = normalize_query(query)
+        created = time.time()
+        with self._lock:
+            fingerprint = self._check_fingerprint(known_values)
+            self._entries[key] = (copy.deepcopy(filters), created)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO nlu_cache (key, fingerprint, filters, created) VALUES (?, ?, ?, ?)",
+                    (key, fingerprint, json.dumps(filters), created),
+                )
+                self._db.execute(
+                    "DELETE FROM nlu_cache WHERE key NOT IN "
+                    "(SELECT key FROM nlu_cache ORDER BY created DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+                self._db.commit()
+
+    def _evict(self, key):
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM nlu_cache WHERE key = ?", (key,))
+            self._db.commit()
+
+    def clear(self):
+        """Drops every cached entry from memory and disk."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM nlu_cache")
+                self._db.commit()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        """Returns the cache counters for display or export."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "entries": len(self._entries),
+        }
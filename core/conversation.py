@@ -0,0 +1,132 @@
+import copy
+
+# Filter keys that only describe the current message and are never carried over
+TRANSIENT_KEYS = ("invalid_location", "reset")
+# Location keys from broadest to narrowest; changing one drops the narrower ones
+LOCATION_KEYS = ("city", "locality", "project_name")
+# String filters compared for equality when checking for a refinement
+STRING_KEYS = ("city", "locality", "project_name", "property_type", "status")
+# What a search is about; replacing one of these starts a different search
+SUBJECT_KEYS = LOCATION_KEYS + ("property_type",)
+# Filters stated for one subject (a budget, the wording left to semantic
+# ranking); dropped when the subject changes unless the message restates them
+SCOPED_KEYS = ("budget", "description")
+# Largest match set kept between turns; bigger ones are simply searched again
+MAX_KEPT_POSITIONS = 200000
+
+
+def _same(a, b) -> bool:
+    return str(a).strip().lower() == str(b).strip().lower()
+
+
+def merge_filters(current: dict, delta: dict) -> dict:
+    """
+    Applies the filters extracted from a follow-up message to the current ones.
+
+    Mentioned keys replace the current value, a None value drops the filter,
+    budgets are merged bound by bound, amenities accumulate, and "reset": true
+    starts over from an empty search. Choosing a new city drops the locality and
+    project of the old one (and a new locality drops the project). Changing the
+    location or property type also drops the old budget and description, and a
+    new budget bound that contradicts an old one replaces the whole budget.
+    """
+    merged = {} if delta.get("reset") else copy.deepcopy(current)
+    merged = {key: value for key, value in merged.items() if key not in TRANSIENT_KEYS}
+
+    if any(delta.get(key) and merged.get(key) and not _same(delta[key], merged[key]) for key in SUBJECT_KEYS):
+        for key in SCOPED_KEYS:
+            if key not in delta:
+                merged.pop(key, None)
+
+    for level, key in enumerate(LOCATION_KEYS):
+        value = delta.get(key)
+        if value and merged.get(key) and not _same(value, merged[key]):
+            for narrower in LOCATION_KEYS[level + 1:]:
+                if narrower not in delta:
+                    merged.pop(narrower, None)
+
+    for key, value in delta.items():
+        if key == "reset":
+            continue
+        if value is None:
+            merged.pop(key, None)
+        elif key == "budget" and isinstance(value, dict):
+            budget = {**merged.get("budget", {}), **value}
+            budget = {bound: amount for bound, amount in budget.items() if amount is not None}
+            if "min" in budget and "max" in budget and float(budget["min"]) > float(budget["max"]):
+                # "over 1 cr" after "under 80 lakh" replaces the budget instead of matching nothing
+                budget = {bound: amount for bound, amount in value.items() if amount is not None}
+            if budget:
+                merged["budget"] = budget
+            else:
+                merged.pop("budget", None)
+        elif key == "amenities" and isinstance(value, list):
+            merged["amenities"] = list(dict.fromkeys(merged.get("amenities", []) + value))
+        else:
+            merged[key] = value
+    return merged
+
+
+def is_refinement(previous: dict, current: dict) -> bool:
+    """
+    True when every row matching current also matches previous, i.e. the new
+    filters keep all the old constraints and only add or tighten some.
+    """
+    if current.get("invalid_location"):
+        return False
+    for key in STRING_KEYS:
+        if previous.get(key) and not (current.get(key) and _same(previous[key], current[key])):
+            return False
+
+    old_budget, new_budget = previous.get("budget") or {}, current.get("budget") or {}
+    if old_budget.get("min") is not None:
+        if new_budget.get("min") is None or float(new_budget["min"]) < float(old_budget["min"]):
+            return False
+    if old_budget.get("max") is not None:
+        if new_budget.get("max") is None or float(new_budget["max"]) > float(old_budget["max"]):
+            return False
+
+    old_amenities = {str(a).lower() for a in previous.get("amenities") or []}
+    new_amenities = {str(a).lower() for a in current.get("amenities") or []}
+    return old_amenities <= new_amenities
+
+
+class ConversationState:
+    """
+    The search a chat session has narrowed down to so far: the merged filters
+    and the row positions they matched.
+
+    Follow-ups like "only ready ones" or "cheaper than 80 lakh" are merged into
+    the filters, and when they only narrow the search the kept positions are
+    refined instead of searching the whole index again.
+    """
+
+    def __init__(self):
+        self.filters = {}
+        self.positions = None
+        # The dataset version the positions point into (see core.data_service)
+        self.version = None
+
+    def apply(self, delta: dict) -> dict:
+        """Returns the filters for this turn: delta merged into the current search."""
+        return merge_filters(self.filters, delta)
+
+    def positions_to_refine(self, filters: dict):
+        """Returns the kept positions when filters narrow the current search, else None."""
+        if self.positions is None or not self.filters:
+            return None
+        return self.positions if is_refinement(self.filters, filters) else None
+
+    def update(self, filters: dict, positions, version=None):
+        """Records the search answered this turn."""
+        self.version = version
+        self.filters = {key: value for key, value in filters.items() if key not in TRANSIENT_KEYS}
+        if filters.get("invalid_location") or positions is None or len(positions) > MAX_KEPT_POSITIONS:
+            self.positions = None
+        else:
+            self.positions = positions
+
+    def clear(self):
+        self.filters = {}
+        self.positions = None
+        self.version = None
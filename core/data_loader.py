@@ -1,19 +1,30 @@
 import streamlit as st
 import pandas as pd
-import ast
+import logging
+from core.index import PropertyIndex
+from core.facets import FacetAggregates
+from core.amenities import amenity_mask
+from core.assets import parse_image_list, first_image_urls
+from core.bundle import bundle_path_for, read_bundle, read_bundle_extras
+from core.semantic import SemanticIndex, SEMANTIC_EXTRAS
 
-@st.cache_data
-def load_data(csv_path='data/master_properties.csv'):
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_IMAGE = "https://www.home-invest.be/wp-content/uploads/2022/10/placeholder-home-invest.jpeg"
+
+# Lowercased copies of the text columns, used as exact-match search keys
+KEY_COLUMNS = ['city', 'locality', 'project_name', 'possession_status']
+
+def get_first_image(urls_str):
+    """Returns the first URL of a stringified image list, or a placeholder image."""
+    urls_list = parse_image_list(urls_str)
+    return urls_list[0] if urls_list else PLACEHOLDER_IMAGE
+
+def prepare_master_frame(df):
     """
-    Loads, cleans, and preprocesses the property data from the CSV file.
-    Caches the result to improve performance.
+    Cleans the raw master DataFrame and adds the derived columns the app needs.
+    Shared by the CSV loader and by preprocessing when it writes the binary bundle.
     """
-    try:
-        df = pd.read_csv(csv_path)
-    except FileNotFoundError:
-        st.error(f"Error: The file was not found at {csv_path}. Please make sure the file exists.")
-        return pd.DataFrame()
-
     # --- Data Cleaning and Preprocessing ---
     df.columns = df.columns.str.strip().str.lower()
 
@@ -22,39 +33,119 @@ def load_data(csv_path='data/master_properties.csv'):
         if col in df.columns:
             df[col] = df[col].astype(str).str.strip()
 
+    for col in KEY_COLUMNS:
+        if col in df.columns:
+            df[f'{col}_key'] = df[col].str.lower()
+
     if 'price' in df.columns:
         df['price'] = pd.to_numeric(df['price'], errors='coerce')
         df.dropna(subset=['price'], inplace=True)
+        if (df['price'] % 1 == 0).all():
+            df['price'] = df['price'].astype('int64')
 
     if 'images_url' in df.columns:
-        def get_first_image(urls_str):
-            try:
-                urls_list = ast.literal_eval(urls_str)
-                if isinstance(urls_list, list) and urls_list and isinstance(urls_list[0], str):
-                    return urls_list[0].strip('"')
-            except (ValueError, SyntaxError, TypeError):
-                pass
-            return "https://www.home-invest.be/wp-content/uploads/2022/10/placeholder-home-invest.jpeg"
-        df['first_image'] = df['images_url'].apply(get_first_image)
+        # Each distinct image list is parsed once (see core.assets)
+        df['first_image'] = first_image_urls(df['images_url'], PLACEHOLDER_IMAGE)
+
+    if 'amenity_mask' in df.columns:
+        df['amenity_mask'] = pd.to_numeric(df['amenity_mask'], errors='coerce').fillna(0).astype('int64')
+    elif 'amenities' in df.columns:
+        # Older master files have no precomputed mask; derive it from the amenities text
+        df['amenity_mask'] = df['amenities'].apply(amenity_mask).astype('int64')
 
     if 'bhk' in df.columns:
         # Create a standardized property_type column for better matching
         df['property_type'] = df['bhk'].str.lower()
 
-    return df
+    return df.reset_index(drop=True)
 
-@st.cache_data
-def get_known_values(_df):
+def read_master_frame(csv_path='data/master_properties.csv'):
+    """
+    Returns the prepared master DataFrame, memory-mapped from the binary bundle
+    when preprocessing has written one for this CSV, else parsed and cleaned
+    from the CSV. Raises FileNotFoundError when neither exists.
+    """
+    df = read_bundle(bundle_path_for(csv_path), source_csv=csv_path)
+    if df is not None:
+        return df
+    return prepare_master_frame(pd.read_csv(csv_path))
+
+@st.cache_resource
+def load_data(csv_path='data/master_properties.csv'):
+    """
+    Loads, cleans, and preprocesses the property data from the CSV file.
+    Caches the result to improve performance.
+
+    If preprocessing has written a binary bundle for this CSV, the prepared data
+    is memory-mapped from it instead, skipping CSV parsing and all cleaning.
+    The result is shared by every session of the process and must not be modified.
+    """
+    try:
+        return read_master_frame(csv_path)
+    except FileNotFoundError:
+        st.error(f"Error: The file was not found at {csv_path}. Please make sure the file exists.")
+        return pd.DataFrame()
+
+def load_semantic_index(df):
+    """
+    Memory-maps the semantic index that preprocessing stored with the bundle
+    df was read from. None for frames parsed from the CSV.
+    """
+    bundle_path = df.attrs.get("bundle_path")
+    if not bundle_path:
+        return None
+    return SemanticIndex.from_arrays(read_bundle_extras(bundle_path, SEMANTIC_EXTRAS), len(df))
+
+@st.cache_resource
+def build_index(_df):
+    """
+    Builds the PropertyIndex over the loaded DataFrame once per process.
+    Uses cache_resource so the index is shared instead of copied on every hit.
+    """
+    return PropertyIndex(_df, semantic=load_semantic_index(_df))
+
+@st.cache_resource
+def build_facets(_index):
+    """
+    Precomputes the per-facet summary aggregates over the index once per process.
+    """
+    return FacetAggregates(_index)
+
+def extract_known_values(df):
     """
     Extracts unique values from the DataFrame for the NLU model to use.
     """
-    if _df.empty:
+    if df.empty:
         return {}
-        
+
     known_values = {
-        "cities": set(_df['city'].dropna().str.lower()),
-        "localities": set(_df['locality'].dropna().str.lower()),
-        "project_names": set(_df['project_name'].dropna().str.lower()),
-        "property_types": set(_df['property_type'].dropna())
+        "cities": set(df['city'].dropna().str.lower()),
+        "localities": set(df['locality'].dropna().str.lower()),
+        "project_names": set(df['project_name'].dropna().str.lower()),
+        "property_types": set(df['property_type'].dropna())
     }
     return known_values
+
+@st.cache_resource
+def get_known_values(_df):
+    """
+    Extracts unique values from the DataFrame for the NLU model to use.
+    Uses cache_resource so every rerun gets the same object, which the NLU
+    caches recognize without hashing the catalogue again; do not modify it.
+    """
+    return extract_known_values(_df)
+
+@st.cache_resource
+def connect_data_service(socket_path):
+    """
+    Returns a client of the shared dataset server (see core.data_service), or
+    None when it does not answer, so the app falls back to loading the data itself.
+    """
+    from core.data_service import DatasetClient, DataServiceError
+    client = DatasetClient(socket_path)
+    try:
+        client.info()
+    except DataServiceError as e:
+        logger.warning(f"{e}; loading the dataset in this process instead.")
+        return None
+    return client
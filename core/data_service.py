@@ -0,0 +1,316 @@
+import argparse
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+
+import numpy as np
+import pandas as pd
+
+from core.bundle import bundle_path_for, bundle_version
+from core.conversation import MAX_KEPT_POSITIONS
+from core.data_loader import read_master_frame, extract_known_values, load_semantic_index
+from core.facets import FacetAggregates
+from core.index import PropertyIndex
+from core.search import match_positions, rank_properties
+
+# --- Shared Dataset Server ---
+# Streamlit caches the dataset per process, so N app replicas on one node hold
+# N copies of the frame and the index, and each reloads them on every data
+# refresh. The dataset server holds a single copy instead: workers send it
+# filter dicts over a Unix socket and get back the matched positions, the
+# top-ranked rows and the summary stats. When preprocessing publishes a new
+# bundle version, the server loads it in the background and swaps it in
+# atomically; a request is always answered from one version.
+#
+#   python -m core.data_service --socket /tmp/nobrokerage-data.sock
+#   DATA_SERVICE_SOCKET=/tmp/nobrokerage-data.sock streamlit run app.py
+DATA_SERVICE_SOCKET = os.environ.get("DATA_SERVICE_SOCKET")
+DEFAULT_SOCKET_PATH = "/tmp/nobrokerage-data.sock"
+# Seconds between checks for a newly published bundle version
+POLL_SECONDS = 2.0
+
+# Every message is a frame: the byte lengths of a JSON header and of a binary
+# payload (row positions as int64), then both
+_FRAME = struct.Struct(">II")
+
+logger = logging.getLogger(__name__)
+
+
+class DataServiceError(Exception):
+    """Raised when the dataset server cannot be reached or rejects a request."""
+
+
+def _to_json(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _send(sock, header, payload=b""):
+    body = json.dumps(header, default=_to_json).encode("utf-8")
+    # One write, so a small request is not split across packets
+    sock.sendall(_FRAME.pack(len(body), len(payload)) + body + payload)
+
+
+def _recv_exactly(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    while view:
+        received = sock.recv_into(view)
+        if not received:
+            raise ConnectionError("connection closed by peer")
+        view = view[received:]
+    return buffer
+
+
+def _recv(sock):
+    header_size, payload_size = _FRAME.unpack(_recv_exactly(sock, _FRAME.size))
+    header = json.loads(_recv_exactly(sock, header_size))
+    payload = bytes(_recv_exactly(sock, payload_size)) if payload_size else b""
+    return header, payload
+
+
+def _positions_payload(positions):
+    return np.asarray(positions, dtype=np.int64).tobytes()
+
+
+def _positions_from(payload):
+    return np.frombuffer(payload, dtype=np.int64)
+
+
+def _frame_to_json(df):
+    """Column-wise rows of a small result frame, keeping the row ids as its index."""
+    return {"index": df.index.tolist(), "columns": {name: df[name].tolist() for name in df.columns}}
+
+
+def _frame_from_json(data):
+    return pd.DataFrame(data["columns"], index=pd.Index(data["index"], dtype=np.int64))
+
+
+class Dataset:
+    """One loaded version of the master dataset and the structures built over it."""
+
+    def __init__(self, df, version_id):
+        self.version_id = version_id
+        self.index = PropertyIndex(df, semantic=load_semantic_index(df))
+        self.facets = FacetAggregates(self.index)
+        self.known_values = extract_known_values(df)
+
+
+class DatasetServer:
+    """
+    Serves one copy of the dataset to every worker on the node.
+
+    Requests are handled on a thread each and read self.dataset once, so a
+    version swapped in mid-request never mixes with the previous one.
+    """
+
+    def __init__(self, csv_path='data/master_properties.csv', socket_path=DEFAULT_SOCKET_PATH, poll_seconds=POLL_SECONDS):
+        self.csv_path = csv_path
+        self.socket_path = socket_path
+        self.poll_seconds = poll_seconds
+        self._reload_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self.dataset = self._load()
+        self.server = None
+
+    def _load(self):
+        version_id = bundle_version(bundle_path_for(self.csv_path))
+        df = read_master_frame(self.csv_path)
+        logger.info(f"Loaded dataset version {version_id} ({len(df)} rows)")
+        return Dataset(df, version_id)
+
+    def reload(self, force=False) -> bool:
+        """Loads and swaps in the published version if it is new. Returns True on a swap."""
+        with self._reload_lock:
+            published = bundle_version(bundle_path_for(self.csv_path))
+            if not force and (published is None or published == self.dataset.version_id):
+                return False
+            dataset = self._load()
+            # A single reference assignment: requests see the old or the new version, never both
+            self.dataset = dataset
+            return True
+
+    def _watch(self):
+        while not self._stopped.wait(self.poll_seconds):
+            try:
+                self.reload()
+            except Exception as e:
+                logger.warning(f"Dataset reload failed, still serving version {self.dataset.version_id}: {e}")
+
+    def handle(self, request, payload):
+        """Answers one request; returns the response header and binary payload."""
+        dataset = self.dataset
+        op = request.get("op")
+        if op == "info":
+            return {"version": dataset.version_id, "rows": dataset.index.size}, b""
+        if op == "known_values":
+            return {"version": dataset.version_id, "known_values": dataset.known_values}, b""
+        if op == "search":
+            filters = request.get("filters") or {}
+            # Positions kept from another version would point at the wrong rows
+            within = _positions_from(payload) if payload and request.get("version") == dataset.version_id else None
+            positions = match_positions(filters, dataset.index, within=within)
+            results, stats = rank_properties(filters, dataset.index, k=request.get("k", 5), facets=dataset.facets, positions=positions)
+            keep = len(positions) <= MAX_KEPT_POSITIONS
+            header = {"version": dataset.version_id, "stats": stats, "results": _frame_to_json(results), "positions_kept": keep}
+            return header, _positions_payload(positions) if keep else b""
+        if op == "rows":
+            if request.get("version") not in (None, dataset.version_id):
+                # The ids were stored against another version and now name other rows
+                return {"version": dataset.version_id, "stale": True}, b""
+            ids = _positions_from(payload)
+            ids = ids[ids < dataset.index.size]
+            return {"version": dataset.version_id, "results": _frame_to_json(dataset.index.take(ids))}, b""
+        if op == "reload":
+            swapped = self.reload(force=request.get("force", False))
+            return {"version": self.dataset.version_id, "swapped": swapped}, b""
+        return {"error": f"unknown op: {op}"}, b""
+
+    def serve_forever(self):
+        service = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                # Workers keep their connection open across requests
+                while True:
+                    try:
+                        request, payload = _recv(self.request)
+                    except (ConnectionError, struct.error):
+                        return
+                    try:
+                        header, body = service.handle(request, payload)
+                    except Exception as e:
+                        logger.exception("Dataset request failed")
+                        header, body = {"error": f"{type(e).__name__}: {e}"}, b""
+                    _send(self.request, header, body)
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self._watch, name="dataset-watcher", daemon=True).start()
+        logger.info(f"Serving dataset version {self.dataset.version_id} on {self.socket_path}")
+        try:
+            self.server.serve_forever()
+        finally:
+            self._stopped.set()
+            self.server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def shutdown(self):
+        if self.server is not None:
+            self.server.shutdown()
+
+
+class DatasetClient:
+    """
+    A worker's connection to the dataset server. Safe to share between
+    sessions: each call borrows an idle socket or opens a new one.
+    """
+
+    def __init__(self, socket_path=DATA_SERVICE_SOCKET or DEFAULT_SOCKET_PATH, timeout=30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        # The dataset version of the last answer
+        self.version = None
+        self._idle = []
+        self._known_values = None
+        self._known_version = None
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _call(self, request, payload=b""):
+        # One retry on a fresh connection, e.g. after the server restarted
+        for attempt in range(2):
+            try:
+                sock = self._idle.pop()
+            except IndexError:
+                sock = None
+            try:
+                sock = sock or self._connect()
+                _send(sock, request, payload)
+                header, body = _recv(sock)
+            except OSError as e:
+                if sock is not None:
+                    sock.close()
+                if attempt:
+                    raise DataServiceError(f"dataset server at {self.socket_path} unavailable: {e}") from e
+                continue
+            self._idle.append(sock)
+            break
+        if "error" in header:
+            raise DataServiceError(header["error"])
+        self.version = header.get("version", self.version)
+        return header, body
+
+    def info(self) -> dict:
+        return self._call({"op": "info"})[0]
+
+    def known_values(self) -> dict:
+        """The NLU vocabulary of the served version, fetched again after a swap."""
+        if self._known_values is None or self._known_version != self.version:
+            header, _ = self._call({"op": "known_values"})
+            self._known_values = {name: set(values) for name, values in header["known_values"].items()}
+            self._known_version = header["version"]
+        return self._known_values
+
+    def search(self, filters, k=5, within=None, version=None):
+        """
+        Returns (positions, top_k_df, stats, version) like match_positions and
+        rank_properties. within is only refined when version is the served one;
+        positions is None when too many rows matched to be worth keeping.
+        """
+        request = {"op": "search", "filters": filters, "k": k, "version": version}
+        payload = _positions_payload(within) if within is not None else b""
+        header, body = self._call(request, payload)
+        positions = _positions_from(body) if header["positions_kept"] else None
+        return positions, _frame_from_json(header["results"]), header["stats"], header["version"]
+
+    def rows(self, ids, version=None):
+        """
+        The rows with the given ids in the served version. With version, None
+        when that version is no longer the one served.
+        """
+        header, _ = self._call({"op": "rows", "version": version}, _positions_payload(ids))
+        if header.get("stale"):
+            return None
+        return _frame_from_json(header["results"])
+
+    def reload(self, force=False) -> dict:
+        return self._call({"op": "reload", "force": force})[0]
+
+    def close(self):
+        while self._idle:
+            self._idle.pop().close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the property dataset to the app's workers over a Unix socket.")
+    parser.add_argument('--csv', default='data/master_properties.csv', help="master CSV whose bundle is served")
+    parser.add_argument('--socket', default=DATA_SERVICE_SOCKET or DEFAULT_SOCKET_PATH, help="Unix socket path to listen on")
+    parser.add_argument('--poll', type=float, default=POLL_SECONDS, help="seconds between checks for a new bundle version")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    DatasetServer(args.csv, args.socket, args.poll).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import re
+from collections import defaultdict
+
+import numpy as np
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_DIGITS = re.compile(r"\d+")
+
+
+def normalize_entity(text) -> str:
+    """Lowercases and collapses every run of punctuation/whitespace to a single space."""
+    return _NON_ALNUM.sub(" ", str(text).lower()).strip()
+
+
+def trigrams(text) -> set:
+    """Returns the set of character trigrams of the normalized, space-padded text."""
+    padded = f" {normalize_entity(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    An inverted index from character trigrams to entity values.
+
+    Used to pick the known entities a query most plausibly mentions without
+    comparing the query against every entity string.
+    """
+
+    def __init__(self, values):
+        self.values = sorted({str(v).strip().lower() for v in values if str(v).strip()})
+        sizes = []
+        postings = defaultdict(list)
+        for entity_id, value in enumerate(self.values):
+            grams = trigrams(value)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings[gram].append(entity_id)
+        self.sizes = np.asarray(sizes, dtype=np.float64)
+        self.postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def search(self, text, top_k=10, min_score=0.0):
+        """
+        Returns up to top_k (value, score) pairs, best first. The score is the
+        share of an entity's trigrams found in the text, so an entity that is
+        mentioned verbatim scores 1.0 however long the surrounding query is.
+        """
+        postings = [self.postings[gram] for gram in trigrams(text) if gram in self.postings]
+        if not postings or top_k <= 0:
+            return []
+        scores = np.bincount(np.concatenate(postings), minlength=len(self.values)) / self.sizes
+        entity_ids = np.flatnonzero(scores > min_score)
+        if len(entity_ids) > top_k:
+            # Keep the entities tied with or above the top_k-th best score
+            threshold = np.partition(scores[entity_ids], -top_k)[-top_k]
+            entity_ids = entity_ids[scores[entity_ids] >= threshold]
+        # Best first; ties go to the alphabetically first value (values are sorted)
+        entity_ids = entity_ids[np.lexsort((entity_ids, -scores[entity_ids]))][:top_k]
+        return [(self.values[entity_id], float(scores[entity_id])) for entity_id in entity_ids]
+
+
+def compact_key(text) -> str:
+    """Token-normalized key with all separators removed: 'Shivaji Nagar' -> 'shivajinagar'."""
+    return _NON_ALNUM.sub("", str(text).lower())
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Edit distance between a and b counting insertions, deletions, substitutions
+    and adjacent transpositions ("pnue" -> "pune" is 1). Gives up early once
+    the distance must exceed max_distance and returns max_distance + 1.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    before_previous, previous = None, list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, char_b in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            if before_previous is not None and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                current[j] = min(current[j], before_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        before_previous, previous = previous, current
+    return previous[-1]
+
+
+class EntityIndex:
+    """
+    Snaps slightly-off entity names (e.g. "shivaji nagar", "pristine 02") to
+    their canonical known value.
+
+    Values are looked up first by their compact key (case, spaces and
+    punctuation removed), then by trigram candidates on that key verified with
+    a bounded edit distance, so a lookup only touches a handful of entries.
+    Numbers are never corrected: "6bhk" will not snap to "5bhk".
+    """
+
+    # Candidates verified with edit distance per lookup
+    CANDIDATES = 5
+    # Shortest key that may be corrected; shorter keys must match exactly
+    MIN_FUZZY_LENGTH = 4
+    # Catalogues this small (cities, property types) are compared in full, since
+    # a typo in a short name can leave no trigram in common with it
+    SCAN_ALL_BELOW = 64
+
+    def __init__(self, values):
+        self.exact = {}
+        self.values = []
+        self.keys = []
+        self.postings = defaultdict(list)
+        for value in sorted({str(v).strip().lower() for v in values if str(v).strip()}):
+            key = compact_key(value)
+            if not key or key in self.exact:
+                continue
+            self.exact[key] = value
+            entity_id = len(self.values)
+            self.values.append(value)
+            self.keys.append(key)
+            for gram in self._grams(key):
+                self.postings[gram].append(entity_id)
+        self.postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in self.postings.items()}
+
+    @staticmethod
+    def _grams(key):
+        padded = f"^{key}$"
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    @staticmethod
+    def max_distance(key) -> int:
+        """Allowed typos: about one per four characters."""
+        return max(1, round(len(key) / 4))
+
+    def resolve(self, text):
+        """Returns the canonical value for text, or None if nothing is close enough."""
+        key = compact_key(text)
+        if not key:
+            return None
+        if key in self.exact:
+            return self.exact[key]
+        if len(key) < self.MIN_FUZZY_LENGTH:
+            return None
+
+        if len(self.values) <= self.SCAN_ALL_BELOW:
+            return self._closest(key, range(len(self.values)))
+
+        postings = [self.postings[gram] for gram in self._grams(key) if gram in self.postings]
+        if not postings:
+            return None
+        shared = np.bincount(np.concatenate(postings), minlength=len(self.values))
+        # Keep the entities tied with or above the CANDIDATES-th best trigram overlap
+        if len(shared) > self.CANDIDATES:
+            threshold = max(np.partition(shared, -self.CANDIDATES)[-self.CANDIDATES], 1)
+        else:
+            threshold = 1
+        entity_ids = np.flatnonzero(shared >= threshold)
+        # Most shared trigrams first; ties go to the alphabetically first value
+        candidates = entity_ids[np.lexsort((entity_ids, -shared[entity_ids]))][:self.CANDIDATES]
+        return self._closest(key, candidates)
+
+    def _closest(self, key, candidates):
+        """Returns the value of the candidate nearest to key within the typo budget, or None."""
+        limit = self.max_distance(key)
+        digits = _DIGITS.findall(key)
+        best, best_distance = None, limit + 1
+        for entity_id in candidates:
+            if _DIGITS.findall(self.keys[entity_id]) != digits:
+                continue
+            distance = edit_distance(key, self.keys[entity_id], limit)
+            if distance < best_distance:
+                best, best_distance = self.values[entity_id], distance
+        return best
+
+
+# Maps filter keys to the known_values category their values come from
+ENTITY_FILTER_KEYS = {
+    "city": "cities",
+    "locality": "localities",
+    "project_name": "project_names",
+    "property_type": "property_types",
+}
+
+
+class KnownEntities:
+    """One EntityIndex per filterable entity category of known_values."""
+
+    def __init__(self, known_values):
+        self.indexes = {
+            filter_key: EntityIndex(known_values.get(category, []))
+            for filter_key, category in ENTITY_FILTER_KEYS.items()
+        }
+
+    def snap_filters(self, filters: dict) -> dict:
+        """Returns a copy of filters with entity values replaced by their canonical form when one is close enough."""
+        snapped = dict(filters)
+        for filter_key, index in self.indexes.items():
+            value = snapped.get(filter_key)
+            if isinstance(value, str) and value:
+                canonical = index.resolve(value)
+                if canonical is not None:
+                    snapped[filter_key] = canonical
+        return snapped
@@ -0,0 +1,106 @@
+import numpy as np
+
+# Filter keys the facet cube is built over; every other filter needs a row scan.
+FACET_KEYS = ("city", "property_type", "status")
+# Filter keys that only reorder the matches, never narrow them
+RANKING_ONLY_KEYS = ("description",)
+# Number of localities reported in the aggregate statistics
+TOP_LOCALITIES = 2
+
+_NEVER_SEEN = np.iinfo(np.int64).max
+
+
+class FacetAggregates:
+    """
+    Precomputed summary aggregates for every city x property_type x status cell.
+
+    Each cell holds the row count, min/max price and a locality histogram
+    (with the first row position of each locality, for stable tie-breaking).
+    A summary for any combination of those three filters, including broad ones
+    like "flats in pune", is answered by merging a handful of cells instead of
+    rescanning the matching rows.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.size = index.size
+        self.value_codes = {}
+        dimension_codes = []
+        for key in FACET_KEYS:
+            codes = index.codes.get(key)
+            uniques = index.uniques.get(key, np.empty(0, dtype=object))
+            if codes is None:
+                codes = np.full(index.size, -1, dtype=np.int64)
+            self.value_codes[key] = {value: code for code, value in enumerate(uniques)}
+            # Shift by one so missing values (-1) get their own slot
+            dimension_codes.append((np.asarray(codes, dtype=np.int64) + 1, len(uniques) + 1))
+
+        cell_keys = np.zeros(index.size, dtype=np.int64)
+        for codes, cardinality in dimension_codes:
+            cell_keys = cell_keys * cardinality + codes
+        cell_ids, cell_of_row = np.unique(cell_keys, return_inverse=True)
+        cell_of_row = cell_of_row.reshape(-1)
+        n_cells = len(cell_ids)
+
+        # Decode each cell back into its per-dimension codes (still shifted by one)
+        self.cell_codes = {}
+        remainder = cell_ids
+        for key, (_, cardinality) in reversed(list(zip(FACET_KEYS, dimension_codes))):
+            self.cell_codes[key] = remainder % cardinality - 1
+            remainder = remainder // cardinality
+
+        prices = index.prices
+        self.counts = np.bincount(cell_of_row, minlength=n_cells)
+        self.min_prices = np.full(n_cells, np.inf)
+        self.max_prices = np.full(n_cells, -np.inf)
+        np.fmin.at(self.min_prices, cell_of_row, prices)
+        np.fmax.at(self.max_prices, cell_of_row, prices)
+
+        self.locality_values = index.uniques.get("locality", np.empty(0, dtype=object))
+        locality_codes = index.codes.get("locality", np.full(index.size, -1, dtype=np.int64))
+        n_localities = len(self.locality_values)
+        has_locality = locality_codes >= 0
+        flat = cell_of_row[has_locality] * n_localities + locality_codes[has_locality]
+        self.locality_counts = np.bincount(flat, minlength=n_cells * n_localities).reshape(n_cells, n_localities)
+        first_seen = np.full(n_cells * n_localities, _NEVER_SEEN, dtype=np.int64)
+        np.minimum.at(first_seen, flat, np.flatnonzero(has_locality))
+        self.locality_first_seen = first_seen.reshape(n_cells, n_localities)
+
+    @staticmethod
+    def covers(filters) -> bool:
+        """True when every active filter is a facet dimension, so no row scan is needed."""
+        active = [key for key, value in filters.items() if value and key not in RANKING_ONLY_KEYS]
+        return all(key in FACET_KEYS for key in active)
+
+    def stats_for(self, filters):
+        """
+        Merges the matching cells into the stats dict used by the summarizer.
+        Returns None when the filters include anything beyond the facet keys.
+        """
+        if not self.covers(filters):
+            return None
+
+        selected = np.ones(len(self.counts), dtype=bool)
+        for key in FACET_KEYS:
+            if filters.get(key):
+                code = self.value_codes[key].get(self.index.resolve_value(key, filters[key]))
+                if code is None:
+                    selected[:] = False
+                    break
+                selected &= self.cell_codes[key] == code
+
+        count = int(self.counts[selected].sum())
+        stats = {"count": count, "min_price": None, "max_price": None, "top_localities": []}
+        if count == 0:
+            return stats
+
+        stats["min_price"] = float(self.min_prices[selected].min())
+        stats["max_price"] = float(self.max_prices[selected].max())
+
+        locality_counts = self.locality_counts[selected].sum(axis=0)
+        first_seen = self.locality_first_seen[selected].min(axis=0)
+        present = np.flatnonzero(locality_counts)
+        # Most frequent first; ties go to the locality seen first, like value_counts()
+        order = np.lexsort((first_seen[present], -locality_counts[present]))[:TOP_LOCALITIES]
+        stats["top_localities"] = [self.locality_values[code] for code in present[order]]
+        return stats
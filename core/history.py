@@ -0,0 +1,60 @@
+from collections import deque
+
+import numpy as np
+
+# Messages kept per session; the oldest are dropped beyond this
+MAX_HISTORY_MESSAGES = 100
+# Assistant replies whose property cards are rendered without being asked for
+EXPANDED_RESULT_TURNS = 1
+
+
+class ChatMessage:
+    """
+    One chat message. Search results are kept as row ids into the shared,
+    read-only dataset (an int32 array) rather than as a copied DataFrame,
+    together with the dataset version the ids point into.
+    """
+
+    __slots__ = ("message_id", "role", "content", "result_ids", "version")
+
+    def __init__(self, message_id, role, content, result_ids=None, version=None):
+        self.message_id = message_id
+        self.role = role
+        self.content = content
+        self.result_ids = None if result_ids is None else np.asarray(result_ids, dtype=np.int32)
+        self.version = version
+
+    @property
+    def has_results(self) -> bool:
+        return self.result_ids is not None and len(self.result_ids) > 0
+
+
+class ChatHistory:
+    """
+    The messages of one chat session, capped at max_messages.
+
+    Only the last EXPANDED_RESULT_TURNS replies with results are meant to
+    render their cards on every rerun; older ones render theirs on request,
+    so a rerun costs the same however long the conversation gets.
+    """
+
+    def __init__(self, max_messages=MAX_HISTORY_MESSAGES):
+        self.messages = deque(maxlen=max_messages)
+        self._next_id = 0
+
+    def append(self, role, content, result_ids=None, version=None) -> ChatMessage:
+        message = ChatMessage(self._next_id, role, content, result_ids, version)
+        self._next_id += 1
+        self.messages.append(message)
+        return message
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    def __len__(self):
+        return len(self.messages)
+
+    def expanded_ids(self, turns=EXPANDED_RESULT_TURNS) -> set:
+        """Returns the ids of the most recent messages whose results render by default."""
+        with_results = [message.message_id for message in self.messages if message.has_results]
+        return set(with_results[-turns:]) if turns > 0 else set()
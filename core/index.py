@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+from core.amenities import resolve_query_amenities
+from core.entities import EntityIndex
+
+# Maps each string filter key from the NLU output to the DataFrame column it searches.
+STRING_FILTER_COLUMNS = {
+    "city": "city",
+    "locality": "locality",
+    "project_name": "project_name",
+    "property_type": "property_type",
+    "status": "possession_status",
+}
+
+_EMPTY_POSITIONS = np.empty(0, dtype=np.int64)
+
+
+class PropertyIndex:
+    """
+    A prebuilt, read-only index over the master property DataFrame.
+
+    String columns are stored as inverted posting lists (lowercased value ->
+    sorted row positions) and prices as a sorted NumPy array, so a query only
+    intersects small position arrays instead of copying and re-lowercasing
+    the whole frame.
+    """
+
+    def __init__(self, df: pd.DataFrame, semantic=None):
+        self.df = df
+        self.size = len(df)
+        # Optional core.semantic.SemanticIndex over the same rows, for descriptive queries
+        self.semantic = semantic
+        self.postings = {}
+        # Per-row categorical codes and their values, used for aggregations
+        self.codes = {}
+        self.uniques = {}
+        self.value_codes = {}
+        # Built on first use, to snap misspelled filter values to indexed keys
+        self._entity_indexes = {}
+
+        for filter_key, column in STRING_FILTER_COLUMNS.items():
+            if column not in df.columns:
+                continue
+            # Prefer the precomputed lowercase key column written by the loader
+            if f"{column}_key" in df.columns:
+                keys = df[f"{column}_key"]
+            else:
+                keys = df[column].astype(str).str.lower()
+            codes, uniques = pd.factorize(keys)
+            self.codes[filter_key] = codes
+            self.uniques[filter_key] = np.asarray(uniques, dtype=object)
+            self.value_codes[filter_key] = {value: code for code, value in enumerate(uniques)}
+            # A stable sort keeps positions ascending inside each posting list.
+            order = np.argsort(codes, kind="stable")
+            boundaries = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            self.postings[filter_key] = {
+                value: order[boundaries[i]:boundaries[i + 1]].astype(np.int64)
+                for i, value in enumerate(uniques)
+            }
+
+        if "price" in df.columns:
+            prices = pd.to_numeric(df["price"], errors="coerce").to_numpy(dtype=np.float64)
+        else:
+            prices = np.full(self.size, np.nan)
+        self.prices = prices
+        self.price_order = np.argsort(prices, kind="stable").astype(np.int64)
+        self.sorted_prices = prices[self.price_order]
+
+        if "amenity_mask" in df.columns:
+            self.amenity_masks = df["amenity_mask"].to_numpy(dtype=np.int64)
+        else:
+            self.amenity_masks = None
+
+    def resolve_value(self, filter_key, value):
+        """
+        Returns the indexed key for a string filter value, snapping slightly-off
+        spellings ("shivaji nagar") to the closest known value, or None.
+        """
+        postings = self.postings.get(filter_key, {})
+        key = str(value).lower()
+        if key in postings:
+            return key
+        entity_index = self._entity_indexes.get(filter_key)
+        if entity_index is None:
+            entity_index = self._entity_indexes[filter_key] = EntityIndex(postings.keys())
+        return entity_index.resolve(key)
+
+    def _string_positions(self, filter_key, value):
+        """Returns the posting list for a string filter, or an empty array."""
+        key = self.resolve_value(filter_key, value)
+        if key is None:
+            return _EMPTY_POSITIONS
+        return self.postings[filter_key].get(key, _EMPTY_POSITIONS)
+
+    def _price_positions(self, budget):
+        """Binary-searches the sorted price array for the budget bounds."""
+        lo, hi = 0, len(self.sorted_prices)
+        if budget.get("min") is not None:
+            lo = np.searchsorted(self.sorted_prices, float(budget["min"]), side="left")
+        if budget.get("max") is not None:
+            hi = np.searchsorted(self.sorted_prices, float(budget["max"]), side="right")
+        if lo >= hi:
+            return _EMPTY_POSITIONS
+        return np.sort(self.price_order[lo:hi])
+
+    def lookup(self, filters: dict) -> np.ndarray:
+        """
+        Returns the sorted row positions matching the string and budget filters.
+        Amenity filters are not handled here; they are applied on the candidate rows.
+        """
+        candidates = []
+        for filter_key in STRING_FILTER_COLUMNS:
+            if filters.get(filter_key):
+                candidates.append(self._string_positions(filter_key, filters[filter_key]))
+
+        budget = filters.get("budget")
+        if budget and (budget.get("min") is not None or budget.get("max") is not None):
+            candidates.append(self._price_positions(budget))
+
+        if not candidates:
+            return np.arange(self.size, dtype=np.int64)
+
+        # Intersect the smallest lists first so every step stays cheap.
+        candidates.sort(key=len)
+        positions = candidates[0]
+        for other in candidates[1:]:
+            if positions.size == 0:
+                break
+            positions = np.intersect1d(positions, other, assume_unique=True)
+        return positions
+
+    def refine(self, positions, filters: dict) -> np.ndarray:
+        """
+        Narrows already-matched positions to the rows matching the string and
+        budget filters. Costs O(len(positions)), so a follow-up that tightens an
+        earlier search never goes back to the full posting lists.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        for filter_key in STRING_FILTER_COLUMNS:
+            if positions.size and filters.get(filter_key) and filter_key in self.codes:
+                code = self.value_codes[filter_key].get(self.resolve_value(filter_key, filters[filter_key]))
+                if code is None:
+                    return _EMPTY_POSITIONS
+                positions = positions[self.codes[filter_key][positions] == code]
+
+        budget = filters.get("budget") or {}
+        if positions.size and budget.get("min") is not None:
+            positions = positions[self.prices[positions] >= float(budget["min"])]
+        if positions.size and budget.get("max") is not None:
+            positions = positions[self.prices[positions] <= float(budget["max"])]
+        return positions
+
+    def filter_amenities(self, positions, amenities) -> np.ndarray:
+        """
+        Narrows positions to the rows offering every requested amenity.
+        Known amenities use the bitmask; other terms fall back to a text search.
+        """
+        unresolved = amenities
+        if self.amenity_masks is not None:
+            required_mask, unresolved = resolve_query_amenities(amenities)
+            if required_mask:
+                masks = self.amenity_masks[positions]
+                positions = positions[(masks & required_mask) == required_mask]
+        if unresolved and "amenities" in self.df.columns:
+            texts = self.df["amenities"].iloc[positions]
+            for amenity in unresolved:
+                positions = positions[texts.str.contains(amenity, case=False, na=False).to_numpy()]
+                texts = self.df["amenities"].iloc[positions]
+        return positions
+
+    def take(self, positions) -> pd.DataFrame:
+        """Materializes only the requested row positions."""
+        return self.df.iloc[positions]
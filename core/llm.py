@@ -0,0 +1,207 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import httpx
+from groq import Groq
+
+# --- LLM Backends ---
+# nlu.py talks to the model through a small backend interface, so the Groq
+# client can be swapped for a local deterministic stand-in in load tests and
+# every call carries its own deadline.
+
+
+class BackendUnavailable(Exception):
+    """Raised when a backend is called without being configured."""
+
+
+class LLMBackend:
+    """
+    Interface of an LLM backend: complete() returns the model's JSON text for
+    a prompt, or raises once timeout seconds have passed.
+    """
+
+    name = "base"
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def complete(self, prompt: str, timeout: float) -> str:
+        raise NotImplementedError
+
+
+class GroqBackend(LLMBackend):
+    """
+    Calls the Groq chat completions API. The client is created on first use
+    and reused, so calls share pooled keep-alive connections.
+    """
+
+    name = "groq"
+
+    def __init__(self, model, api_key=None, max_connections=16, base_url=None):
+        self.model = model
+        self.api_key = api_key or os.environ.get("GROQ_API_KEY")
+        # Another OpenAI-compatible server, e.g. a local mock in benchmarks
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return bool(self.api_key)
+
+    def _get_client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    http_client = httpx.Client(limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                    ))
+                    # Retries would blow the per-call deadline; callers fall back instead
+                    self._client = Groq(api_key=self.api_key, base_url=self.base_url, max_retries=0, http_client=http_client)
+        return self._client
+
+    def complete(self, prompt, timeout):
+        if not self.available:
+            raise BackendUnavailable("GROQ_API_KEY not found in .env file.")
+        chat_completion = self._get_client().with_options(timeout=timeout).chat.completions.create(
+            messages=[{"role": "user", "content": prompt}],
+            model=self.model,
+            temperature=0,
+            response_format={"type": "json_object"},
+        )
+        return chat_completion.choices[0].message.content
+
+
+class LocalBackend(LLMBackend):
+    """
+    A deterministic in-process backend for load tests and offline benchmarks.
+
+    responder(prompt) returns the JSON text to answer with. An optional
+    simulated latency (seconds, plus uniform jitter from a seeded generator)
+    makes it behave like a remote model, including hitting the deadline.
+    """
+
+    name = "local"
+
+    def __init__(self, responder, latency=0.0, jitter=0.0, seed=0):
+        self.responder = responder
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def complete(self, prompt, timeout):
+        with self._lock:
+            delay = self.latency + self.jitter * self._random.random()
+        if delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"local backend took longer than {timeout:.2f}s")
+        if delay > 0:
+            time.sleep(delay)
+        return self.responder(prompt)
+
+
+class ReplayBackend(LLMBackend):
+    """
+    Answers with recorded responses, for replaying logged traffic offline.
+
+    responses maps a key to (response_text, seconds the call took);
+    prompt_key(prompt) returns the key of a prompt. Each call takes its
+    recorded time times latency_scale (0 answers at once), within the
+    deadline. Prompts without a recording are answered by fallback(prompt).
+    """
+
+    name = "replay"
+
+    def __init__(self, responses, prompt_key, fallback, latency_scale=1.0):
+        self.responses = responses
+        self.prompt_key = prompt_key
+        self.fallback = fallback
+        self.latency_scale = latency_scale
+        self.replayed = 0
+        self.missing = 0
+        self._lock = threading.Lock()
+
+    def complete(self, prompt, timeout):
+        recorded = self.responses.get(self.prompt_key(prompt))
+        with self._lock:
+            if recorded is None:
+                self.missing += 1
+            else:
+                self.replayed += 1
+        if recorded is None:
+            return self.fallback(prompt)
+        text, seconds = recorded
+        delay = seconds * self.latency_scale
+        if delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"recorded call took longer than {timeout:.2f}s")
+        if delay > 0:
+            time.sleep(delay)
+        return text
+
+
+class CircuitBreaker:
+    """
+    Stops calling a degraded backend.
+
+    A call is bad when it fails, times out, or takes longer than
+    slow_call_seconds. Once failure_ratio of the last `window` calls are bad,
+    the circuit opens and calls are refused for cooldown_seconds; then a single
+    trial call is let through, which closes the circuit again if it is good.
+    """
+
+    def __init__(self, slow_call_seconds=3.0, window=20, min_calls=5, failure_ratio=0.5, cooldown_seconds=30.0):
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.cooldown_seconds = cooldown_seconds
+        self.outcomes = deque(maxlen=window)
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.cooldown_seconds:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        """True when a call may go to the backend now."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record(self, seconds, ok=True):
+        """Records the outcome of a call let through by allow()."""
+        good = ok and seconds <= self.slow_call_seconds
+        with self._lock:
+            if self._trial_in_flight:
+                self._trial_in_flight = False
+                if good:
+                    self.opened_at = None
+                    self.outcomes.clear()
+                else:
+                    self.opened_at = time.monotonic()
+                return
+            self.outcomes.append(good)
+            bad = self.outcomes.count(False)
+            if len(self.outcomes) >= self.min_calls and bad >= self.failure_ratio * len(self.outcomes):
+                self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {"state": self.state, "recent_calls": len(self.outcomes), "recent_bad": self.outcomes.count(False)}
@@ -1,35 +1,30 @@
 import os
+import ast
+import hashlib
 import json
+import logging
+import re
+import time
+from collections import deque
 from dotenv import load_dotenv
-from groq import Groq
+from core.cache import QueryCache, normalize_query, fingerprint_known_values
+from core.amenities import AMENITY_KEYWORDS
+from core.entities import TrigramIndex, KnownEntities
+from core.llm import GroqBackend, LocalBackend, CircuitBreaker
+from core import telemetry
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Initialize the Groq client
-try:
-    groq_api_key = os.environ.get("GROQ_API_KEY")
-    if not groq_api_key:
-        raise ValueError("GROQ_API_KEY not found in .env file.")
-    client = Groq(api_key=groq_api_key)
-except Exception as e:
-    print(f"Error initializing Groq client: {e}")
-    client = None
+logger = logging.getLogger(__name__)
 
 # The correct model name for Llama 3 70B on Groq
 MODEL_NAME = 'llama-3.3-70b-versatile'
 
-def create_llm_prompt(query, known_values):
-    """
-    Creates a more robust and direct prompt for the LLM to extract filters,
-    with improved handling for project names and amenities.
-    """
-    cities = list(known_values.get("cities", []))
-    localities = list(known_values.get("localities", []))
-    property_types = list(known_values.get("property_types", []))
-    project_names = list(known_values.get("project_names", []))
-
-    prompt = f"""
+# --- Prompt Construction ---
+# The instruction and example blocks never change, so they are built once as
+# constants; only the candidate values and the query are formatted per call.
+PROMPT_INSTRUCTIONS = """
     You are an expert AI assistant for a property search website. Your task is to extract search filters from a user's query and return them as a valid JSON object.
 
     IMPORTANT INSTRUCTIONS:
@@ -39,91 +34,555 @@ def create_llm_prompt(query, known_values):
     4.  **Budget Analysis:** Analyze terms like "under", "over", "less than", "more than" to set "min" or "max" values in a "budget" object. The value must be an integer in Rupees.
     5.  **Amenity Extraction:** If the user mentions amenities like "gym", "pool", "security", etc., you MUST include them in an "amenities" list in the JSON.
     6.  **Status Detection:** Look for terms like "ready to move" or "ready" and set a "status" key to "ready_to_move".
+    7.  **Follow-ups:** The query may refine an earlier search ("only ready ones", "cheaper than 80 lakh"). Only include the keys this query mentions. Set a key to null when the user drops that filter ("any budget"), and add "reset": true when the user clearly starts a new, unrelated search.
+    8.  **Descriptive Wishes:** Put wishes that fit no other key ("quiet", "family-friendly", "near schools") in a short "description" string.
+"""
 
-    DATABASE VALUES:
-    -   Valid Cities: {cities}
-    -   Valid Localities: {localities}
-    -   Valid Property Types: {property_types}
-    -   Valid Project Names: {project_names}
-
+PROMPT_EXAMPLES = """
     EXAMPLES:
 
     User Query: "Show me 2BHKs in Pune under 1 Cr with a gym"
     JSON Response:
-    {{
+    {
       "city": "pune",
       "property_type": "2bhk",
-      "budget": {{
+      "budget": {
         "max": 10000000
-      }},
+      },
       "amenities": ["gym"]
-    }}
+    }
 
     User Query: "Show me properties in the Pristine02 project"
     JSON Response:
-    {{
+    {
       "project_name": "pristine02"
-    }}
+    }
 
     User Query: "ready 3bhk in dehradun under 1.2 cr"
     JSON Response:
-    {{
+    {
       "status": "ready_to_move",
       "property_type": "3bhk",
-      "budget": {{
+      "budget": {
         "max": 12000000
-      }},
+      },
       "invalid_location": "dehradun"
-    }}
+    }
+
+    User Query: "quiet family-friendly 2bhk in pune near schools"
+    JSON Response:
+    {
+      "city": "pune",
+      "property_type": "2bhk",
+      "description": "quiet family-friendly near schools"
+    }
+
+    User Query: "only ready ones, any budget"
+    JSON Response:
+    {
+      "status": "ready_to_move",
+      "budget": null
+    }
     
     ---
     Now, process the following user query.
+"""
+
+# Version of the filter schema the NLU returns (keys, value formats, how
+# standardize_filters and the fast path read them); bump it when that changes
+FILTER_SCHEMA_VERSION = 1
+
+def prompt_fingerprint() -> str:
+    """Hashes everything besides known_values that shapes an extraction: prompt, model and schema."""
+    payload = json.dumps([PROMPT_INSTRUCTIONS, PROMPT_EXAMPLES, MODEL_NAME, FILTER_SCHEMA_VERSION])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+# Cache of extracted filters keyed on the normalized query.
+# Set NLU_CACHE_PATH to persist entries on disk across Streamlit restarts.
+# Entries from another prompt, model or schema are dropped, on disk too.
+query_cache = QueryCache(
+    max_entries=int(os.environ.get("NLU_CACHE_SIZE", 1024)),
+    ttl_seconds=float(os.environ.get("NLU_CACHE_TTL", 24 * 3600)),
+    disk_path=os.environ.get("NLU_CACHE_PATH"),
+    namespace=prompt_fingerprint(),
+)
+
+# Number of plausible localities / project names sent with each prompt, and the
+# approximate token budget for the whole DATABASE VALUES section.
+PROMPT_CANDIDATES_TOP_K = int(os.environ.get("NLU_PROMPT_TOP_K", 10))
+PROMPT_VALUES_TOKEN_BUDGET = int(os.environ.get("NLU_PROMPT_TOKEN_BUDGET", 400))
+# Minimum share of an entity's trigrams that must appear in the query
+PROMPT_CANDIDATE_MIN_SCORE = 0.34
+
+# Recent prompt sizes, for monitoring how many tokens each request sends
+prompt_size_history = deque(maxlen=1000)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for Llama-style tokenizers (about 4 characters per token)."""
+    return (len(text) + 3) // 4
+
+class PromptCandidateSelector:
+    """
+    Picks the known values worth sending to the LLM for a given query.
+
+    Cities and property types are small closed sets and are always sent in full.
+    Localities and project names grow with the catalogue, so only the top-k
+    trigram matches against the query are included.
+    """
+
+    def __init__(self, known_values):
+        self.cities = sorted(known_values.get("cities", []))
+        self.property_types = sorted(known_values.get("property_types", []))
+        self.locality_index = TrigramIndex(known_values.get("localities", []))
+        self.project_index = TrigramIndex(known_values.get("project_names", []))
 
+    def select(self, query, top_k=PROMPT_CANDIDATES_TOP_K, token_budget=PROMPT_VALUES_TOKEN_BUDGET):
+        """Returns a dict of candidate lists that fits within the token budget."""
+        localities = self.locality_index.search(query, top_k, PROMPT_CANDIDATE_MIN_SCORE)
+        projects = self.project_index.search(query, top_k, PROMPT_CANDIDATE_MIN_SCORE)
+        candidates = {
+            "cities": self.cities,
+            "localities": [value for value, _ in localities],
+            "property_types": self.property_types,
+            "project_names": [value for value, _ in projects],
+        }
+
+        # Drop the weakest locality/project matches until the section fits the budget
+        ranked = sorted(
+            [("localities", value, score) for value, score in localities]
+            + [("project_names", value, score) for value, score in projects],
+            key=lambda item: item[2],
+        )
+        while ranked and estimate_tokens(format_prompt_values(candidates)) > token_budget:
+            key, value, _ = ranked.pop(0)
+            candidates[key].remove(value)
+        return candidates
+
+def format_prompt_values(candidates):
+    """Formats the DATABASE VALUES section of the prompt."""
+    return f"""
+    DATABASE VALUES:
+    -   Valid Cities: {candidates["cities"]}
+    -   Valid Localities: {candidates["localities"]}
+    -   Valid Property Types: {candidates["property_types"]}
+    -   Valid Project Names: {candidates["project_names"]}
+"""
+
+def create_llm_prompt(query, known_values):
+    """
+    Creates a more robust and direct prompt for the LLM to extract filters,
+    with improved handling for project names and amenities.
+    Only the known values plausibly mentioned in the query are included.
+    """
+    candidates = _get_compiled(known_values, PromptCandidateSelector).select(query)
+
+    prompt = (
+        PROMPT_INSTRUCTIONS
+        + format_prompt_values(candidates)
+        + PROMPT_EXAMPLES
+        + f"""
     User Query: "{query}"
     JSON Response:
     """
+    )
     return prompt
 
-def extract_filters_with_groq(query, known_values):
+# --- Local Fast-Path Parser ---
+# Simple queries ("2bhk in pune under 1 cr with gym") are parsed locally and
+# only low-confidence ones are sent to the LLM.
+FAST_PATH_MIN_CONFIDENCE = float(os.environ.get("NLU_FAST_PATH_MIN_CONFIDENCE", 0.9))
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\.[a-z0-9]+)*")
+_MAX_BUDGET_PATTERN = re.compile(r"\b(?:under|below|less than|cheaper than|within|upto|up to|max|maximum|not more than)\s+(?:rs\.?\s*|₹\s*)?(\d{4,})\b")
+_MIN_BUDGET_PATTERN = re.compile(r"\b(?:over|above|more than|costlier than|greater than|min|minimum|at least|starting from|starting at)\s+(?:rs\.?\s*|₹\s*)?(\d{4,})\b")
+_RANGE_BUDGET_PATTERN = re.compile(r"\bbetween\s+(?:rs\.?\s*|₹\s*)?(\d{4,})\s+(?:and|to|-)\s+(?:rs\.?\s*|₹\s*)?(\d{4,})\b")
+_STATUS_PATTERNS = [
+    (re.compile(r"\bready(?:\s*-?\s*to\s*-?\s*move)?(?:\s*-?\s*in)?\b"), "ready_to_move"),
+    (re.compile(r"\bunder\s*-?\s*construction\b"), "under_construction"),
+]
+# Phrases that start a new search instead of refining the current one
+_RESET_PATTERN = re.compile(r"\b(?:new search|start over|start again|reset|forget (?:that|it|those|this))\b")
+# Everyday words for property types, used only when the target type is a known value
+_PROPERTY_TYPE_ALIASES = {
+    "villa": "house_villa",
+    "villas": "house_villa",
+    "house": "house_villa",
+    "office": "office",
+    "offices": "office",
+}
+# Words that carry no filter information and can be safely ignored
+_FILLER_WORDS = {
+    "show", "me", "find", "search", "get", "list", "give", "i", "want", "need", "am", "looking",
+    "for", "a", "an", "the", "in", "at", "of", "with", "and", "or", "to", "please", "some", "any",
+    "all", "flat", "flats", "apartment", "apartments", "property", "properties", "home", "homes",
+    "options", "listings", "project", "projects", "which", "are", "is", "that", "have", "has",
+    "having", "rs", "inr", "price", "budget", "my", "available", "buy", "new",
+    "only", "just", "ones", "those", "them", "now", "also", "instead", "what", "about",
+}
+
+
+def _tokenize(text):
+    """Splits normalized text into lowercase word tokens, keeping '4.5bhk' together."""
+    return _TOKEN_PATTERN.findall(str(text).lower().replace("_", " "))
+
+
+class FastPathParser:
     """
-    Uses the Groq API and an LLM to extract filters, then standardizes and prints the output.
+    A deterministic filter extractor compiled from known_values.
+
+    Known cities, localities, project names and property types are stored in
+    a token trie and matched greedily (longest match wins). Budgets, status and
+    amenities are read with precompiled regexes and keyword tables. The parser
+    returns the same filter schema as the LLM plus a confidence in [0, 1] that
+    reflects how much of the query was explained without ambiguity.
     """
-    if not client:
-        return {"error": "Groq client not initialized. Check API key."}
 
-    prompt = create_llm_prompt(query, known_values)
+    _ENTITY_KEYS = [
+        ("cities", "city"),
+        ("localities", "locality"),
+        ("project_names", "project_name"),
+        ("property_types", "property_type"),
+    ]
 
-    try:
-        chat_completion = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model=MODEL_NAME,
-            temperature=0,
-            response_format={"type": "json_object"},
+    def __init__(self, known_values):
+        self.trie = {}
+        for known_key, filter_key in self._ENTITY_KEYS:
+            for value in known_values.get(known_key, []):
+                self._insert(_tokenize(value), filter_key, str(value).strip().lower())
+
+        property_types = {str(v).strip().lower() for v in known_values.get("property_types", [])}
+        for alias, target in _PROPERTY_TYPE_ALIASES.items():
+            if target in property_types:
+                self._insert([alias], "property_type", target)
+
+        self.amenity_trie = {}
+        for keywords in AMENITY_KEYWORDS.values():
+            for keyword in keywords:
+                self._insert(_tokenize(keyword), "amenity", keyword, trie=self.amenity_trie)
+
+    def _insert(self, tokens, filter_key, value, trie=None):
+        if not tokens:
+            return
+        node = self.trie if trie is None else trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault(None, set()).add((filter_key, value))
+
+    @staticmethod
+    def _longest_match(trie, tokens, start):
+        """Returns (end, matches) for the longest trie entry starting at tokens[start]."""
+        node, best_end, best = trie, start, None
+        for pos in range(start, len(tokens)):
+            node = node.get(tokens[pos])
+            if node is None:
+                break
+            if None in node:
+                best_end, best = pos + 1, node[None]
+        return best_end, best
+
+    def parse(self, query):
+        """Returns (filters, confidence) for the query."""
+        text = normalize_query(query)
+        filters = {}
+        ambiguous = False
+
+        # --- Budget ---
+        budget = {}
+        range_match = _RANGE_BUDGET_PATTERN.search(text)
+        if range_match:
+            low, high = sorted(int(v) for v in range_match.groups())
+            budget = {"min": low, "max": high}
+        else:
+            max_match = _MAX_BUDGET_PATTERN.search(text)
+            min_match = _MIN_BUDGET_PATTERN.search(text)
+            if max_match:
+                budget["max"] = int(max_match.group(1))
+            if min_match:
+                budget["min"] = int(min_match.group(1))
+        if budget:
+            filters["budget"] = budget
+        for pattern in (_RANGE_BUDGET_PATTERN, _MAX_BUDGET_PATTERN, _MIN_BUDGET_PATTERN):
+            text = pattern.sub(" ", text)
+
+        # --- Follow-ups ---
+        if _RESET_PATTERN.search(text):
+            filters["reset"] = True
+            text = _RESET_PATTERN.sub(" ", text)
+
+        # --- Status ---
+        for pattern, status in _STATUS_PATTERNS:
+            if pattern.search(text):
+                if "status" in filters:
+                    ambiguous = True
+                filters["status"] = status
+                text = pattern.sub(" ", text)
+
+        # --- Entities and Amenities ---
+        tokens = _tokenize(text)
+        amenities = []
+        unexplained = []
+        pos = 0
+        while pos < len(tokens):
+            end, matches = self._longest_match(self.trie, tokens, pos)
+            amenity_end, amenity_matches = self._longest_match(self.amenity_trie, tokens, pos)
+            if amenity_matches and amenity_end > end:
+                amenities.extend(sorted(value for _, value in amenity_matches))
+                pos = amenity_end
+            elif matches:
+                if len(matches) > 1:
+                    # The same words name e.g. both a locality and a project
+                    ambiguous = True
+                for filter_key, value in sorted(matches):
+                    if filters.get(filter_key, value) != value:
+                        ambiguous = True
+                    filters[filter_key] = value
+                pos = end
+            else:
+                token = tokens[pos]
+                if token not in _FILLER_WORDS:
+                    unexplained.append(token)
+                pos += 1
+
+        if amenities:
+            filters["amenities"] = list(dict.fromkeys(amenities))
+        if unexplained:
+            # Left for semantic ranking when the LLM cannot read them (see core.semantic)
+            filters["description"] = " ".join(unexplained)
+
+        if not filters:
+            return {}, 0.0
+
+        # Every unexplained word may be an unknown location or a nuance only the LLM can read
+        confidence = 1.0 / (1 + len(unexplained))
+        if ambiguous:
+            confidence *= 0.5
+        return filters, confidence
+
+
+# builder name -> (known_values, fingerprint, compiled structure)
+_compiled = {}
+# The last known_values fingerprinted, as (known_values, fingerprint)
+_last_fingerprint = (None, None)
+
+def _fingerprint(known_values):
+    """
+    Fingerprints known_values, skipping the hash when the caller passes the
+    same object again. The app's known_values are: get_known_values is a
+    cache_resource, and the data service client keeps its copy until the
+    served version changes.
+    """
+    global _last_fingerprint
+    ref, fingerprint = _last_fingerprint
+    if ref is not known_values:
+        fingerprint = fingerprint_known_values(known_values)
+        _last_fingerprint = (known_values, fingerprint)
+    return fingerprint
+
+def _get_compiled(known_values, builder):
+    """
+    Returns builder(known_values), building it once per distinct known_values.
+    Used for the fast-path parser, the prompt candidate selector and entity snapping.
+    """
+    entry = _compiled.get(builder.__name__)
+    if entry is not None and entry[0] is known_values:
+        return entry[2]
+    fingerprint = _fingerprint(known_values)
+    if entry is not None and entry[1] == fingerprint:
+        compiled = entry[2]
+    else:
+        # Replaces the structure compiled for an older version of the data
+        compiled = builder(known_values)
+    _compiled[builder.__name__] = (known_values, fingerprint, compiled)
+    return compiled
+
+def parse_query_locally(query, known_values):
+    """
+    Extracts filters with the local rule-based parser.
+    Returns (filters, confidence); callers fall back to the LLM when confidence is low.
+    """
+    return _get_compiled(known_values, FastPathParser).parse(query)
+
+# --- LLM Backend ---
+# NLU_BACKEND=local swaps Groq for a deterministic in-process stand-in, for
+# load tests and offline benchmarks of the full chat path.
+NLU_BACKEND = os.environ.get("NLU_BACKEND", "groq")
+# Deadline of a single LLM call, in seconds
+NLU_TIMEOUT_SECONDS = float(os.environ.get("NLU_TIMEOUT", 5))
+# Calls slower than this count against the circuit breaker
+NLU_SLOW_CALL_SECONDS = float(os.environ.get("NLU_SLOW_CALL_SECONDS", 3))
+
+# The last "User Query" of the prompt (the examples have their own)
+_PROMPT_QUERY_PATTERN = re.compile(r'User Query: "(.*)"\s*JSON Response:\s*$')
+_PROMPT_VALUES_PATTERN = re.compile(r"^\s*-\s+Valid (Cities|Localities|Property Types|Project Names): (\[.*\])$", re.M)
+_PROMPT_VALUE_KEYS = {
+    "Cities": "cities",
+    "Localities": "localities",
+    "Property Types": "property_types",
+    "Project Names": "project_names",
+}
+
+def prompt_query(prompt):
+    """Returns the user query an LLM prompt was built for, or None."""
+    match = _PROMPT_QUERY_PATTERN.search(prompt)
+    return match.group(1) if match else None
+
+def answer_prompt_locally(prompt):
+    """
+    Answers a prompt the way the LLM is asked to, from the prompt alone: the
+    fast-path parse of the query over the database values the prompt lists.
+    Used as the responder of the local backend.
+    """
+    query = prompt_query(prompt)
+    if query is None:
+        return "{}"
+    known_values = {
+        _PROMPT_VALUE_KEYS[name]: ast.literal_eval(values)
+        for name, values in _PROMPT_VALUES_PATTERN.findall(prompt)
+    }
+    filters, _ = FastPathParser(known_values).parse(query)
+    return json.dumps(filters)
+
+def create_backend(name=NLU_BACKEND):
+    """Returns the LLM backend configured by name ("groq" or "local")."""
+    if name == "local":
+        return LocalBackend(
+            answer_prompt_locally,
+            latency=float(os.environ.get("NLU_LOCAL_LATENCY", 0)),
+            jitter=float(os.environ.get("NLU_LOCAL_JITTER", 0)),
         )
-        
-        response_text = chat_completion.choices[0].message.content
-        filters = json.loads(response_text)
-
-        # Standardization Step
-        key_mappings = {
-            "bhk": "property_type",
-            "type": "property_type",
-            "property type": "property_type"
-        }
-        standardized_filters = {}
-        for key, value in filters.items():
-            new_key = key_mappings.get(key.lower(), key)
-            standardized_filters[new_key] = value
+    return GroqBackend(MODEL_NAME)
+
+backend = create_backend()
+circuit_breaker = CircuitBreaker(slow_call_seconds=NLU_SLOW_CALL_SECONDS)
+if not backend.available:
+    logger.warning("GROQ_API_KEY not found in .env file; using the local parser only.")
 
-        # Print the final JSON to the terminal for debugging
-        print("="*50)
-        print(f"Query: '{query}'")
-        print(f"Extracted JSON Filters: {json.dumps(standardized_filters, indent=2)}")
-        print("="*50)
+# Words after which an unexplained word is read as a place name
+_LOCATION_PREPOSITIONS = {"in", "at"}
 
+def _unknown_location(query, unexplained):
+    """The unexplained words right after "in"/"at" in the query (e.g. "bangalore"), or None."""
+    tokens = _tokenize(normalize_query(query))
+    for pos, token in enumerate(tokens[:-1]):
+        if token in _LOCATION_PREPOSITIONS and tokens[pos + 1] in unexplained:
+            end = pos + 1
+            while end < len(tokens) and tokens[end] in unexplained:
+                end += 1
+            return " ".join(tokens[pos + 1:end])
+    return None
+
+def matched_filters(query, known_values):
+    """
+    The local parse of a query, keeping only what it matched when it is
+    unsure: the words it could not read are not searched for, and one naming
+    a place becomes invalid_location. Empty when nothing was matched.
+    """
+    local_filters, confidence = parse_query_locally(query, known_values)
+    if confidence < FAST_PATH_MIN_CONFIDENCE and "description" in local_filters:
+        unexplained = set(local_filters.pop("description").split())
+        location = _unknown_location(query, unexplained)
+        if location:
+            local_filters["invalid_location"] = location
+    return local_filters
+
+def _fallback_filters(query, known_values):
+    """
+    Filters to answer with when the LLM is slow, failing or switched off by
+    the circuit breaker: the matched part of the local parse beats no answer.
+    """
+    telemetry.record("nlu_source", "fallback")
+    local_filters = matched_filters(query, known_values)
+    if local_filters:
+        return local_filters
+    return {"error": "Failed to parse query. Please try again."}
+
+def answer_without_llm(query, known_values, use_cache=True):
+    """
+    Returns the filters for a query from the query cache or the confident
+    fast path, or None when the query needs the LLM. use_cache=False neither
+    reads nor fills the cache.
+    """
+    if use_cache:
+        cached_filters = query_cache.get(query, known_values)
+        telemetry.record("cache_hit", cached_filters is not None)
+        if cached_filters is not None:
+            telemetry.record("nlu_source", "cache")
+            return cached_filters
+
+    # Simple, unambiguous queries never need the network round-trip
+    local_filters, confidence = parse_query_locally(query, known_values)
+    if confidence >= FAST_PATH_MIN_CONFIDENCE:
+        telemetry.record("nlu_source", "fast_path")
+        if use_cache:
+            query_cache.put(query, known_values, local_filters)
+        return local_filters
+    return None
+
+def standardize_filters(filters, known_values):
+    """Maps the LLM's key variants to the filter schema and snaps entity names to known values."""
+    # Standardization Step
+    key_mappings = {
+        "bhk": "property_type",
+        "type": "property_type",
+        "property type": "property_type"
+    }
+    standardized_filters = {}
+    for key, value in filters.items():
+        new_key = key_mappings.get(key.lower(), key)
+        standardized_filters[new_key] = value
+
+    # Snap near-miss entity names from the LLM ("shivaji nagar") to known values
+    return _get_compiled(known_values, KnownEntities).snap_filters(standardized_filters)
+
+def extract_filters_with_groq(query, known_values):
+    """
+    Uses the Groq API and an LLM to extract filters, then standardizes the output.
+    Repeated or near-identical queries are answered from the query cache, and simple ones
+    by the local fast-path parser, without calling Groq.
+    Each LLM call has a deadline (NLU_TIMEOUT); when it fails, times out, the circuit
+    breaker has tripped on a degraded backend, or no backend is configured, the local
+    parse is returned instead.
+    """
+    local_answer = answer_without_llm(query, known_values)
+    if local_answer is not None:
+        return local_answer
+
+    if not backend.available:
+        # Without a key the local parse is the only answer there is
+        return _fallback_filters(query, known_values)
+
+    with telemetry.span("nlu.prompt_build"):
+        prompt = create_llm_prompt(query, known_values)
+    prompt_stats = {"chars": len(prompt), "estimated_tokens": estimate_tokens(prompt)}
+    prompt_size_history.append(prompt_stats)
+    telemetry.record("prompt_chars", prompt_stats["chars"])
+    telemetry.record("prompt_tokens", prompt_stats["estimated_tokens"])
+
+    if not circuit_breaker.allow():
+        return _fallback_filters(query, known_values)
+
+    telemetry.record("nlu_source", "llm")
+    telemetry.record("backend", backend.name)
+    start = time.perf_counter()
+    try:
+        with telemetry.span("nlu.llm_call"):
+            response_text = backend.complete(prompt, timeout=NLU_TIMEOUT_SECONDS)
+    except Exception as e:
+        circuit_breaker.record(time.perf_counter() - start, ok=False)
+        logger.warning(f"An error occurred with the {backend.name} backend call: {e}")
+        return _fallback_filters(query, known_values)
+    circuit_breaker.record(time.perf_counter() - start)
+    # Kept so the query log can replay this turn without the backend
+    telemetry.record("llm_response", response_text)
+
+    try:
+        with telemetry.span("nlu.json_parse"):
+            filters = json.loads(response_text)
+            standardized_filters = standardize_filters(filters, known_values)
+        telemetry.record("filters", standardized_filters)
+        query_cache.put(query, known_values, standardized_filters)
         return standardized_filters
 
     except Exception as e:
-        print(f"An error occurred with the Groq API call: {e}")
+        logger.warning(f"An error occurred while parsing the {backend.name} response: {e}")
         return {"error": "Failed to parse query. Please try again."}
-
@@ -0,0 +1,176 @@
+import asyncio
+import copy
+import json
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from groq import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+
+from core import nlu
+from core.cache import normalize_query
+from core.nlu import answer_without_llm, create_llm_prompt, query_cache, standardize_filters
+
+logger = logging.getLogger(__name__)
+
+# --- Batch Extraction ---
+# Offline jobs (re-parsing query logs, evaluating prompt changes) send thousands
+# of queries. They are deduplicated, answered locally where possible, and the
+# rest are sent concurrently under a concurrency cap and a rate limit, through
+# the same LLM backend and circuit breaker as the chat (see core.llm).
+BATCH_CONCURRENCY = int(os.environ.get("NLU_BATCH_CONCURRENCY", 8))
+BATCH_REQUESTS_PER_SECOND = float(os.environ.get("NLU_BATCH_RPS", 5))
+BATCH_MAX_RETRIES = int(os.environ.get("NLU_BATCH_MAX_RETRIES", 4))
+# Deadline of one batch call, in seconds; batch jobs can wait longer than a chat
+BATCH_TIMEOUT_SECONDS = float(os.environ.get("NLU_BATCH_TIMEOUT", 30))
+# First retry delay in seconds; doubled on every further attempt
+RETRY_BASE_DELAY = 0.5
+
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError, TimeoutError)
+PARSE_ERROR = {"error": "Failed to parse query. Please try again."}
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling the backend while the circuit breaker is open."""
+
+
+class TokenBucket:
+    """
+    An asyncio token bucket allowing `rate` acquisitions per second on average,
+    with bursts of up to `capacity`. A rate of 0 or less disables the limit.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def _retry_delay(error, attempt):
+    """Exponential backoff with jitter, honouring a Retry-After header when sent."""
+    delay = RETRY_BASE_DELAY * (2 ** attempt) * (1 + random.random())
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            delay = max(delay, float(response.headers.get("retry-after", 0)))
+        except ValueError:
+            pass
+    return delay
+
+
+def _complete(backend, prompt, timeout):
+    """One backend call, recorded by the shared circuit breaker."""
+    if not nlu.circuit_breaker.allow():
+        raise CircuitOpen(f"circuit breaker is {nlu.circuit_breaker.state}")
+    start = time.perf_counter()
+    try:
+        response_text = backend.complete(prompt, timeout=timeout)
+    except Exception:
+        nlu.circuit_breaker.record(time.perf_counter() - start, ok=False)
+        raise
+    nlu.circuit_breaker.record(time.perf_counter() - start)
+    return response_text
+
+
+async def _extract_one(backend, executor, query, known_values, semaphore, bucket, max_retries, timeout, use_cache):
+    prompt = create_llm_prompt(query, known_values)
+    loop = asyncio.get_running_loop()
+    for attempt in range(max_retries + 1):
+        async with semaphore:
+            await bucket.acquire()
+            try:
+                response_text = await loop.run_in_executor(executor, _complete, backend, prompt, timeout)
+                filters = json.loads(response_text)
+                standardized_filters = standardize_filters(filters, known_values)
+                if use_cache:
+                    query_cache.put(query, known_values, standardized_filters)
+                return standardized_filters
+            except RETRYABLE_ERRORS + (CircuitOpen,) as e:
+                error = e
+            except Exception as e:
+                logger.warning(f"An error occurred with the {backend.name} backend call: {e}")
+                return dict(PARSE_ERROR)
+        # Back off outside the semaphore so other queries keep the slots busy
+        if attempt < max_retries:
+            await asyncio.sleep(_retry_delay(error, attempt))
+    logger.warning(f"Giving up on query after {max_retries + 1} attempts: {error}")
+    return dict(PARSE_ERROR)
+
+
+async def extract_filters_batch_async(
+    queries,
+    known_values,
+    backend=None,
+    concurrency=BATCH_CONCURRENCY,
+    requests_per_second=BATCH_REQUESTS_PER_SECOND,
+    max_retries=BATCH_MAX_RETRIES,
+    timeout=BATCH_TIMEOUT_SECONDS,
+    use_cache=True,
+):
+    """
+    Extracts the filters for every query and returns them in the same order.
+
+    Queries are deduplicated on their normalized form and answered from the
+    query cache or the fast path when possible; the rest run concurrently with
+    at most `concurrency` requests in flight and `requests_per_second` started.
+    backend defaults to the chat's LLM backend (core.nlu.backend).
+    use_cache=False neither reads nor fills the query cache, e.g. to evaluate
+    a prompt change on answers the LLM actually gives.
+    """
+    groups = {}
+    for position, query in enumerate(queries):
+        groups.setdefault(normalize_query(query), (query, []))[1].append(position)
+
+    answers = {}
+    pending = []
+    for key, (query, _) in groups.items():
+        local_answer = answer_without_llm(query, known_values, use_cache)
+        if local_answer is not None:
+            answers[key] = local_answer
+        else:
+            pending.append(key)
+
+    if pending:
+        backend = backend or nlu.backend
+        if not backend.available:
+            for key in pending:
+                answers[key] = {"error": "Groq client not initialized. Check API key."}
+        else:
+            semaphore = asyncio.Semaphore(concurrency)
+            bucket = TokenBucket(requests_per_second)
+            # The backends are blocking; each request in flight gets a thread
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="nlu-batch") as executor:
+                results = await asyncio.gather(*(
+                    _extract_one(backend, executor, groups[key][0], known_values, semaphore, bucket, max_retries, timeout, use_cache)
+                    for key in pending
+                ))
+            answers.update(zip(pending, results))
+
+    ordered = [None] * len(queries)
+    for key, (_, positions) in groups.items():
+        for position in positions:
+            # Duplicates get their own copy so callers can modify results freely
+            ordered[position] = copy.deepcopy(answers[key])
+    return ordered
+
+
+def extract_filters_batch(queries, known_values, **kwargs):
+    """Synchronous wrapper around extract_filters_batch_async for scripts and jobs."""
+    return asyncio.run(extract_filters_batch_async(queries, known_values, **kwargs))
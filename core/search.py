@@ -1,13 +1,27 @@
+import numpy as np
 import pandas as pd
+from core.amenities import AMENITY_BITS, resolve_query_amenities
+from core.facets import TOP_LOCALITIES
 
-def find_properties(df, filters):
+def find_properties(df, filters, index=None):
     """
     Filters the DataFrame using a robust boolean indexing method to ensure all
     filters are strictly and correctly applied.
+
+    When a prebuilt PropertyIndex is passed, the string and budget filters are
+    answered from its posting lists and only the matching rows are materialized.
+    If the index has a semantic index, a "description" filter then orders the
+    matches by how well their listing text fits it, best first.
     """
     if df.empty or filters.get("invalid_location"):
         return pd.DataFrame()
 
+    if index is not None:
+        positions = match_positions(filters, index)
+        if filters.get("description") and index.semantic is not None:
+            positions = index.semantic.rank(filters["description"], positions)
+        return index.take(positions)
+
     # Start with a clean copy of the DataFrame to filter
     results = df.copy()
 
@@ -16,16 +30,16 @@ def find_properties(df, filters):
     # --- String Filters ---
     if filters.get("city"):
         results = results[results['city'].str.lower() == filters["city"].lower()]
-    
+
     if filters.get("locality"):
         results = results[results['locality'].str.lower() == filters["locality"].lower()]
 
     if filters.get("project_name"):
         results = results[results['project_name'].str.lower() == filters["project_name"].lower()]
-        
+
     if filters.get("property_type"):
         results = results[results['property_type'].str.lower() == filters["property_type"].lower()]
-    
+
     if filters.get("status"):
         results = results[results['possession_status'].str.lower() == filters["status"].lower()]
 
@@ -39,11 +53,147 @@ def find_properties(df, filters):
             max_price = filters["budget"]["max"]
             results = results[pd.to_numeric(results['price']) <= max_price]
 
+    return _filter_amenities(results, filters)
+
+def _filter_amenities(results, filters):
+    """Keeps only the rows that offer every requested amenity."""
     # --- Amenity Filters ---
+    if not filters.get("amenities"):
+        return results
+
+    unresolved = filters["amenities"]
+    if 'amenity_mask' in results.columns:
+        # Known amenities (and their synonyms) are matched with a single bitwise AND
+        required_mask, unresolved = resolve_query_amenities(filters["amenities"])
+        if required_mask:
+            masks = results['amenity_mask'].to_numpy()
+            results = results[(masks & required_mask) == required_mask]
+
+    # Terms outside the amenity vocabulary fall back to a text search
+    for amenity in unresolved:
+        # Ensure we only filter if the 'amenities' column exists and is not empty
+        if 'amenities' in results.columns:
+            results = results[results['amenities'].str.contains(amenity, case=False, na=False)]
+
+    return results
+
+# --- Ranked Retrieval ---
+# Weights of the relevance signals used by rank_properties
+RANK_WEIGHTS = {"semantic": 1.0, "budget": 0.5, "amenities": 0.3, "status": 0.2}
+
+def _popcount(values):
+    """Counts the set bits of each integer in an int64 array."""
+    counts = np.zeros(len(values), dtype=np.int64)
+    values = values.copy()
+    while values.any():
+        counts += values & 1
+        values >>= 1
+    return counts
+
+def _budget_scores(prices, budget):
+    """Scores how close each price is to the budget: 1.0 at the target, falling off linearly."""
+    low, high = budget.get("min"), budget.get("max")
+    if low is not None and high is not None:
+        target = (float(low) + float(high)) / 2
+    elif high is not None:
+        # Under a ceiling, the best use of the budget is close to the ceiling
+        target = float(high)
+    elif low is not None:
+        target = float(low)
+    else:
+        return np.zeros(len(prices))
+    if target <= 0:
+        return np.zeros(len(prices))
+    return np.clip(1 - np.abs(prices - target) / target, 0, 1)
+
+def compute_result_stats(index, positions):
+    """
+    Aggregates the statistics the summary needs over the matched row positions
+    in one vectorized pass. Used when the facet aggregates cannot answer.
+    """
+    stats = {"count": int(len(positions)), "min_price": None, "max_price": None, "top_localities": []}
+    if len(positions) == 0:
+        return stats
+
+    prices = index.prices[positions]
+    stats["min_price"] = float(np.nanmin(prices))
+    stats["max_price"] = float(np.nanmax(prices))
+
+    if "locality" in index.codes:
+        codes = index.codes["locality"][positions]
+        codes = codes[codes >= 0]
+        if len(codes):
+            unique_codes, first_seen, counts = np.unique(codes, return_index=True, return_counts=True)
+            # Most frequent first; ties go to the locality seen first, like value_counts()
+            order = np.lexsort((first_seen, -counts))[:TOP_LOCALITIES]
+            stats["top_localities"] = [index.uniques["locality"][code] for code in unique_codes[order]]
+    return stats
+
+def match_positions(filters, index, within=None):
+    """
+    Returns the sorted row positions of every property matching the filters.
+
+    within may hold the positions matched by an earlier, broader search (see
+    conversation.ConversationState); only those rows are then re-checked.
+    """
+    if index.size == 0 or filters.get("invalid_location"):
+        return np.empty(0, dtype=np.int64)
+    positions = index.lookup(filters) if within is None else index.refine(within, filters)
     if filters.get("amenities"):
-        for amenity in filters["amenities"]:
-            # Ensure we only filter if the 'amenities' column exists and is not empty
-            if 'amenities' in results.columns:
-                results = results[results['amenities'].str.contains(amenity, case=False, na=False)]
-            
-    return results 
+        positions = index.filter_amenities(positions, filters["amenities"])
+    return positions
+
+def rank_properties(filters, index, k=5, facets=None, positions=None):
+    """
+    Returns (top_k_df, stats): the k most relevant matching rows and the
+    aggregate statistics of all matches, without materializing the full result.
+
+    Matches are scored on budget proximity, amenity overlap and possession
+    status, plus similarity to a "description" filter when the index has a
+    semantic index, and only the top k are selected (np.partition) and copied out.
+    Pass positions when the matches are already known (from match_positions).
+    """
+    if index.size == 0 or filters.get("invalid_location"):
+        return pd.DataFrame(), compute_result_stats(index, np.empty(0, dtype=np.int64))
+
+    if positions is None:
+        positions = match_positions(filters, index)
+    stats = facets.stats_for(filters) if facets is not None else None
+    if stats is None:
+        stats = compute_result_stats(index, positions)
+    if len(positions) == 0:
+        return index.take(positions), stats
+
+    scores = np.zeros(len(positions))
+    if filters.get("description") and index.semantic is not None:
+        similarity = index.semantic.scores(filters["description"], positions)
+        scores += RANK_WEIGHTS["semantic"] * np.clip(similarity, 0, 1)
+
+    if filters.get("budget"):
+        scores += RANK_WEIGHTS["budget"] * _budget_scores(index.prices[positions], filters["budget"])
+
+    if index.amenity_masks is not None:
+        masks = index.amenity_masks[positions]
+        required_mask, _ = resolve_query_amenities(filters.get("amenities") or [])
+        if required_mask:
+            # Every match already has the requested amenities; reward the extra ones
+            scores += RANK_WEIGHTS["amenities"] * _popcount(masks & ~required_mask) / max(len(AMENITY_BITS), 1)
+        else:
+            scores += RANK_WEIGHTS["amenities"] * _popcount(masks) / max(len(AMENITY_BITS), 1)
+
+    # With no status filter, ready-to-move listings rank higher
+    if not filters.get("status") and "status" in index.codes:
+        statuses = index.uniques["status"][np.maximum(index.codes["status"][positions], 0)]
+        scores += RANK_WEIGHTS["status"] * (statuses == "ready_to_move")
+
+    if 0 < k < len(positions):
+        # Keep every row tied with the k-th best, so the cut below follows file order
+        kth_score = -np.partition(-scores, k - 1)[k - 1]
+        top = np.flatnonzero(scores >= kth_score)
+    else:
+        top = np.arange(len(positions))
+    # Best score first; equal scores keep file order
+    top = top[np.lexsort((positions[top], -scores[top]))]
+    if k > 0:
+        top = top[:k]
+    return index.take(positions[top]), stats
@@ -0,0 +1,160 @@
+import os
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# --- Semantic Search ---
+# Descriptive wishes ("quiet family-friendly place near schools") match no
+# structured filter, so they rank the matches by similarity to each project's
+# summary and amenities text instead. The text is embedded offline with signed
+# feature hashing over words and word pairs, weighted by TF-IDF, into a small
+# dense float32 matrix with one L2-normalized row per distinct text. Preprocessing
+# stores it in the dataset bundle next to a row -> vector id column, so the app
+# memory-maps it and a query is one matrix-vector product over the candidates.
+SEMANTIC_DIMENSIONS = int(os.environ.get("SEMANTIC_DIMENSIONS", 256))
+# Columns whose text describes a listing, concatenated per row
+SEMANTIC_TEXT_COLUMNS = ("summary", "amenities")
+# Bundle arrays written by build_semantic_index
+SEMANTIC_EXTRAS = ("semantic_vectors", "semantic_rows", "semantic_idf")
+# Distinct texts embedded per block, bounding the build's scratch memory
+_BUILD_BLOCK = 4096
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+_STOP_WORDS = {
+    "a", "an", "the", "and", "or", "of", "in", "on", "at", "to", "for", "with", "by", "from", "is", "are",
+    "be", "it", "its", "this", "that", "as", "all", "me", "my", "i", "we", "our", "you", "your", "some",
+    "place", "property", "properties", "project", "home", "homes", "flat", "flats", "apartment", "apartments",
+    "show", "find", "looking", "want", "need", "like", "something", "summary", "listed", "specified",
+}
+
+
+def text_features(text) -> list:
+    """The words and adjacent word pairs of the text, lowercased, without stop words or plural s."""
+    words = [
+        word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+        for word in _WORD_PATTERN.findall(str(text).lower())
+        if word not in _STOP_WORDS
+    ]
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+def _hash_features(features, dimensions):
+    """Returns (buckets, signs) of the features under the signed hashing trick."""
+    hashes = np.fromiter((zlib.crc32(feature.encode("utf-8")) for feature in features), dtype=np.uint32, count=len(features))
+    buckets = (hashes % dimensions).astype(np.int64)
+    # The top bit decides the sign, so colliding features tend to cancel out
+    signs = np.where(hashes >> 31, -1.0, 1.0)
+    return buckets, signs
+
+
+def _sublinear(counts):
+    """Dampens repeated terms: sign(x) * log(1 + |x|)."""
+    return np.sign(counts) * np.log1p(np.abs(counts))
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1.0)
+
+
+def listing_texts(df) -> pd.Series:
+    """The descriptive text of every row: its SEMANTIC_TEXT_COLUMNS joined."""
+    columns = [df[name].fillna("").astype(str) for name in SEMANTIC_TEXT_COLUMNS if name in df.columns]
+    if not columns:
+        return pd.Series("", index=df.index)
+    text = columns[0]
+    for column in columns[1:]:
+        text = text + ". " + column
+    return text
+
+
+def build_semantic_index(df, dimensions=SEMANTIC_DIMENSIONS) -> dict:
+    """
+    Embeds the distinct listing texts of the prepared master frame. Returns
+    the SEMANTIC_EXTRAS arrays to store in its bundle.
+    """
+    row_ids, texts = pd.factorize(listing_texts(df))
+    term_counts = np.zeros((len(texts), dimensions), dtype=np.float32)
+    for start in range(0, len(texts), _BUILD_BLOCK):
+        block = texts[start:start + _BUILD_BLOCK]
+        features = [text_features(text) for text in block]
+        lengths = np.fromiter((len(f) for f in features), dtype=np.int64, count=len(features))
+        buckets, signs = _hash_features([feature for f in features for feature in f], dimensions)
+        rows = np.repeat(np.arange(len(block), dtype=np.int64), lengths)
+        counts = np.bincount(rows * dimensions + buckets, weights=signs, minlength=len(block) * dimensions)
+        term_counts[start:start + len(block)] = counts.reshape(len(block), dimensions)
+
+    document_frequency = np.count_nonzero(term_counts, axis=0)
+    idf = (np.log((1 + len(texts)) / (1 + document_frequency)) + 1).astype(np.float32)
+    vectors = _normalize_rows(_sublinear(term_counts) * idf).astype(np.float32)
+    return {
+        "semantic_vectors": vectors,
+        "semantic_rows": row_ids.astype(np.int32),
+        "semantic_idf": idf,
+    }
+
+
+class SemanticIndex:
+    """
+    Scores listings against a free-text description by cosine similarity.
+
+    vectors holds one normalized embedding per distinct listing text and
+    row_vectors the vector id of every row (-1 for rows without text); both
+    are usually memory-mapped from the bundle.
+    """
+
+    def __init__(self, vectors, row_vectors, idf):
+        self.vectors = vectors
+        self.row_vectors = row_vectors
+        self.idf = idf
+        self.dimensions = vectors.shape[1]
+
+    @classmethod
+    def from_arrays(cls, arrays, rows):
+        """Builds the index from SEMANTIC_EXTRAS arrays; None if they are missing or for another row count."""
+        if arrays is None or any(arrays.get(name) is None for name in SEMANTIC_EXTRAS):
+            return None
+        if len(arrays["semantic_rows"]) != rows:
+            return None
+        return cls(arrays["semantic_vectors"], arrays["semantic_rows"], arrays["semantic_idf"])
+
+    def embed(self, text):
+        """Embeds a query like the listing texts; None when it has no content words."""
+        features = text_features(text)
+        if not features:
+            return None
+        buckets, signs = _hash_features(features, self.dimensions)
+        vector = _sublinear(np.bincount(buckets, weights=signs, minlength=self.dimensions)) * self.idf
+        norm = np.linalg.norm(vector)
+        return (vector / norm).astype(np.float32) if norm > 0 else None
+
+    def scores(self, text, positions):
+        """Cosine similarity of each row in positions to the text (0 for rows without text)."""
+        query = self.embed(text)
+        if query is None or len(positions) == 0:
+            return np.zeros(len(positions), dtype=np.float32)
+        vector_ids = self.row_vectors[positions]
+        if len(positions) >= len(self.vectors) // 8:
+            # Broad searches: a sequential pass over the whole matrix beats
+            # gathering scattered rows of it, even for a fraction of them
+            vector_scores = self.vectors @ query
+            return np.where(vector_ids >= 0, vector_scores[vector_ids], 0).astype(np.float32)
+        # Many rows share a project's text: score each distinct vector once
+        unique_ids, inverse = np.unique(vector_ids, return_inverse=True)
+        valid = unique_ids >= 0
+        unique_scores = np.zeros(len(unique_ids), dtype=np.float32)
+        unique_scores[valid] = self.vectors[unique_ids[valid]] @ query
+        return unique_scores[inverse]
+
+    def rank(self, text, positions, k=None):
+        """Returns positions ordered by similarity to the text, best first (ties keep row order)."""
+        scores = self.scores(text, positions)
+        if k is not None and 0 < k < len(positions):
+            # Keep every row tied with the k-th best, so the cut follows row order
+            top = np.flatnonzero(scores >= -np.partition(-scores, k - 1)[k - 1])
+        else:
+            top = np.arange(len(positions))
+        ranked = positions[top[np.lexsort((positions[top], -scores[top]))]]
+        return ranked[:k] if k is not None and k > 0 else ranked
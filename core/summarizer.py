@@ -23,32 +23,49 @@ def format_price_value(price: float) -> str:
     else:
         return f"₹{price / 100000:.2f} L"
 
+def compute_summary_stats(results_df: pd.DataFrame) -> dict:
+    """Computes the aggregate statistics used by the summary from a results DataFrame."""
+    stats = {"count": len(results_df), "min_price": None, "max_price": None, "top_localities": []}
+    if stats["count"] == 0:
+        return stats
+    stats["min_price"] = results_df['price'].min()
+    stats["max_price"] = results_df['price'].max()
+    if 'locality' in results_df.columns and not results_df['locality'].empty:
+        # Categorical columns (from a bundle) also count the localities not in the results
+        counts = results_df['locality'].value_counts()
+        stats["top_localities"] = counts[counts > 0].nlargest(2).index.tolist()
+    return stats
+
 def generate_summary_from_results(results_df: pd.DataFrame, filters: dict) -> str:
     """
     Analyzes the search results DataFrame and generates a dynamic, insightful summary.
     """
-    total_found = len(results_df)
+    return generate_summary_from_stats(compute_summary_stats(results_df), filters)
+
+def generate_summary_from_stats(stats: dict, filters: dict) -> str:
+    """
+    Generates the summary from precomputed aggregates (count, min/max price and
+    top localities), e.g. the stats returned by search.rank_properties.
+    """
+    total_found = stats["count"]
     if total_found == 0:
         return "I couldn't find any properties matching your exact criteria."
 
     # --- 1. Get Price Range from Actual Results (THE NEW LOGIC) ---
     price_range_summary = ""
     if total_found > 1:
-        min_price = results_df['price'].min()
-        max_price = results_df['price'].max()
         # Format the min and max prices using our new helper function
-        min_price_formatted = format_price_value(min_price)
-        max_price_formatted = format_price_value(max_price)
+        min_price_formatted = format_price_value(stats["min_price"])
+        max_price_formatted = format_price_value(stats["max_price"])
         price_range_summary = f" They range in price from **{min_price_formatted}** to **{max_price_formatted}**."
 
     # --- 2. Analyze Top Locations ---
     location_summary = ""
-    if 'locality' in results_df.columns and not results_df['locality'].empty:
-        top_locations = results_df['locality'].value_counts().nlargest(2).index.tolist()
-        if len(top_locations) > 1:
-            location_summary = f" Most are located in **{top_locations[0].title()}** and **{top_locations[1].title()}**."
-        elif len(top_locations) == 1:
-            location_summary = f" Most are located in **{top_locations[0].title()}**."
+    top_locations = stats["top_localities"]
+    if len(top_locations) > 1:
+        location_summary = f" Most are located in **{top_locations[0].title()}** and **{top_locations[1].title()}**."
+    elif len(top_locations) == 1:
+        location_summary = f" Most are located in **{top_locations[0].title()}**."
 
     # --- 3. Construct the Final Summary Sentence ---
     price_part = format_price_for_summary(filters)
@@ -0,0 +1,310 @@
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- Tracing and Metrics ---
+# Every chat turn is a trace: the time spent in each stage (NLU prompt build,
+# LLM call, JSON parse, search, summary, render) plus a few attributes such
+# as prompt tokens, the NLU source (cache, fast path, LLM) and the result count.
+# Finished traces go to the configured sinks. With no sink configured, turns
+# get a shared no-op trace, so the instrumentation costs a function call.
+#
+#   TELEMETRY_SINKS=log              one JSON line per turn on the "telemetry" logger
+#   TELEMETRY_SINKS=prometheus       text metrics on http://$TELEMETRY_HOST:$TELEMETRY_PORT/metrics
+#                                    (loopback only unless TELEMETRY_HOST says otherwise)
+#   TELEMETRY_SINKS=querylog         one JSON line per turn appended to $QUERY_LOG_PATH, rotated
+#                                    by size; benchmarks/replay_queries.py replays these logs.
+#                                    "{pid}" in the path is replaced by the process id, since
+#                                    processes rotating one file would lose or interleave lines
+TELEMETRY_SINKS = [name.strip() for name in os.environ.get("TELEMETRY_SINKS", "").split(",") if name.strip()]
+TELEMETRY_PORT = int(os.environ.get("TELEMETRY_PORT", 9464))
+# Interface the metrics endpoint listens on; 0.0.0.0 exposes it to the network
+TELEMETRY_HOST = os.environ.get("TELEMETRY_HOST", "127.0.0.1")
+QUERY_LOG_PATH = os.environ.get("QUERY_LOG_PATH", os.path.join("logs", "queries-{pid}.jsonl"))
+QUERY_LOG_MAX_BYTES = int(float(os.environ.get("QUERY_LOG_MAX_MB", 64)) * 2**20)
+# Rotated files kept next to the live one (queries-<pid>.jsonl.1 is the newest)
+QUERY_LOG_BACKUPS = int(os.environ.get("QUERY_LOG_BACKUPS", 5))
+
+# Upper bounds (seconds) of the stage latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# String attributes exported as metric labels; others only appear in log lines
+LABEL_ATTRIBUTES = ("nlu_source", "backend")
+
+logger = logging.getLogger("telemetry")
+
+
+class Trace:
+    """The stage timings and attributes of one chat turn."""
+
+    def __init__(self, name):
+        self.name = name
+        self.timestamp = time.time()
+        self.started = time.perf_counter()
+        self.duration = None
+        self.stages = {}
+        self.attributes = {}
+
+    @contextmanager
+    def span(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            # Repeated stages (e.g. two searches) add up
+            self.stages[stage] = self.stages.get(stage, 0.0) + time.perf_counter() - start
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        return {
+            "trace": self.name,
+            "timestamp": round(self.timestamp, 3),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "stages_ms": {stage: round(seconds * 1000, 3) for stage, seconds in self.stages.items()},
+            "attributes": self.attributes,
+        }
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class NullTrace:
+    """Stands in for Trace when telemetry is off; every method is a no-op."""
+
+    _span = _NullSpan()
+
+    def span(self, stage):
+        return self._span
+
+    def set(self, key, value):
+        pass
+
+
+NULL_TRACE = NullTrace()
+_current_trace = contextvars.ContextVar("current_trace", default=NULL_TRACE)
+
+
+def current_trace():
+    """Returns the trace of the running turn (NULL_TRACE outside of one)."""
+    return _current_trace.get()
+
+
+def span(stage):
+    """Times a stage of the running turn: `with telemetry.span("search"): ...`."""
+    return _current_trace.get().span(stage)
+
+
+def record(key, value):
+    """Sets an attribute on the running turn's trace."""
+    _current_trace.get().set(key, value)
+
+
+# --- Sinks ---
+class LogSink:
+    """Writes each finished trace as one structured JSON line."""
+
+    def __init__(self, log=logger):
+        self.log = log
+
+    def emit(self, trace):
+        self.log.info(json.dumps(trace.to_dict(), default=str, sort_keys=True))
+
+
+class QueryLogSink:
+    """
+    Appends each finished trace as one JSON line to a log file, rotated once it
+    grows past max_bytes with the last `backups` files kept. Safe to share
+    between the threads of one process; each process should get its own path.
+    """
+
+    def __init__(self, path=QUERY_LOG_PATH, max_bytes=QUERY_LOG_MAX_BYTES, backups=QUERY_LOG_BACKUPS):
+        # Resolved here rather than at import, so forked workers get their own file
+        path = path.replace("{pid}", str(os.getpid()))
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        self.handler.setFormatter(logging.Formatter("%(message)s"))
+
+    def emit(self, trace):
+        record = logging.LogRecord("telemetry.querylog", logging.INFO, __file__, 0, json.dumps(trace.to_dict(), default=str, sort_keys=True), None, None)
+        self.handler.handle(record)
+
+    def close(self):
+        self.handler.close()
+
+
+def read_query_log(path) -> list:
+    """
+    Returns the traces of a query log and its rotated files, oldest first.
+    Lines that do not parse (e.g. cut short by a crash) are skipped.
+    """
+    directory, name = os.path.split(path)
+    rotated = {}
+    for entry in os.listdir(directory or "."):
+        suffix = entry[len(name) + 1:]
+        if entry.startswith(name + ".") and suffix.isdigit():
+            rotated[int(suffix)] = os.path.join(directory, entry)
+    paths = [rotated[i] for i in sorted(rotated, reverse=True)]
+    if os.path.exists(path):
+        paths.append(path)
+    traces = []
+    for log_path in paths:
+        with open(log_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    traces.append(json.loads(line))
+                except ValueError:
+                    continue
+    return traces
+
+
+class PrometheusSink:
+    """
+    Aggregates finished traces into counters and latency histograms and
+    renders them in the Prometheus text format. When port is given, they are
+    served at /metrics on host from a background thread.
+    """
+
+    def __init__(self, port=None, host=TELEMETRY_HOST):
+        self._lock = threading.Lock()
+        self.turns = defaultdict(int)
+        self.bucket_counts = defaultdict(lambda: [0] * len(LATENCY_BUCKETS))
+        self.latency_sums = defaultdict(float)
+        self.latency_counts = defaultdict(int)
+        self.attribute_totals = defaultdict(float)
+        self.label_counts = defaultdict(int)
+        self.server = None
+        if port is not None:
+            self._serve(host, port)
+
+    def emit(self, trace):
+        with self._lock:
+            self.turns[trace.name] += 1
+            for stage, seconds in list(trace.stages.items()) + [("total", trace.duration)]:
+                self.latency_sums[stage] += seconds
+                self.latency_counts[stage] += 1
+                buckets = self.bucket_counts[stage]
+                for i, bound in enumerate(LATENCY_BUCKETS):
+                    if seconds <= bound:
+                        buckets[i] += 1
+            for key, value in trace.attributes.items():
+                if key in LABEL_ATTRIBUTES:
+                    self.label_counts[(key, str(value))] += 1
+                elif isinstance(value, (bool, int, float)):
+                    self.attribute_totals[key] += float(value)
+
+    def render(self) -> str:
+        lines = ["# TYPE chat_turns_total counter"]
+        with self._lock:
+            for name, count in sorted(self.turns.items()):
+                lines.append(f'chat_turns_total{{trace="{name}"}} {count}')
+            lines.append("# TYPE chat_stage_seconds histogram")
+            for stage in sorted(self.latency_counts):
+                for bound, count in zip(LATENCY_BUCKETS, self.bucket_counts[stage]):
+                    lines.append(f'chat_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'chat_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {self.latency_counts[stage]}')
+                lines.append(f'chat_stage_seconds_sum{{stage="{stage}"}} {self.latency_sums[stage]:.6f}')
+                lines.append(f'chat_stage_seconds_count{{stage="{stage}"}} {self.latency_counts[stage]}')
+            for key, total in sorted(self.attribute_totals.items()):
+                lines.append(f"# TYPE chat_{key}_total counter")
+                lines.append(f"chat_{key}_total {total:g}")
+            typed = set()
+            for (key, value), count in sorted(self.label_counts.items()):
+                if key not in typed:
+                    typed.add(key)
+                    lines.append(f"# TYPE chat_{key}_total counter")
+                lines.append(f'chat_{key}_total{{value="{value}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def _serve(self, host, port):
+        sink = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = sink.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            self.server = ThreadingHTTPServer((host, port), MetricsHandler)
+        except OSError as e:
+            logger.warning(f"Metrics endpoint not started on {host}:{port}: {e}")
+            return
+        threading.Thread(target=self.server.serve_forever, name="metrics-endpoint", daemon=True).start()
+
+
+class Tracer:
+    """Starts a trace per turn and hands finished traces to the sinks."""
+
+    def __init__(self, sinks=()):
+        self.sinks = list(sinks)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.sinks)
+
+    @contextmanager
+    def turn(self, name="chat_turn"):
+        """Runs the block as one traced turn; spans and records inside it attach to the trace."""
+        if not self.sinks:
+            yield NULL_TRACE
+            return
+        trace = Trace(name)
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            _current_trace.reset(token)
+            trace.duration = time.perf_counter() - trace.started
+            for sink in self.sinks:
+                try:
+                    sink.emit(trace)
+                except Exception as e:
+                    logger.warning(f"Telemetry sink {type(sink).__name__} failed: {e}")
+
+
+def create_sinks(names=TELEMETRY_SINKS, port=TELEMETRY_PORT, host=TELEMETRY_HOST):
+    """Builds the sinks named in TELEMETRY_SINKS ("log", "prometheus", "querylog")."""
+    sinks = []
+    for name in names:
+        if name == "log":
+            if not logging.getLogger().handlers and not logger.handlers:
+                logging.basicConfig(level=logging.INFO)
+            logger.setLevel(logging.INFO)
+            sinks.append(LogSink())
+        elif name == "prometheus":
+            sinks.append(PrometheusSink(port, host))
+        elif name == "querylog":
+            try:
+                sinks.append(QueryLogSink())
+            except OSError as e:
+                logger.warning(f"Query log not opened at {QUERY_LOG_PATH.replace('{pid}', str(os.getpid()))}: {e}")
+        else:
+            logger.warning(f"Unknown telemetry sink: {name}")
+    return sinks
+
+
+tracer = Tracer(create_sinks())
@@ -3,6 +3,18 @@ import numpy as np
 import re
 import warnings
 import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from core.amenities import find_amenities, amenity_masks, amenity_names
+from core.bundle import write_bundle, bundle_path_for, bundle_built_from, read_bundle_extras
+from core.data_loader import prepare_master_frame
+from core.semantic import build_semantic_index, SEMANTIC_EXTRAS
 
 # Suppress warnings for cleaner output
 warnings.filterwarnings('ignore')
@@ -10,6 +22,17 @@ warnings.filterwarnings('ignore')
 # Define data directory
 DATA_DIR = "data"
 
+# Raw input files, keyed by the name used throughout the pipeline
+RAW_FILES = {
+    'project': 'project.csv',
+    'address': 'ProjectAddress.csv',
+    'config': 'ProjectConfiguration.csv',
+    'variant': 'ProjectConfigurationVariant.csv',
+}
+MASTER_FILE = 'master_properties.csv'
+# Remembers the raw-file hashes and per-project fingerprints of the last run
+MANIFEST_FILE = 'preprocessing_manifest.json'
+
 def format_price(price):
     """Formats a numeric price into a string like '₹1.2 Cr' or '₹75 L'."""
     if pd.isna(price):
@@ -40,24 +63,7 @@ def extract_amenities(summary):
     if pd.isna(summary):
         return "No amenities listed"
 
-    summary = str(summary).lower()
-    amenities_list = {
-        'Swimming Pool': ['pool', 'swimming'],
-        'Gymnasium': ['gym', 'gymnasium', 'fitness center'],
-        'Clubhouse': ['clubhouse', 'club house'],
-        'Car Parking': ['parking', 'car park'],
-        'Lift': ['lift', 'elevator'],
-        'Kids Play Area': ['play area', 'kids area'],
-        'Security': ['security', 'cctv'],
-        'Good Connectivity': ['connectivity'],
-        'Nearby Schools': ['schools', 'school'],
-        'Nearby Hospitals': ['hospitals', 'hospital'],
-        'Shopping Access': ['shopping', 'malls'],
-        'Modern Living': ['modern living', 'contemporary features'],
-        'Good Infrastructure': ['infrastructure']
-    }
-
-    found_amenities = [amenity for amenity, keywords in amenities_list.items() if any(keyword in summary for keyword in keywords)]
+    found_amenities = find_amenities(summary)
 
     if not found_amenities:
         return "Key amenities not specified"
@@ -77,68 +83,427 @@ def clean_bathrooms(row):
         return row['bathrooms']
 
 
+# --- Vectorized equivalents ---
+# The row-wise functions above are kept as the reference behaviour; the
+# pipeline uses these column-at-a-time versions, which give identical output.
+# Slugs, summaries, BHK labels and prices repeat across the variants of a
+# project, so each one works on the distinct values and broadcasts back.
+LOCATION_CITIES = ['pune', 'mumbai']
+
+def _map_unique(series, func):
+    """Applies a vectorized func to the distinct values of series and broadcasts the result back."""
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    result = func(pd.Series(uniques, dtype=object))
+    if isinstance(result, pd.DataFrame):
+        return result.iloc[codes].set_axis(series.index)
+    return pd.Series(np.asarray(result, dtype=object)[codes], index=series.index)
+
+def format_price_vectorized(prices):
+    """Vectorized format_price over a whole price column."""
+    def format_values(unique_prices):
+        values = pd.to_numeric(unique_prices, errors='coerce').to_numpy(dtype=float)
+        is_crore = values >= 10000000
+        scaled = np.where(is_crore, values / 10000000, values / 100000)
+        formatted = np.char.add(np.char.add('₹', np.char.mod('%.2f', scaled)), np.where(is_crore, ' Cr', ' L'))
+        return np.where(np.isnan(values), 'Price on request', formatted)
+    return _map_unique(prices, format_values)
+
+def extract_location_vectorized(slugs):
+    """Vectorized extract_location_from_slug; returns a DataFrame with 'city' and 'locality'."""
+    def split_slugs(unique_slugs):
+        parts = unique_slugs.where(unique_slugs.notna(), 'nan').astype(str).str.lower().str.split('-')
+        exploded = pd.Series(parts.to_numpy(), dtype=object).explode()
+        text_parts = exploded[~exploded.str.isdigit().astype(bool)]
+        # Rank 0 is the last non-numeric part of each slug (the city), rank 1 the locality
+        rank = text_parts.groupby(level=0).cumcount(ascending=False)
+        row_positions = range(len(unique_slugs))
+        city = text_parts[rank == 0].reindex(row_positions)
+        locality = text_parts[rank == 1].reindex(row_positions)
+        valid = (locality.notna() & city.isin(LOCATION_CITIES)).to_numpy()
+        return pd.DataFrame({
+            'city': np.where(valid, city.str.title(), 'Unknown'),
+            'locality': np.where(valid, locality.str.title(), 'Not specified'),
+        })
+    return _map_unique(slugs, split_slugs)
+
+def extract_amenities_vectorized(summaries):
+    """
+    Vectorized extract_amenities. Returns (amenities_text, amenity_mask) columns;
+    the text is derived from the mask once per distinct mask value.
+    """
+    masks = _map_unique(summaries, amenity_masks).astype('int64')
+    labels = {mask: ', '.join(amenity_names(mask)[:3]) or "Key amenities not specified" for mask in masks.unique()}
+    amenities = masks.map(labels).astype(object)
+    amenities[summaries.isna().to_numpy()] = "No amenities listed"
+    return amenities, masks
+
+def clean_bathrooms_vectorized(df):
+    """Vectorized clean_bathrooms over the 'bhk' and 'bathrooms' columns."""
+    bhk_num = _map_unique(df['bhk'], lambda bhk: bhk.astype(str).str.extract(r'(\d+)', expand=False)).astype(float)
+    bathrooms = pd.to_numeric(df['bathrooms'], errors='coerce')
+    return pd.Series(np.where((bathrooms > 5) & bhk_num.notna(), bhk_num, bathrooms), index=df.index)
+
+
 # --- 1. LOAD THE DATA ---
-print("Step 1: Loading raw CSV files...")
-try:
-    project_df = pd.read_csv(os.path.join(DATA_DIR, 'project.csv'))
-    address_df = pd.read_csv(os.path.join(DATA_DIR, 'ProjectAddress.csv'))
-    config_df = pd.read_csv(os.path.join(DATA_DIR, 'ProjectConfiguration.csv'))
-    variant_df = pd.read_csv(os.path.join(DATA_DIR, 'ProjectConfigurationVariant.csv'), sep=',', engine='python', quotechar='"')
-    print("✅ All files loaded successfully.")
-except FileNotFoundError as e:
-    print(f"❌ Error: {e}\nPlease make sure all CSV files are inside the 'data' folder.")
-    exit()
+def load_raw_tables(data_dir=DATA_DIR):
+    """Loads the four raw CSV files into a dict of DataFrames."""
+    return {
+        'project': pd.read_csv(os.path.join(data_dir, RAW_FILES['project'])),
+        'address': pd.read_csv(os.path.join(data_dir, RAW_FILES['address'])),
+        'config': pd.read_csv(os.path.join(data_dir, RAW_FILES['config'])),
+        'variant': pd.read_csv(os.path.join(data_dir, RAW_FILES['variant']), sep=',', engine='python', quotechar='"'),
+    }
 
 
 # --- 2. MERGE THE FILES ---
-print("\nStep 2: Merging the four data files...")
-merged_df = pd.merge(variant_df, config_df, left_on='configurationId', right_on='id', how='left', suffixes=('_variant', '_config'))
-merged_df = pd.merge(merged_df, project_df, left_on='projectId', right_on='id', how='left', suffixes=('', '_project'))
-merged_df = pd.merge(merged_df, address_df, on='projectId', how='left', suffixes=('', '_address'))
+def merge_tables(tables):
+    """Joins variants to their configuration, project and address rows."""
+    merged_df = pd.merge(tables['variant'], tables['config'], left_on='configurationId', right_on='id', how='left', suffixes=('_variant', '_config'))
+    merged_df = pd.merge(merged_df, tables['project'], left_on='projectId', right_on='id', how='left', suffixes=('', '_project'))
+    merged_df = pd.merge(merged_df, tables['address'], on='projectId', how='left', suffixes=('', '_address'))
+    return merged_df
 
 
 # --- 3. SELECT AND RENAME IMPORTANT COLUMNS ---
-print("\nStep 3: Selecting and renaming important columns...")
 columns_to_keep = {
+    'projectId': 'project_id',
     'projectName': 'project_name', 'status': 'possession_status', 'slug': 'slug',
     'fullAddress': 'address', 'pincode': 'pincode', 'type': 'bhk', 'price': 'price',
     'carpetArea': 'area_sqft', 'bathrooms': 'bathrooms', 'furnishedType': 'furnishing',
     'projectSummary': 'summary', 'possessionDate': 'possession_date', 'propertyImages': 'images_url'
 }
-processed_df = merged_df[list(columns_to_keep.keys())].copy()
-processed_df.rename(columns=columns_to_keep, inplace=True)
 
+final_columns = [
+    'title', 'project_name', 'city', 'locality', 'bhk', 'price_formatted',
+    'possession_status', 'amenities', 'cta_url', 'area_sqft', 'bathrooms',
+    'furnishing', 'address', 'images_url', 'summary', 'price', 'amenity_mask',
+    'project_id'
+]
+
+def transform(merged_df):
+    """Turns merged raw rows into master rows (steps 3 to 5 of the pipeline)."""
+    processed_df = merged_df[list(columns_to_keep.keys())].copy()
+    processed_df.rename(columns=columns_to_keep, inplace=True)
 
-# --- 4. CLEAN AND PREPROCESS DATA ---
-print("\nStep 4: Cleaning and preprocessing data...")
-processed_df['price'] = pd.to_numeric(processed_df['price'], errors='coerce')
-processed_df['area_sqft'] = pd.to_numeric(processed_df['area_sqft'], errors='coerce')
-processed_df['bathrooms'] = pd.to_numeric(processed_df['bathrooms'], errors='coerce')
-processed_df.dropna(subset=['project_name', 'price', 'bhk'], inplace=True)
-processed_df['furnishing'].fillna('Not Specified', inplace=True)
-processed_df['bathrooms'] = processed_df.apply(clean_bathrooms, axis=1)
-processed_df['bathrooms'].fillna(0, inplace=True)
-processed_df['address'] = processed_df['address'].str.lower()
+    # --- 4. CLEAN AND PREPROCESS DATA ---
+    processed_df['price'] = pd.to_numeric(processed_df['price'], errors='coerce')
+    processed_df['area_sqft'] = pd.to_numeric(processed_df['area_sqft'], errors='coerce')
+    processed_df['bathrooms'] = pd.to_numeric(processed_df['bathrooms'], errors='coerce')
+    processed_df.dropna(subset=['project_name', 'price', 'bhk'], inplace=True)
+    processed_df['furnishing'] = processed_df['furnishing'].fillna('Not Specified')
+    processed_df['bathrooms'] = clean_bathrooms_vectorized(processed_df)
+    processed_df['bathrooms'] = processed_df['bathrooms'].fillna(0)
+    processed_df['address'] = processed_df['address'].str.lower()
 
+    # --- 5. FEATURE ENGINEERING ---
+    processed_df['price_formatted'] = format_price_vectorized(processed_df['price'])
+    processed_df['cta_url'] = '/project/' + processed_df['slug'].astype(str)
+    processed_df[['city', 'locality']] = extract_location_vectorized(processed_df['slug'])
+    # The bitmask covers the full amenity vocabulary so search can match with one bitwise AND
+    processed_df['amenities'], processed_df['amenity_mask'] = extract_amenities_vectorized(processed_df['summary'])
+    processed_df['title'] = processed_df['bhk'] + ' Apartment in ' + processed_df['project_name']
 
-# --- 5. FEATURE ENGINEERING ---
-print("\nStep 5: Engineering new features for the chatbot...")
-processed_df['price_formatted'] = processed_df['price'].apply(format_price)
-processed_df['cta_url'] = '/project/' + processed_df['slug'].astype(str)
-processed_df[['city', 'locality']] = processed_df['slug'].apply(extract_location_from_slug)
-processed_df['amenities'] = processed_df['summary'].apply(extract_amenities)
-processed_df['title'] = processed_df['bhk'] + ' Apartment in ' + processed_df['project_name']
+    return processed_df[final_columns].copy()
 
 
-# --- 6. CREATE THE FINAL MASTER FILE ---
-print("\nStep 6: Creating the final master file for the application...")
-final_columns = [
-    'title', 'project_name', 'city', 'locality', 'bhk', 'price_formatted',
-    'possession_status', 'amenities', 'cta_url', 'area_sqft', 'bathrooms',
-    'furnishing', 'address', 'images_url', 'summary', 'price'
-]
-master_df = processed_df[final_columns].copy()
-output_path = os.path.join(DATA_DIR, 'master_properties.csv')
-master_df.to_csv(output_path, index=False)
+# --- 6. CHANGE DETECTION ---
+def file_hash(path):
+    """SHA-1 of a raw file, used to skip runs where nothing changed."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def project_fingerprints(tables):
+    """
+    Fingerprints every project from all of its rows across the four raw tables.
+    Row hashes are summed per project, so the fingerprint does not depend on row order.
+    """
+    config_to_project = tables['config'].set_index('id')['projectId']
+    keyed_tables = [
+        (tables['project'], tables['project']['id']),
+        (tables['address'], tables['address']['projectId']),
+        (tables['config'], tables['config']['projectId']),
+        (tables['variant'], tables['variant']['configurationId'].map(config_to_project)),
+    ]
+    parts = []
+    for table, project_ids in keyed_tables:
+        row_hashes = pd.util.hash_pandas_object(table, index=False).astype('uint64')
+        grouped = row_hashes.groupby(project_ids.values).agg(['sum', 'count'])
+        parts.append(grouped['sum'].astype(str) + ':' + grouped['count'].astype(str))
+    combined = pd.concat(parts, axis=1).fillna('-')
+    return {str(project_id): '|'.join(row) for project_id, row in zip(combined.index, combined.values.tolist())}
+
+def feed_order(master_df, tables):
+    """
+    Puts master rows in feed order: projects by their first variant in the raw
+    variant file, each project's rows in variant order. Full and incremental
+    builds both end in this order, so an upsert writes the same file a full
+    build would. Row ids (positions in the master file) still shift when
+    projects are added or removed before others; see core.data_service.
+    """
+    config_to_project = tables['config'].set_index('id')['projectId']
+    variant_projects = tables['variant']['configurationId'].map(config_to_project).dropna().astype(str)
+    project_rank = {project_id: rank for rank, project_id in enumerate(pd.unique(variant_projects))}
+    ranks = master_df['project_id'].astype(str).map(project_rank).to_numpy(dtype=float)
+    return master_df.iloc[np.argsort(ranks, kind='stable')].reset_index(drop=True)
+
+def load_manifest(data_dir=DATA_DIR):
+    try:
+        with open(os.path.join(data_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def save_manifest(manifest, data_dir=DATA_DIR):
+    path = os.path.join(data_dir, MANIFEST_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+def subset_tables(tables, project_ids):
+    """Keeps only the raw rows that belong to the given projects."""
+    project_ids = set(project_ids)
+    config = tables['config'][tables['config']['projectId'].isin(project_ids)]
+    return {
+        'project': tables['project'][tables['project']['id'].isin(project_ids)],
+        'address': tables['address'][tables['address']['projectId'].isin(project_ids)],
+        'config': config,
+        'variant': tables['variant'][tables['variant']['configurationId'].isin(set(config['id']))],
+    }
+
+
+# --- 7. WRITE THE OUTPUTS ---
+def write_outputs(master_df, data_dir=DATA_DIR):
+    """Writes the master CSV and the memory-mappable binary bundle built from it."""
+    output_path = os.path.join(data_dir, MASTER_FILE)
+    master_df.to_csv(output_path, index=False)
+    return output_path, write_master_bundle(output_path)
+
+
+def write_master_bundle(output_path):
+    """Publishes the binary bundle of the master CSV at output_path. Returns its path."""
+    # The app memory-maps this instead of parsing the CSV on every cold start.
+    # It is built from the CSV itself so both load paths give the same frame.
+    # The semantic index over the listing texts is published with it, row-aligned.
+    bundle_path = bundle_path_for(output_path)
+    master_frame = prepare_master_frame(pd.read_csv(output_path))
+    write_bundle(master_frame, bundle_path, source_csv=output_path, extras=build_semantic_index(master_frame))
+    return bundle_path
+
+
+def outputs_complete(data_dir=DATA_DIR):
+    """Whether the master CSV and a bundle built from it, semantic index included, are all there."""
+    output_path = os.path.join(data_dir, MASTER_FILE)
+    if not os.path.exists(output_path):
+        return False
+    bundle_path = bundle_path_for(output_path)
+    return bundle_built_from(bundle_path, output_path) and read_bundle_extras(bundle_path, SEMANTIC_EXTRAS) is not None
+
+
+def run_pipeline(data_dir=DATA_DIR, full=False, verbose=True):
+    """
+    Builds or updates the master dataset from the raw CSV files.
+
+    Unless full=True, only the projects whose raw rows changed since the last
+    run (according to the manifest) are reprocessed and upserted into the
+    existing master file. Returns a dict describing what was done.
+    """
+    log = print if verbose else (lambda *args, **kwargs: None)
+
+    log("Step 1: Loading raw CSV files...")
+    raw_hashes = {name: file_hash(os.path.join(data_dir, filename)) for name, filename in RAW_FILES.items()}
+    master_path = os.path.join(data_dir, MASTER_FILE)
+    manifest = load_manifest(data_dir)
+    can_upsert = not full and manifest is not None and os.path.exists(master_path)
+    if can_upsert and manifest.get('raw_hashes') == raw_hashes:
+        if outputs_complete(data_dir):
+            log("✅ Raw files unchanged since the last run; nothing to do.")
+            return {'mode': 'unchanged', 'changed_projects': 0, 'removed_projects': 0, 'rows': None}
+        # e.g. a fresh clone: the master CSV and the manifest are committed, the bundle is not
+        log("Raw files unchanged since the last run; writing the missing binary bundle...")
+        bundle_path = write_master_bundle(master_path)
+        log(f"\n✅ Bundle written: {bundle_path}")
+        return {'mode': 'bundle', 'changed_projects': 0, 'removed_projects': 0, 'rows': None}
+
+    tables = load_raw_tables(data_dir)
+    log("✅ All files loaded successfully.")
+    fingerprints = project_fingerprints(tables)
+
+    if can_upsert:
+        previous = manifest.get('project_fingerprints', {})
+        changed = [pid for pid, fp in fingerprints.items() if previous.get(pid) != fp]
+        removed = [pid for pid in previous if pid not in fingerprints]
+        log(f"\nStep 2: Merging the data files for {len(changed)} changed project(s)...")
+        merged_df = merge_tables(subset_tables(tables, changed))
+        log("\nSteps 3-5: Cleaning and engineering features for the changed rows...")
+        new_rows = transform(merged_df)
+        existing = pd.read_csv(master_path)
+        keep = ~existing['project_id'].astype(str).isin(set(changed) | set(removed))
+        master_df = pd.concat([existing[keep], new_rows], ignore_index=True)[final_columns]
+        mode = 'incremental'
+    else:
+        changed, removed = list(fingerprints), []
+        log("\nStep 2: Merging the four data files...")
+        merged_df = merge_tables(tables)
+        log("\nSteps 3-5: Cleaning and engineering features...")
+        master_df = transform(merged_df)
+        mode = 'full'
+    master_df = feed_order(master_df, tables)
+
+    log("\nStep 6: Writing the master file and binary bundle...")
+    output_path, bundle_path = write_outputs(master_df, data_dir)
+    save_manifest({'raw_hashes': raw_hashes, 'project_fingerprints': fingerprints}, data_dir)
+
+    log(f"\n✅ Data preparation complete! Final file saved at: {output_path} (bundle: {bundle_path})")
+    return {'mode': mode, 'changed_projects': len(changed), 'removed_projects': len(removed), 'rows': len(master_df)}
+
+
+# --- 8. STREAMING MODE FOR LARGE FEEDS ---
+# The variant file can be far larger than memory, while the project, config and
+# address tables stay small. Streaming mode joins the small tables once into a
+# lookup keyed by configuration id, reads variants in chunks with the C parser,
+# transforms the chunks in a process pool and writes each one as part files of
+# a dataset partitioned by city, named after the chunk's place in the feed.
+# The master file and bundle are then built from the parts, in feed order; only
+# the master rows (far fewer columns than the raw feed) are held in memory.
+STREAM_OUTPUT_DIR = 'master_properties.parts'
+STREAM_CHUNK_SIZE = 200000
+# Partition of the rows whose slug names no city
+STREAM_MISSING_CITY = '__missing__'
+
+_stream_context = None
+_stream_output_dir = None
+
+def build_context(tables):
+    """Joins the small config, project and address tables into one lookup frame."""
+    context = pd.merge(tables['config'], tables['project'], left_on='projectId', right_on='id', how='left', suffixes=('', '_project'))
+    return pd.merge(context, tables['address'], on='projectId', how='left', suffixes=('', '_address'))
+
+def _init_stream_worker(context, output_dir):
+    global _stream_context, _stream_output_dir
+    _stream_context = context
+    _stream_output_dir = output_dir
+
+def _process_chunk(chunk_number, variant_chunk):
+    """Transforms one variant chunk and writes it as part files; returns (rows, paths)."""
+    merged_df = pd.merge(variant_chunk, _stream_context, left_on='configurationId', right_on='id', how='left', suffixes=('_variant', '_config'))
+    master_chunk = transform(merged_df)
+    paths = []
+    for city, part in master_chunk.groupby(master_chunk['city'].fillna(STREAM_MISSING_CITY), sort=False):
+        partition_dir = os.path.join(_stream_output_dir, f"city={city}")
+        os.makedirs(partition_dir, exist_ok=True)
+        path = os.path.join(partition_dir, f"part-{chunk_number:06d}.csv")
+        part.to_csv(path, index=False)
+        paths.append(path)
+    return len(master_chunk), paths
+
+def _replace_dir(staging, target):
+    """Moves staging to target, replacing what was there."""
+    previous = f"{staging}.previous"
+    if os.path.exists(target):
+        os.rename(target, previous)
+    os.rename(staging, target)
+    shutil.rmtree(previous, ignore_errors=True)
+
+def read_stream_parts(output_dir):
+    """
+    Reads the part files of a streaming run back into one master frame, chunk
+    by chunk. Within a chunk the rows are grouped by city; feed_order puts the
+    projects back in feed order.
+    """
+    paths = []
+    for partition in sorted(os.listdir(output_dir)):
+        partition_dir = os.path.join(output_dir, partition)
+        if partition.startswith('city=') and os.path.isdir(partition_dir):
+            paths.extend(os.path.join(partition_dir, name) for name in os.listdir(partition_dir) if name.endswith('.csv'))
+    # part-<chunk number>.csv, then the partition, so chunks are read in feed order
+    paths.sort(key=lambda path: (os.path.basename(path), path))
+    if not paths:
+        return pd.DataFrame(columns=final_columns)
+    return pd.concat([pd.read_csv(path) for path in paths], ignore_index=True)[final_columns]
+
+def run_streaming(data_dir=DATA_DIR, output_dir=None, chunk_size=STREAM_CHUNK_SIZE, workers=None, verbose=True):
+    """
+    Processes the raw feed chunk by chunk across a pool of worker processes,
+    then writes the master file and bundle from the result.
+
+    Each chunk is written as part files under output_dir/city=<City>/, named
+    after the chunk's place in the feed. A run writes into a staging folder
+    that then replaces the previous run's output, so running again over the
+    same feed never duplicates rows. Memory use during the transform is
+    bounded by the small tables plus about two chunks per worker.
+    """
+    log = print if verbose else (lambda *args, **kwargs: None)
+    output_dir = output_dir or os.path.join(data_dir, STREAM_OUTPUT_DIR)
+    workers = workers or os.cpu_count() or 1
+    run_id = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    staging_dir = f"{output_dir}.{run_id}.tmp"
+
+    log("Step 1: Loading the small raw tables...")
+    tables = {
+        name: pd.read_csv(os.path.join(data_dir, RAW_FILES[name]))
+        for name in ('project', 'address', 'config')
+    }
+    context = build_context(tables)
+
+    log(f"\nStep 2: Streaming variants in chunks of {chunk_size} rows across {workers} worker(s)...")
+    total_rows, all_paths = 0, []
+    chunks = pd.read_csv(os.path.join(data_dir, RAW_FILES['variant']), chunksize=chunk_size, quotechar='"')
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_stream_worker, initargs=(context, staging_dir)) as pool:
+        pending = set()
+        for chunk_number, variant_chunk in enumerate(chunks):
+            pending.add(pool.submit(_process_chunk, chunk_number, variant_chunk))
+            # Keep at most two chunks per worker in flight so memory stays bounded
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    rows, paths = future.result()
+                    total_rows += rows
+                    all_paths.extend(paths)
+        for future in pending:
+            rows, paths = future.result()
+            total_rows += rows
+            all_paths.extend(paths)
+
+    os.makedirs(staging_dir, exist_ok=True)
+    _replace_dir(staging_dir, output_dir)
+    parts = sorted(os.path.join(output_dir, os.path.relpath(path, staging_dir)) for path in all_paths)
+    log(f"✅ {total_rows} rows in {len(parts)} part file(s) under {output_dir}")
+
+    log("\nStep 3: Writing the master file and binary bundle from the parts...")
+    # Only the variants' configuration ids are needed to restore the feed order
+    variant_ids = pd.read_csv(os.path.join(data_dir, RAW_FILES['variant']), usecols=['configurationId'])
+    master_df = feed_order(read_stream_parts(output_dir), {'config': tables['config'], 'variant': variant_ids})
+    output_path, bundle_path = write_outputs(master_df, data_dir)
+    # The manifest describes the input of the last run_pipeline; its next run rebuilds in full
+    manifest_path = os.path.join(data_dir, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    log(f"\n✅ Streaming run {run_id} complete! Final file saved at: {output_path} (bundle: {bundle_path})")
+    return {'mode': 'stream', 'run_id': run_id, 'rows': total_rows, 'parts': parts}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or incrementally update data/master_properties.csv from the raw CSV files.")
+    parser.add_argument('--data-dir', default=DATA_DIR, help="folder holding the raw CSV files (default: data)")
+    parser.add_argument('--full', action='store_true', help="rebuild every project instead of only the changed ones")
+    parser.add_argument('--stream', action='store_true', help="process the variant file in chunks into a partitioned dataset, then build the master file from it")
+    parser.add_argument('--chunk-size', type=int, default=STREAM_CHUNK_SIZE, help="variant rows per chunk in --stream mode")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes in --stream mode (default: all cores)")
+    parser.add_argument('--output-dir', default=None, help=f"partitioned output folder in --stream mode (default: <data-dir>/{STREAM_OUTPUT_DIR})")
+    args = parser.parse_args(argv)
+    try:
+        if args.stream:
+            run_streaming(args.data_dir, args.output_dir, chunk_size=args.chunk_size, workers=args.workers)
+        else:
+            run_pipeline(args.data_dir, full=args.full)
+    except FileNotFoundError as e:
+        print(f"❌ Error: {e}\nPlease make sure all CSV files are inside the '{args.data_dir}' folder.")
+        sys.exit(1)
+
 
-print(f"\n✅ Data preparation complete! Final file saved at: {output_path}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+
+@pytest.fixture(scope="session")
+def known_values():
+    """A small catalogue in the shape of data_loader.get_known_values()."""
+    return {
+        "cities": ["pune", "mumbai", "dehradun"],
+        "localities": ["ravet", "wakad", "shivajinagar", "baner"],
+        "property_types": ["1bhk", "2bhk", "3bhk", "house_villa", "office"],
+        "project_names": ["pristine02", "godrej hillside"],
+    }
+
+
+LISTING_CITIES = {"Pune": ["Ravet", "Wakad", "Baner", "Shivajinagar"], "Mumbai": ["Chembur", "Andheri", "Thane"]}
+LISTING_AMENITIES = ["swimming pool", "gym", "club house", "car parking", "lift", "cctv security", "near schools", "rooftop garden"]
+
+
+@pytest.fixture(scope="session")
+def listings():
+    """A synthetic master frame, prepared the way data_loader loads the real one."""
+    from core.data_loader import prepare_master_frame
+
+    rng = np.random.default_rng(7)
+    size = 600
+    cities = rng.choice(list(LISTING_CITIES), size=size)
+    return prepare_master_frame(pd.DataFrame({
+        "title": [f"Listing {i}" for i in range(size)],
+        "project_name": rng.choice(["Pristine02", "Godrej Hillside", "Sky Vista", "Palm Orchid"], size=size),
+        "city": cities,
+        "locality": [rng.choice(LISTING_CITIES[city]) for city in cities],
+        "bhk": rng.choice(["1BHK", "2BHK", "3BHK", "House_Villa", "Office"], size=size),
+        "possession_status": rng.choice(["READY_TO_MOVE", "UNDER_CONSTRUCTION"], size=size, p=[0.3, 0.7]),
+        "amenities": [
+            ", ".join(rng.choice(LISTING_AMENITIES, size=rng.integers(0, 5), replace=False)) for _ in range(size)
+        ],
+        "price": rng.integers(20, 400, size=size) * 250000,
+    }))
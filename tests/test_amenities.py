@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from core.amenities import AMENITY_BITS, amenity_mask, resolve_query_amenities
+from core.index import PropertyIndex
+from core.search import find_properties
+
+AMENITY_QUERIES = [
+    ["pool"],
+    ["gym", "lift"],
+    ["parking", "security", "schools"],
+    ["rooftop garden"],
+    ["pool", "rooftop garden"],
+    ["helipad"],
+]
+
+
+@pytest.fixture(scope="module")
+def index(listings):
+    return PropertyIndex(listings)
+
+
+def text_scan(listings, amenities):
+    """The amenity filter as a plain substring search, without the bitmask."""
+    return find_properties(listings.drop(columns="amenity_mask"), {"amenities": amenities}).index.to_numpy()
+
+
+@pytest.mark.parametrize("amenities", AMENITY_QUERIES)
+def test_bitmask_matches_the_text_search(listings, index, amenities):
+    expected = text_scan(listings, amenities)
+    np.testing.assert_array_equal(find_properties(listings, {"amenities": amenities}).index.to_numpy(), expected)
+    np.testing.assert_array_equal(index.filter_amenities(np.arange(index.size), amenities), expected)
+
+
+@pytest.mark.parametrize("amenities", AMENITY_QUERIES)
+def test_index_matches_the_scan_with_other_filters(listings, index, amenities):
+    filters = {"city": "pune", "budget": {"max": 60000000}, "amenities": amenities}
+    expected = find_properties(listings, filters).index.to_numpy()
+    np.testing.assert_array_equal(find_properties(listings, filters, index=index).index.to_numpy(), expected)
+
+
+def test_synonyms_resolve_to_the_same_bit(listings):
+    assert amenity_mask("clubhouse") == amenity_mask("club house") == AMENITY_BITS["Clubhouse"]
+    # The feed says "club house"; the mask still finds it for "clubhouse"
+    expected = text_scan(listings, ["club house"])
+    np.testing.assert_array_equal(find_properties(listings, {"amenities": ["clubhouse"]}).index.to_numpy(), expected)
+
+
+def test_unknown_terms_are_left_for_the_text_search():
+    mask, unresolved = resolve_query_amenities(["gym", "rooftop garden"])
+    assert mask == AMENITY_BITS["Gymnasium"]
+    assert unresolved == ["rooftop garden"]
@@ -0,0 +1,106 @@
+import io
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from core.assets import LocalFileFetcher, ThumbnailCache, make_thumbnail
+
+HOST = "https://images.example.com"
+IMAGES = ["a.png", "b.png", "c.png", "d.png"]
+
+
+@pytest.fixture
+def image_root(tmp_path):
+    root = tmp_path / "host"
+    root.mkdir()
+    rng = np.random.default_rng(3)
+    for name in IMAGES:
+        pixels = rng.integers(0, 256, size=(60, 80, 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(root / name)
+    (root / "broken.png").write_bytes(b"not an image")
+    return root
+
+
+def thumbnail_size(image_root, name):
+    return len(make_thumbnail((image_root / name).read_bytes()))
+
+
+def make_cache(tmp_path, image_root, max_bytes, latency=0.0):
+    return ThumbnailCache(str(tmp_path / "cache"), max_bytes=max_bytes, fetcher=LocalFileFetcher(str(image_root), latency), workers=4)
+
+
+def fetch(cache, *names):
+    for name in names:
+        for future in cache.prefetch([f"{HOST}/{name}"]):
+            future.result()
+
+
+def cached(cache):
+    return [name for name in IMAGES if cache.get(f"{HOST}/{name}") is not None]
+
+
+def test_prefetch_stores_a_thumbnail(tmp_path, image_root):
+    cache = make_cache(tmp_path, image_root, max_bytes=2**20)
+    url = f"{HOST}/a.png"
+    assert cache.get(url) is None
+    fetch(cache, "a.png")
+    with Image.open(io.BytesIO(cache.get(url))) as image:
+        assert image.format == "JPEG"
+    stats = cache.stats()
+    assert (stats["entries"], stats["fetches"], stats["failures"]) == (1, 1, 0)
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert stats["bytes"] == thumbnail_size(image_root, "a.png")
+    # Cached URLs are not fetched again
+    assert cache.prefetch([url]) == []
+
+
+def test_byte_budget_evicts_the_least_recently_used(tmp_path, image_root):
+    sizes = {name: thumbnail_size(image_root, name) for name in IMAGES}
+    cache = make_cache(tmp_path, image_root, max_bytes=sizes["a.png"] + sizes["b.png"] + sizes["c.png"] - 1)
+    fetch(cache, "a.png", "b.png")
+    # Reading a makes b the least recently used
+    assert cache.get(f"{HOST}/a.png") is not None
+    fetch(cache, "c.png")
+    assert cached(cache) == ["a.png", "c.png"]
+    assert cache.stats()["bytes"] == sizes["a.png"] + sizes["c.png"]
+    assert sorted(os.listdir(tmp_path / "cache")) == sorted(f"{ThumbnailCache.key(f'{HOST}/{name}')}.jpg" for name in ["a.png", "c.png"])
+
+
+def test_failed_fetches_are_counted_and_not_cached(tmp_path, image_root):
+    cache = make_cache(tmp_path, image_root, max_bytes=2**20)
+    results = [future.result() for future in cache.prefetch([f"{HOST}/missing.png", f"{HOST}/broken.png"])]
+    assert results == [False, False]
+    stats = cache.stats()
+    assert (stats["entries"], stats["fetches"], stats["failures"], stats["in_flight"]) == (0, 2, 2, 0)
+    assert cache.get(f"{HOST}/broken.png") is None
+
+
+def test_thumbnail_over_the_budget_is_a_failure(tmp_path, image_root):
+    cache = make_cache(tmp_path, image_root, max_bytes=thumbnail_size(image_root, "a.png") - 1)
+    fetch(cache, "a.png")
+    assert cache.stats()["failures"] == 1
+    assert cached(cache) == []
+
+
+def test_concurrent_requests_share_one_fetch(tmp_path, image_root):
+    cache = make_cache(tmp_path, image_root, max_bytes=2**20, latency=0.2)
+    url = f"{HOST}/a.png"
+    first = cache.prefetch([url, url])
+    second = cache.prefetch([url])
+    assert len(first) == 1 and second == first
+    assert cache.wait_for(url, timeout=5) is not None
+    assert cache.stats()["fetches"] == 1
+
+
+def test_recency_survives_a_restart(tmp_path, image_root):
+    sizes = {name: thumbnail_size(image_root, name) for name in IMAGES}
+    cache = make_cache(tmp_path, image_root, max_bytes=2**20)
+    fetch(cache, "a.png", "b.png", "c.png")
+    for age, name in enumerate(["b.png", "c.png", "a.png"]):
+        path = tmp_path / "cache" / f"{ThumbnailCache.key(f'{HOST}/{name}')}.jpg"
+        os.utime(path, (1_000_000 + age, 1_000_000 + age))
+
+    reopened = make_cache(tmp_path, image_root, max_bytes=sizes["c.png"] + sizes["a.png"])
+    assert cached(reopened) == ["a.png", "c.png"]
@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from core import bundle
+from core.bundle import read_bundle, write_bundle
+
+
+def make_frame():
+    return pd.DataFrame({
+        "price": np.array([5000000, 9000000, 12000000], dtype=np.int64),
+        "city": ["Pune", None, "Pune"],
+        "title": ["A", "B", "C"],
+    })
+
+
+def test_round_trip_keeps_values_and_maps_string_codes(tmp_path):
+    df = make_frame()
+    write_bundle(df, str(tmp_path / "master.bundle"))
+    loaded = read_bundle(str(tmp_path / "master.bundle"))
+    assert loaded["price"].tolist() == df["price"].tolist()
+    assert loaded["city"].tolist()[0] == "Pune" and pd.isna(loaded["city"].tolist()[1])
+    assert loaded["title"].tolist() == ["A", "B", "C"]
+    # String columns are Categoricals over the memory-mapped codes, not private copies
+    assert isinstance(loaded["city"].array.codes.base, np.memmap)
+
+
+def test_source_csv_is_hashed_only_when_its_signature_changes(tmp_path, monkeypatch):
+    csv = tmp_path / "master.csv"
+    csv.write_text("price\n1\n")
+    write_bundle(make_frame(), str(tmp_path / "master.bundle"), source_csv=str(csv))
+
+    def fail(path):
+        raise AssertionError("hashed an unchanged CSV")
+
+    monkeypatch.setattr(bundle, "file_sha1", fail)
+    assert read_bundle(str(tmp_path / "master.bundle"), source_csv=str(csv)) is not None
+    monkeypatch.undo()
+
+    # Same content, new mtime: hashed once and still accepted
+    os.utime(csv, ns=(0, 0))
+    assert read_bundle(str(tmp_path / "master.bundle"), source_csv=str(csv)) is not None
+    csv.write_text("price\n2\n")
+    assert read_bundle(str(tmp_path / "master.bundle"), source_csv=str(csv)) is None
+
+
+def test_loaded_frame_carries_its_version_id(tmp_path):
+    version_id = write_bundle(make_frame(), str(tmp_path / "master.bundle"))
+    assert read_bundle(str(tmp_path / "master.bundle")).attrs["version_id"] == version_id
@@ -0,0 +1,21 @@
+from core.cache import QueryCache
+
+
+def test_persisted_entries_survive_a_restart(tmp_path, known_values):
+    path = str(tmp_path / "nlu.sqlite")
+    QueryCache(disk_path=path, namespace="prompt-a").put("2bhk in pune", known_values, {"city": "pune"})
+    assert QueryCache(disk_path=path, namespace="prompt-a").get("2BHK in Pune!", known_values) == {"city": "pune"}
+
+
+def test_a_new_prompt_or_model_invalidates_persisted_entries(tmp_path, known_values):
+    path = str(tmp_path / "nlu.sqlite")
+    QueryCache(disk_path=path, namespace="prompt-a").put("2bhk in pune", known_values, {"city": "pune"})
+    assert QueryCache(disk_path=path, namespace="prompt-b").get("2bhk in pune", known_values) is None
+    # The stale rows were dropped, not just skipped
+    assert QueryCache(disk_path=path, namespace="prompt-a").get("2bhk in pune", known_values) is None
+
+
+def test_new_known_values_invalidate_entries(known_values):
+    cache = QueryCache()
+    cache.put("2bhk in pune", known_values, {"city": "pune"})
+    assert cache.get("2bhk in pune", {**known_values, "cities": ["pune"]}) is None
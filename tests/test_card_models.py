@@ -0,0 +1,90 @@
+import pandas as pd
+import pytest
+
+from components.ui import CardModel, CardModelCache
+
+
+def listing_rows(titles):
+    """Rows with the master columns a card shows, indexed by row id."""
+    return pd.DataFrame({
+        "title": titles,
+        "first_image": [f"https://images.example.com/{i}.jpg" for i in range(len(titles))],
+        "city": "Pune",
+        "locality": "Ravet",
+        "project_name": "Pristine02",
+        "bhk": "2BHK",
+        "possession_status": "READY_TO_MOVE",
+        "price_formatted": "₹75 L",
+        "amenities": "Swimming Pool, Gym, Lift, Security",
+        "cta_url": [f"/listing/{i}" for i in range(len(titles))],
+    })
+
+
+class RowLoader:
+    """A load_rows callback over a frame that records the ids it was asked for."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def __call__(self, row_ids):
+        self.calls.append(list(row_ids))
+        return self.rows.loc[[row_id for row_id in row_ids if row_id in self.rows.index]]
+
+
+@pytest.fixture
+def rows():
+    return listing_rows([f"Listing {i}" for i in range(10)])
+
+
+def test_card_model_formats_a_row(rows):
+    model = CardModel.from_row(rows.loc[3], 3)
+    assert model.row_id == 3
+    assert model.status == "**Status:** Ready To Move"
+    assert model.amenities == "✨ **Amenities:** Swimming Pool | Gym | Lift"
+    assert model.cta_url == "https://nobrokerage.com/listing/3"
+    with pytest.raises(AttributeError):
+        model.title = "changed"
+
+
+def test_hits_skip_loading_and_return_the_same_models(rows):
+    cache = CardModelCache()
+    load = RowLoader(rows)
+    first = cache.get_many([4, 1, 7], load, version="v1")
+    second = cache.get_many([7, 2, 4], load, version="v1")
+    assert [model.title for model in first] == ["Listing 4", "Listing 1", "Listing 7"]
+    assert [model.row_id for model in second] == [7, 2, 4]
+    assert load.calls == [[4, 1, 7], [2]]
+    assert second[0] is first[2]
+
+
+def test_a_new_version_drops_the_cached_models(rows):
+    cache = CardModelCache()
+    cache.get_many([1, 2], RowLoader(rows), version="v1")
+    updated = RowLoader(listing_rows([f"Updated {i}" for i in range(10)]))
+    models = cache.get_many([1, 2], updated, version="v2")
+    assert [model.title for model in models] == ["Updated 1", "Updated 2"]
+    assert updated.calls == [[1, 2]]
+    assert cache.version == "v2"
+
+
+def test_missing_rows_are_skipped(rows):
+    models = CardModelCache().get_many([2, 42, 5], RowLoader(rows), version="v1")
+    assert [model.row_id for model in models] == [2, 5]
+
+
+def test_least_recently_used_models_are_evicted(rows):
+    cache = CardModelCache(max_entries=2)
+    load = RowLoader(rows)
+    cache.get_many([1, 2], load, version="v1")
+    cache.get_many([1], load, version="v1")
+    cache.get_many([3], load, version="v1")
+    cache.get_many([1, 2], load, version="v1")
+    assert load.calls[-1] == [2]
+
+
+def test_for_frame_uses_the_result_rows(rows):
+    cache = CardModelCache()
+    results = rows.loc[[6, 0]]
+    assert [model.title for model in cache.for_frame(results, "v1")] == ["Listing 6", "Listing 0"]
+    assert cache.get_many([0], RowLoader(rows.iloc[:0]), version="v1")[0].title == "Listing 0"
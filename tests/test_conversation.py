@@ -0,0 +1,72 @@
+import numpy as np
+
+from core.conversation import ConversationState, is_refinement, merge_filters
+
+
+def test_mentioned_keys_replace_and_others_are_kept():
+    current = {"city": "pune", "property_type": "2bhk"}
+    assert merge_filters(current, {"status": "ready_to_move"}) == {"city": "pune", "property_type": "2bhk", "status": "ready_to_move"}
+    # The current filters are left as they were
+    assert current == {"city": "pune", "property_type": "2bhk"}
+
+
+def test_none_drops_a_filter():
+    assert merge_filters({"city": "pune", "budget": {"max": 8000000}}, {"budget": None}) == {"city": "pune"}
+
+
+def test_budgets_merge_bound_by_bound():
+    merged = merge_filters({"city": "pune", "budget": {"max": 10000000}}, {"budget": {"min": 5000000}})
+    assert merged["budget"] == {"min": 5000000, "max": 10000000}
+
+
+def test_contradicting_budget_bound_replaces_the_budget():
+    merged = merge_filters({"city": "pune", "budget": {"max": 8000000}}, {"budget": {"min": 10000000}})
+    assert merged["budget"] == {"min": 10000000}
+
+
+def test_amenities_accumulate():
+    merged = merge_filters({"amenities": ["gym"]}, {"amenities": ["pool", "gym"]})
+    assert merged["amenities"] == ["gym", "pool"]
+
+
+def test_reset_starts_over():
+    merged = merge_filters({"city": "pune", "status": "ready_to_move"}, {"reset": True, "city": "mumbai"})
+    assert merged == {"city": "mumbai"}
+
+
+def test_new_city_drops_the_narrower_location():
+    current = {"city": "pune", "locality": "ravet", "project_name": "pristine02"}
+    assert merge_filters(current, {"city": "mumbai"}) == {"city": "mumbai"}
+    assert merge_filters(current, {"locality": "wakad"}) == {"city": "pune", "locality": "wakad"}
+
+
+def test_new_subject_drops_the_old_budget_and_description():
+    # "ready 3bhk in dehradun, quiet place" left a budget and fast-path leftovers behind
+    current = {"city": "pune", "property_type": "2bhk", "budget": {"max": 8000000}, "description": "quiet place"}
+    assert merge_filters(current, {"city": "mumbai"}) == {"city": "mumbai", "property_type": "2bhk"}
+    assert merge_filters(current, {"property_type": "3bhk", "budget": {"max": 20000000}}) == {
+        "city": "pune", "property_type": "3bhk", "budget": {"max": 20000000},
+    }
+
+
+def test_refinement_keeps_the_budget_and_description():
+    current = {"city": "pune", "property_type": "2bhk", "budget": {"max": 8000000}, "description": "quiet place"}
+    merged = merge_filters(current, {"status": "ready_to_move", "city": "Pune"})
+    assert merged == {**current, "status": "ready_to_move", "city": "Pune"}
+
+
+def test_is_refinement():
+    previous = {"city": "pune", "budget": {"max": 10000000}}
+    assert is_refinement(previous, {"city": "pune", "status": "ready_to_move", "budget": {"max": 8000000}})
+    assert not is_refinement(previous, {"city": "pune", "budget": {"max": 12000000}})
+    assert not is_refinement(previous, {"city": "mumbai", "budget": {"max": 10000000}})
+
+
+def test_conversation_state_refines_only_narrowing_follow_ups():
+    conversation = ConversationState()
+    filters = conversation.apply({"city": "pune"})
+    conversation.update(filters, np.arange(10))
+    assert conversation.positions_to_refine(conversation.apply({"status": "ready_to_move"})) is not None
+    assert conversation.positions_to_refine(conversation.apply({"city": "mumbai"})) is None
+    conversation.update(conversation.apply({"invalid_location": True}), np.arange(3))
+    assert conversation.positions is None and "invalid_location" not in conversation.filters
@@ -0,0 +1,17 @@
+import pandas as pd
+
+from core.data_loader import get_known_values
+
+
+def test_known_values_are_the_same_object_on_every_call():
+    df = pd.DataFrame({
+        "city": ["Pune", "Mumbai"],
+        "locality": ["Ravet", "Wakad"],
+        "project_name": ["Pristine02", "Godrej Hillside"],
+        "property_type": ["2bhk", "3bhk"],
+    })
+    get_known_values.clear()
+    known_values = get_known_values(df)
+    # The NLU caches skip re-hashing the catalogue only for the same object
+    assert get_known_values(df) is known_values
+    assert known_values["cities"] == {"pune", "mumbai"}
@@ -0,0 +1,111 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.bundle import bundle_path_for, bundle_version
+from core.data_loader import read_master_frame
+from core.data_service import Dataset, DatasetClient, DatasetServer, DataServiceError
+from core.search import match_positions, rank_properties
+from preprocessing import write_master_bundle
+
+FILTERS = [
+    {"city": "pune"},
+    {"city": "mumbai", "property_type": "2bhk", "budget": {"max": 50000000}},
+    {"locality": "baner", "amenities": ["pool"]},
+    {"status": "ready_to_move", "description": "rooftop garden"},
+    {"city": "pune", "locality": "chembur"},
+]
+COMPARED_COLUMNS = ["title", "city", "locality", "property_type", "price"]
+
+
+@pytest.fixture
+def csv_path(tmp_path, listings):
+    path = tmp_path / "master_properties.csv"
+    listings.to_csv(path, index=False)
+    write_master_bundle(str(path))
+    return str(path)
+
+
+@pytest.fixture
+def server(tmp_path, csv_path):
+    server = DatasetServer(csv_path, str(tmp_path / "data.sock"), poll_seconds=3600)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    client = DatasetClient(server.socket_path, timeout=5)
+    for _ in range(100):
+        try:
+            client.info()
+            break
+        except DataServiceError:
+            threading.Event().wait(0.05)
+    client.close()
+    yield server
+    server.shutdown()
+    thread.join(timeout=5)
+
+
+@pytest.fixture
+def client(server):
+    client = DatasetClient(server.socket_path, timeout=5)
+    yield client
+    client.close()
+
+
+def in_process_search(csv_path, filters, k=5, within=None):
+    dataset = Dataset(read_master_frame(csv_path), bundle_version(bundle_path_for(csv_path)))
+    positions = match_positions(filters, dataset.index, within=within)
+    results, stats = rank_properties(filters, dataset.index, k=k, facets=dataset.facets, positions=positions)
+    return positions, results, stats, dataset.version_id
+
+
+def assert_same_search(answer, expected):
+    positions, results, stats, version = answer
+    np.testing.assert_array_equal(positions, expected[0])
+    assert results.index.tolist() == expected[1].index.tolist()
+    pd.testing.assert_frame_equal(
+        results[COMPARED_COLUMNS].reset_index(drop=True).astype(object),
+        expected[1][COMPARED_COLUMNS].reset_index(drop=True).astype(object),
+    )
+    assert stats == expected[2]
+    assert version == expected[3]
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_search_matches_the_in_process_search(csv_path, client, filters):
+    assert_same_search(client.search(filters, k=5), in_process_search(csv_path, filters))
+
+
+def test_refine_within_earlier_matches(csv_path, client):
+    broad = client.search({"city": "pune"})
+    narrow = {"city": "pune", "property_type": "3bhk"}
+    expected = in_process_search(csv_path, narrow, within=broad[0])
+    assert_same_search(client.search(narrow, within=broad[0], version=broad[3]), expected)
+
+
+def test_rows_and_known_values(csv_path, client, listings):
+    version = client.info()["version"]
+    rows = client.rows([5, 1, len(listings) + 10], version)
+    assert rows.index.tolist() == [5, 1]
+    assert rows["title"].tolist() == listings.loc[[5, 1], "title"].tolist()
+    assert client.known_values()["cities"] == {"pune", "mumbai"}
+
+
+def test_new_version_is_swapped_in(csv_path, client, listings):
+    old = client.search({"city": "pune"})
+    listings[listings["city"] == "Mumbai"].to_csv(csv_path, index=False)
+    write_master_bundle(csv_path)
+    assert client.reload()["swapped"]
+
+    assert client.version != old[3]
+    # Rows stored against the old version now name other rows
+    assert client.rows(old[0][:3], old[3]) is None
+    # Positions from the old version are not refined; the search starts over
+    assert_same_search(client.search({"city": "pune"}, within=old[0], version=old[3]), in_process_search(csv_path, {"city": "pune"}))
+    assert client.info()["rows"] == int((listings["city"] == "Mumbai").sum())
+
+
+def test_unknown_op_is_an_error(client):
+    with pytest.raises(DataServiceError, match="unknown op"):
+        client._call({"op": "drop"})
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from core.entities import TrigramIndex, trigrams
+
+WORDS = ["royal", "green", "park", "heights", "vista", "sky", "palm", "orchid", "lake", "view", "ravet", "wakad", "baner"]
+
+
+def scan_search(values, text, top_k, min_score):
+    """TrigramIndex.search as a plain scan over every value."""
+    grams = trigrams(text)
+    scored = []
+    for value in sorted({str(v).strip().lower() for v in values if str(v).strip()}):
+        own = trigrams(value)
+        score = len(own & grams) / len(own)
+        if score > min_score:
+            scored.append((value, score))
+    scored.sort(key=lambda item: (-item[1], item[0]))
+    return scored[:top_k]
+
+
+@pytest.fixture(scope="module")
+def catalogue():
+    rng = np.random.default_rng(0)
+    return [" ".join(rng.choice(WORDS, size=rng.integers(1, 4))) + f" {i % 7}" for i in range(2000)]
+
+
+@pytest.mark.parametrize("text", ["royal green heights in ravet", "sky vista", "palm", "baner lake view 3", "nothing alike", ""])
+@pytest.mark.parametrize("top_k, min_score", [(1, 0.0), (10, 0.0), (25, 0.5)])
+def test_search_matches_a_full_scan(catalogue, text, top_k, min_score):
+    index = TrigramIndex(catalogue)
+    assert index.search(text, top_k, min_score) == scan_search(catalogue, text, top_k, min_score)
+
+
+def test_verbatim_mention_scores_one():
+    index = TrigramIndex(["Godrej Hillside", "Pristine02"])
+    assert index.search("2bhk in godrej hillside please", top_k=1) == [("godrej hillside", 1.0)]
@@ -0,0 +1,62 @@
+import pytest
+
+from core.facets import FacetAggregates
+from core.index import PropertyIndex
+from core.search import compute_result_stats, find_properties, match_positions
+from core.summarizer import compute_summary_stats
+
+FACET_FILTERS = [
+    {},
+    {"city": "pune"},
+    {"city": "Mumbai", "property_type": "3bhk"},
+    {"property_type": "office"},
+    {"status": "ready_to_move"},
+    {"city": "pune", "property_type": "2bhk", "status": "under_construction"},
+    {"city": "pune", "description": "quiet and green"},
+    {"city": "goa"},
+]
+SCAN_FILTERS = [
+    {"locality": "baner"},
+    {"city": "mumbai", "budget": {"max": 30000000}},
+    {"city": "pune", "amenities": ["gym"]},
+    {"project_name": "sky vista", "status": "ready_to_move"},
+    {"city": "pune", "locality": "chembur"},
+]
+
+
+@pytest.fixture(scope="module")
+def index(listings):
+    return PropertyIndex(listings)
+
+
+@pytest.fixture(scope="module")
+def facets(index):
+    return FacetAggregates(index)
+
+
+def scan_stats(listings, filters):
+    matches = find_properties(listings, {key: value for key, value in filters.items() if key != "description"})
+    stats = compute_summary_stats(matches)
+    # The index reports localities by their lowercase key; the summary title-cases them
+    stats["top_localities"] = [locality.lower() for locality in stats["top_localities"]]
+    if stats["count"]:
+        stats["min_price"] = float(stats["min_price"])
+        stats["max_price"] = float(stats["max_price"])
+    return stats
+
+
+@pytest.mark.parametrize("filters", FACET_FILTERS)
+def test_facet_stats_match_the_scan(listings, facets, filters):
+    assert facets.covers(filters)
+    assert facets.stats_for(filters) == scan_stats(listings, filters)
+
+
+@pytest.mark.parametrize("filters", SCAN_FILTERS)
+def test_other_filters_fall_back_to_a_scan(facets, filters):
+    assert not facets.covers(filters)
+    assert facets.stats_for(filters) is None
+
+
+@pytest.mark.parametrize("filters", FACET_FILTERS + SCAN_FILTERS)
+def test_result_stats_match_the_scan(listings, index, filters):
+    assert compute_result_stats(index, match_positions(filters, index)) == scan_stats(listings, filters)
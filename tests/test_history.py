@@ -0,0 +1,19 @@
+from core.history import ChatHistory
+
+
+def test_messages_keep_the_dataset_version_of_their_results():
+    history = ChatHistory()
+    history.append("user", "3bhk in pune")
+    reply = history.append("assistant", "Found 2", [4, 7], version="v1")
+    assert reply.result_ids.tolist() == [4, 7]
+    assert reply.version == "v1"
+    assert next(iter(history)).version is None
+
+
+def test_only_the_latest_results_are_expanded():
+    history = ChatHistory()
+    first = history.append("assistant", "a", [1], version="v1")
+    second = history.append("assistant", "b", [2], version="v1")
+    history.append("assistant", "no results")
+    assert history.expanded_ids() == {second.message_id}
+    assert first.message_id not in history.expanded_ids()
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from core.index import PropertyIndex
+from core.search import find_properties, match_positions
+
+FILTERS = [
+    {},
+    {"city": "pune"},
+    {"city": "Mumbai", "property_type": "2bhk"},
+    {"city": "pune", "locality": "ravet", "status": "ready_to_move"},
+    {"locality": "Chembur", "property_type": "3bhk", "budget": {"max": 40000000}},
+    {"project_name": "godrej hillside", "budget": {"min": 25000000, "max": 60000000}},
+    {"budget": {"min": 50000000}},
+    {"budget": {"min": 90000000, "max": 10000000}},
+    {"city": "pune", "locality": "chembur"},
+    {"property_type": "office", "status": "under_construction", "budget": {"max": 30000000}},
+]
+
+
+@pytest.fixture(scope="module")
+def index(listings):
+    return PropertyIndex(listings)
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_lookup_matches_the_scan(listings, index, filters):
+    expected = find_properties(listings, filters).index.to_numpy()
+    np.testing.assert_array_equal(index.lookup(filters), expected)
+    np.testing.assert_array_equal(find_properties(listings, filters, index=index).index.to_numpy(), expected)
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_refine_matches_a_fresh_lookup(index, filters):
+    broad = match_positions({"city": filters.get("city")} if filters.get("city") else {}, index)
+    np.testing.assert_array_equal(match_positions(filters, index, within=broad), index.lookup(filters))
+
+
+def test_misspelled_value_snaps_to_the_indexed_key(listings, index):
+    expected = find_properties(listings, {"locality": "shivajinagar"}).index.to_numpy()
+    np.testing.assert_array_equal(index.lookup({"locality": "shivaji nagar"}), expected)
+
+
+def test_invalid_location_matches_nothing(index):
+    assert len(match_positions({"city": "pune", "invalid_location": "goa"}, index)) == 0
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from core import nlu, nlu_batch
+from core.llm import CircuitBreaker, LLMBackend, LocalBackend
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(nlu, "circuit_breaker", CircuitBreaker())
+    monkeypatch.setattr(nlu_batch, "RETRY_BASE_DELAY", 0)
+    nlu.query_cache.clear()
+    yield
+    nlu.query_cache.clear()
+
+
+class FailingBackend(LLMBackend):
+    name = "failing"
+
+    def __init__(self):
+        self.calls = 0
+
+    def complete(self, prompt, timeout):
+        self.calls += 1
+        raise TimeoutError("too slow")
+
+
+def test_batch_answers_in_order_and_deduplicates(known_values):
+    prompts = []
+
+    def responder(prompt):
+        prompts.append(prompt)
+        return json.dumps({"city": "pune", "description": nlu.prompt_query(prompt)})
+
+    queries = ["something cozy near the river", "2bhk in pune", "Something cozy near the river.", "a calm place for my parents"]
+    results = nlu_batch.extract_filters_batch(queries, known_values, backend=LocalBackend(responder), requests_per_second=0)
+    assert results[0] == results[2] == {"city": "pune", "description": "something cozy near the river"}
+    assert results[1] == {"property_type": "2bhk", "city": "pune"}
+    assert results[3]["description"] == "a calm place for my parents"
+    # The duplicate and the fast-path query never reach the backend
+    assert len(prompts) == 2
+
+
+def test_batch_calls_go_through_the_shared_circuit_breaker(known_values):
+    backend = FailingBackend()
+    results = nlu_batch.extract_filters_batch(
+        ["something cozy near the river"], known_values, backend=backend, requests_per_second=0, max_retries=2,
+    )
+    assert results == [nlu_batch.PARSE_ERROR]
+    assert backend.calls == 3
+    assert nlu.circuit_breaker.stats()["recent_bad"] == 3
+
+
+def test_batch_can_bypass_the_query_cache(known_values):
+    prompts = []
+
+    def responder(prompt):
+        prompts.append(prompt)
+        return json.dumps({"description": nlu.prompt_query(prompt)})
+
+    nlu.query_cache.put("something cozy near the river", known_values, {"description": "an old answer"})
+    results = nlu_batch.extract_filters_batch(
+        ["something cozy near the river", "a calm place"], known_values,
+        backend=LocalBackend(responder), requests_per_second=0, use_cache=False,
+    )
+    assert results == [{"description": "something cozy near the river"}, {"description": "a calm place"}]
+    assert len(prompts) == 2
+    # Nothing was written back
+    assert nlu.query_cache.get("a calm place", known_values) is None
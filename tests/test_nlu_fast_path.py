@@ -0,0 +1,104 @@
+import json
+import os
+
+import pytest
+
+from core import nlu
+from core.cache import normalize_query
+from core.entities import EntityIndex, KnownEntities
+from core.llm import LLMBackend
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "data", "fast_path_corpus.jsonl")
+
+with open(CORPUS_PATH) as f:
+    CORPUS = [json.loads(line) for line in f if line.strip()]
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=[case["query"] for case in CORPUS])
+def test_fast_path_matches_the_labelled_corpus(case, known_values):
+    filters, confidence = nlu.parse_query_locally(case["query"], known_values)
+    assert filters == case["filters"]
+    assert (confidence >= nlu.FAST_PATH_MIN_CONFIDENCE) == case["confident"]
+
+
+def test_fast_path_returns_nothing_for_an_empty_query(known_values):
+    assert nlu.parse_query_locally("", known_values) == ({}, 0.0)
+
+
+def test_compiled_parser_is_reused_for_the_same_known_values(known_values):
+    parser = nlu._get_compiled(known_values, nlu.FastPathParser)
+    assert nlu._get_compiled(known_values, nlu.FastPathParser) is parser
+    # An equal copy is fingerprinted once and maps to the same structure
+    assert nlu._get_compiled(json.loads(json.dumps(known_values)), nlu.FastPathParser) is parser
+
+
+def test_compiled_parser_is_rebuilt_when_the_data_changes(known_values):
+    parser = nlu._get_compiled(known_values, nlu.FastPathParser)
+    changed = dict(known_values, cities=known_values["cities"] + ["nashik"])
+    assert nlu._get_compiled(changed, nlu.FastPathParser) is not parser
+    assert nlu.parse_query_locally("2bhk in nashik", changed)[0]["city"] == "nashik"
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Show me 2 BHK in Pune under 1 Cr?", "show me 2bhk in pune under 10000000"),
+    ("3bhk  for 1,00,00,000", "3bhk for 10000000"),
+    ("flat under 80 lakhs", "flat under 8000000"),
+    ("under 1crore", "under 10000000"),
+    # Small bare numbers are counts, not prices
+    ("2 bathrooms", "2 bathrooms"),
+])
+def test_normalize_query(query, expected):
+    assert normalize_query(query) == expected
+
+
+def test_near_identical_queries_share_a_cache_key():
+    assert normalize_query("2 BHK in Pune under 1 cr.") == normalize_query("2bhk in pune under 100 lakh")
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Shivaji Nagar", "shivajinagar"),
+    ("godrej hilside", "godrej hillside"),
+    ("pristine 02", "pristine02"),
+    ("zzzz", None),
+    # Numbers are never corrected
+    ("pristine03", None),
+])
+def test_entity_index_resolve(text, expected, known_values):
+    index = EntityIndex(known_values["localities"] + known_values["project_names"])
+    assert index.resolve(text) == expected
+
+
+def test_snap_filters_only_touches_entity_keys(known_values):
+    filters = {"locality": "shivaji nagar", "city": "Pune", "property_type": "2BHK", "status": "ready_to_move"}
+    assert KnownEntities(known_values).snap_filters(filters) == {
+        "locality": "shivajinagar", "city": "pune", "property_type": "2bhk", "status": "ready_to_move",
+    }
+    # The input is left as it was
+    assert filters["locality"] == "shivaji nagar"
+
+
+class NoKeyBackend(LLMBackend):
+    name = "groq"
+
+    @property
+    def available(self):
+        return False
+
+
+@pytest.mark.parametrize("query, expected", [
+    # The words it could not read are not searched for
+    ("something cozy near schools in pune", {"city": "pune", "amenities": ["schools"]}),
+    # An unknown place after "in" is reported instead of matching everything
+    ("flats in bangalore", {"invalid_location": "bangalore"}),
+    ("3bhk in navi nagar under 9000000", {"property_type": "3bhk", "budget": {"max": 9000000}, "invalid_location": "navi nagar"}),
+])
+def test_without_a_backend_only_the_matched_filters_are_returned(query, expected, known_values, monkeypatch):
+    monkeypatch.setattr(nlu, "backend", NoKeyBackend())
+    nlu.query_cache.clear()
+    assert nlu.extract_filters_with_groq(query, known_values) == expected
+
+
+def test_without_a_backend_an_unreadable_query_is_an_error(known_values, monkeypatch):
+    monkeypatch.setattr(nlu, "backend", NoKeyBackend())
+    nlu.query_cache.clear()
+    assert "error" in nlu.extract_filters_with_groq("something cozy", known_values)
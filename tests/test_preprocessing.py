@@ -0,0 +1,144 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import preprocessing as pp
+from core.bundle import bundle_path_for
+
+RAW_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+@pytest.fixture
+def feed():
+    """Variant rows with the messy values the raw feed contains."""
+    return pd.DataFrame({
+        "slug": [
+            "luxury-ravet-pune-123456", "pristine02-shivajinagar-pune", "camp-mumbai-2-3", "thane-delhi-998877",
+            "pune", "123-456", np.nan, "LUXURY-Chembur-MUMBAI-1", "luxury-ravet-pune-123456",
+        ],
+        "summary": [
+            "swimming pool and gym", np.nan, "", "club house, covered car parking and kids area",
+            "24x7 cctv security near hospital", "malls nearby", "close to schools", "swimming pool and gym", np.nan,
+        ],
+        "bhk": ["2BHK", "3BHK", "4.5BHK", "Office", "House_Villa", "1RK ", "2BHK", "1BHK", "2BHK"],
+        "bathrooms": [2.0, 7.0, 13.0, 9.0, np.nan, 0.0, 6.0, 3.0, 2.0],
+        "price": [7500000.0, 12000000.0, np.nan, 99999.0, 10000000.0, 250000000.0, 5000000.0, 7500000.0, 7500000.0],
+    })
+
+
+def test_clean_bathrooms_vectorized_matches_row_wise(feed):
+    expected = feed.apply(pp.clean_bathrooms, axis=1)
+    pd.testing.assert_series_equal(pp.clean_bathrooms_vectorized(feed).astype(object), expected.astype(object))
+
+
+def test_extract_location_vectorized_matches_row_wise(feed):
+    expected = feed["slug"].apply(pp.extract_location_from_slug).set_axis(["city", "locality"], axis=1)
+    pd.testing.assert_frame_equal(pp.extract_location_vectorized(feed["slug"]).astype(object), expected.astype(object))
+
+
+def test_extract_amenities_vectorized_matches_row_wise(feed):
+    expected = feed["summary"].apply(pp.extract_amenities)
+    amenities, _ = pp.extract_amenities_vectorized(feed["summary"])
+    pd.testing.assert_series_equal(amenities.astype(object), expected.astype(object), check_names=False)
+
+
+def test_format_price_vectorized_matches_row_wise(feed):
+    expected = feed["price"].apply(pp.format_price)
+    pd.testing.assert_series_equal(pp.format_price_vectorized(feed["price"]).astype(object), expected.astype(object), check_names=False)
+
+
+def copy_raw_files(directory):
+    for filename in pp.RAW_FILES.values():
+        shutil.copy(os.path.join(RAW_DATA_DIR, filename), directory)
+
+
+def read_master(directory):
+    return pd.read_csv(os.path.join(directory, pp.MASTER_FILE))
+
+
+def edit_raw_feed(directory):
+    """Reprices one project, drops the variants of another and moves a third to the end of the feed."""
+    config = pd.read_csv(os.path.join(directory, pp.RAW_FILES["config"]))
+    variant_path = os.path.join(directory, pp.RAW_FILES["variant"])
+    variants = pd.read_csv(variant_path)
+    project_of_variant = variants["configurationId"].map(config.set_index("id")["projectId"])
+    projects = list(pd.unique(project_of_variant))
+    repriced, dropped, moved = projects[1], projects[len(projects) // 2], projects[2]
+    variants.loc[project_of_variant == repriced, "price"] = pd.to_numeric(variants.loc[project_of_variant == repriced, "price"], errors="coerce") + 100000
+    variants = pd.concat([
+        variants[~project_of_variant.isin([dropped, moved])],
+        variants[project_of_variant == moved],
+    ])
+    variants.to_csv(variant_path, index=False)
+
+
+def test_incremental_build_writes_what_a_full_build_writes(tmp_path):
+    incremental, full = tmp_path / "incremental", tmp_path / "full"
+    incremental.mkdir()
+    full.mkdir()
+    copy_raw_files(incremental)
+    assert pp.run_pipeline(str(incremental), verbose=False)["mode"] == "full"
+
+    edit_raw_feed(incremental)
+    result = pp.run_pipeline(str(incremental), verbose=False)
+    assert result["mode"] == "incremental"
+    # The moved project's rows are unchanged, so only the other two are rebuilt
+    assert result["changed_projects"] == 2
+
+    for filename in pp.RAW_FILES.values():
+        shutil.copy(incremental / filename, full)
+    pp.run_pipeline(str(full), full=True, verbose=False)
+    # Same rows in the same order, so row ids match too
+    pd.testing.assert_frame_equal(read_master(incremental), read_master(full))
+
+
+def test_unchanged_feed_still_writes_a_missing_bundle(tmp_path):
+    copy_raw_files(tmp_path)
+    pp.run_pipeline(str(tmp_path), verbose=False)
+    assert pp.run_pipeline(str(tmp_path), verbose=False)["mode"] == "unchanged"
+
+    # A fresh clone has the master CSV and the manifest, but no bundle
+    bundle_path = bundle_path_for(str(tmp_path / pp.MASTER_FILE))
+    shutil.rmtree(bundle_path + ".versions")
+    os.remove(bundle_path)
+    assert not pp.outputs_complete(str(tmp_path))
+    assert pp.run_pipeline(str(tmp_path), verbose=False)["mode"] == "bundle"
+    assert pp.outputs_complete(str(tmp_path))
+    assert pp.run_pipeline(str(tmp_path), verbose=False)["mode"] == "unchanged"
+
+
+def test_full_build_keeps_the_feed_order_of_projects(tmp_path):
+    copy_raw_files(tmp_path)
+    pp.run_pipeline(str(tmp_path), verbose=False)
+    master = read_master(tmp_path)
+    pd.testing.assert_frame_equal(read_master(tmp_path), pp.feed_order(master, pp.load_raw_tables(str(tmp_path))))
+    # Each project's rows are contiguous
+    runs = (master["project_id"] != master["project_id"].shift()).sum()
+    assert runs == master["project_id"].nunique()
+
+
+def test_streaming_build_writes_what_a_full_build_writes(tmp_path):
+    full, streamed = tmp_path / "full", tmp_path / "streamed"
+    full.mkdir()
+    streamed.mkdir()
+    copy_raw_files(full)
+    copy_raw_files(streamed)
+    pp.run_pipeline(str(full), full=True, verbose=False)
+    result = pp.run_streaming(str(streamed), chunk_size=20, workers=1, verbose=False)
+    assert result["rows"] == len(read_master(full))
+    assert all(os.path.exists(path) for path in result["parts"])
+    pd.testing.assert_frame_equal(read_master(streamed), read_master(full))
+    assert pp.outputs_complete(str(streamed))
+
+
+def test_streaming_again_replaces_the_previous_parts(tmp_path):
+    copy_raw_files(tmp_path)
+    first = pp.run_streaming(str(tmp_path), chunk_size=20, workers=1, verbose=False)
+    second = pp.run_streaming(str(tmp_path), chunk_size=50, workers=1, verbose=False)
+    parts = pp.read_stream_parts(str(tmp_path / pp.STREAM_OUTPUT_DIR))
+    assert len(parts) == first["rows"] == second["rows"]
+    assert sorted(os.listdir(tmp_path / pp.STREAM_OUTPUT_DIR)) == sorted({os.path.basename(os.path.dirname(path)) for path in second["parts"]})
+    assert len(read_master(tmp_path)) == second["rows"]
@@ -0,0 +1,67 @@
+import pytest
+
+from core.amenities import AMENITY_BITS, resolve_query_amenities
+from core.index import PropertyIndex
+from core.search import RANK_WEIGHTS, find_properties, rank_properties
+
+FILTERS = [
+    {},
+    {"city": "pune"},
+    {"city": "mumbai", "property_type": "2bhk", "budget": {"max": 50000000}},
+    {"budget": {"min": 20000000, "max": 40000000}},
+    {"city": "pune", "budget": {"min": 60000000}, "amenities": ["pool"]},
+    {"status": "ready_to_move", "amenities": ["gym", "rooftop garden"]},
+    {"locality": "wakad", "property_type": "office"},
+]
+
+
+@pytest.fixture(scope="module")
+def index(listings):
+    return PropertyIndex(listings)
+
+
+def scan_rank(listings, filters, k):
+    """rank_properties as a row-by-row scoring of the scan's matches."""
+    matches = find_properties(listings, filters)
+    required_mask, _ = resolve_query_amenities(filters.get("amenities") or [])
+    budget = filters.get("budget") or {}
+    low, high = budget.get("min"), budget.get("max")
+    if low is not None and high is not None:
+        target = (low + high) / 2
+    else:
+        target = high if high is not None else low
+
+    scored = []
+    for position, row in matches.iterrows():
+        score = 0.0
+        if target:
+            score += RANK_WEIGHTS["budget"] * min(max(1 - abs(row["price"] - target) / target, 0), 1)
+        extra = bin(row["amenity_mask"] & ~required_mask).count("1")
+        score += RANK_WEIGHTS["amenities"] * extra / len(AMENITY_BITS)
+        if not filters.get("status"):
+            score += RANK_WEIGHTS["status"] * (row["possession_status"].lower() == "ready_to_move")
+        scored.append((-score, position))
+    return [position for _, position in sorted(scored)[:k]]
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+@pytest.mark.parametrize("k", [1, 5, 1000])
+def test_top_k_matches_a_full_ranking(listings, index, filters, k):
+    top, _ = rank_properties(filters, index, k=k)
+    assert top.index.tolist() == scan_rank(listings, filters, k)
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_stats_cover_every_match(listings, index, filters):
+    _, stats = rank_properties(filters, index, k=5)
+    matches = find_properties(listings, filters)
+    assert stats["count"] == len(matches)
+    if len(matches):
+        assert stats["min_price"] == matches["price"].min()
+        assert stats["max_price"] == matches["price"].max()
+
+
+def test_no_matches(index):
+    top, stats = rank_properties({"city": "pune", "locality": "chembur"}, index)
+    assert top.empty
+    assert stats == {"count": 0, "min_price": None, "max_price": None, "top_localities": []}
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from core.index import PropertyIndex
+from core.search import find_properties
+from core.semantic import SEMANTIC_EXTRAS, SemanticIndex, build_semantic_index, text_features
+
+QUERIES = ["pool and gym", "quiet place near schools", "rooftop garden with security", "the property"]
+
+
+@pytest.fixture(scope="module")
+def semantic(listings):
+    arrays = build_semantic_index(listings, dimensions=64)
+    return SemanticIndex.from_arrays(arrays, len(listings))
+
+
+def full_scores(semantic, text, positions):
+    """Cosine similarity of every row, computed one row at a time."""
+    query = semantic.embed(text)
+    if query is None:
+        return np.zeros(len(positions))
+    return np.array([
+        float(semantic.vectors[semantic.row_vectors[p]] @ query) if semantic.row_vectors[p] >= 0 else 0.0
+        for p in positions
+    ])
+
+
+def test_text_features():
+    assert text_features("Near the Schools, quiet flats") == ["near", "school", "quiet", "near school", "school quiet"]
+    assert text_features("show me some flats") == []
+
+
+@pytest.mark.parametrize("text", QUERIES)
+@pytest.mark.parametrize("count", [5, 600])
+def test_scores_match_a_row_by_row_computation(listings, semantic, text, count):
+    # Few positions gather their vectors; many scan the whole matrix
+    positions = np.arange(0, len(listings), len(listings) // count, dtype=np.int64)
+    np.testing.assert_allclose(semantic.scores(text, positions), full_scores(semantic, text, positions), atol=1e-6)
+
+
+@pytest.mark.parametrize("text", QUERIES)
+@pytest.mark.parametrize("k", [None, 1, 10])
+def test_rank_orders_by_score_then_row(listings, semantic, text, k):
+    positions = np.arange(len(listings), dtype=np.int64)
+    scores = semantic.scores(text, positions)
+    expected = sorted(positions, key=lambda p: (-scores[p], p))[:k]
+    assert semantic.rank(text, positions, k).tolist() == expected
+
+
+def test_rows_without_text_score_zero(listings):
+    arrays = build_semantic_index(listings, dimensions=64)
+    arrays["semantic_rows"] = arrays["semantic_rows"].copy()
+    arrays["semantic_rows"][:3] = -1
+    semantic = SemanticIndex.from_arrays(arrays, len(listings))
+    assert semantic.scores("pool and gym", np.arange(5)).tolist()[:3] == [0, 0, 0]
+
+
+def test_description_ranks_the_closest_listing_first(listings, semantic):
+    index = PropertyIndex(listings, semantic=semantic)
+    filters = {"city": "pune", "description": "rooftop garden"}
+    results = find_properties(listings, filters, index=index)
+    assert sorted(results.index) == find_properties(listings, {"city": "pune"}).index.tolist()
+    assert "rooftop garden" in results["amenities"].iloc[0]
+
+
+def test_from_arrays_rejects_other_datasets(listings):
+    arrays = build_semantic_index(listings, dimensions=64)
+    assert SemanticIndex.from_arrays(arrays, len(listings) + 1) is None
+    assert SemanticIndex.from_arrays({name: arrays[name] for name in SEMANTIC_EXTRAS[:2]}, len(listings)) is None
+    assert SemanticIndex.from_arrays(None, len(listings)) is None
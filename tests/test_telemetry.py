@@ -0,0 +1,55 @@
+import os
+import urllib.request
+
+from core.telemetry import PrometheusSink, QueryLogSink, Trace, read_query_log
+
+
+def finished_trace(**attributes):
+    trace = Trace("chat_turn")
+    trace.stages["search"] = 0.002
+    trace.duration = 0.01
+    for key, value in attributes.items():
+        trace.set(key, value)
+    return trace
+
+
+def test_query_log_path_is_per_process(tmp_path):
+    sink = QueryLogSink(str(tmp_path / "queries-{pid}.jsonl"))
+    trace = Trace("chat_turn")
+    trace.set("query", "2bhk in pune")
+    sink.emit(trace)
+    sink.close()
+    assert sink.path == str(tmp_path / f"queries-{os.getpid()}.jsonl")
+    assert [t["attributes"]["query"] for t in read_query_log(sink.path)] == ["2bhk in pune"]
+
+
+def test_every_counter_has_a_type_line():
+    sink = PrometheusSink()
+    sink.emit(finished_trace(nlu_source="cache", backend="groq", result_count=3))
+    sink.emit(finished_trace(nlu_source="fast_path", backend="groq", result_count=2))
+    lines = sink.render().splitlines()
+    for key in ("nlu_source", "backend", "result_count"):
+        assert lines.count(f"# TYPE chat_{key}_total counter") == 1
+    assert 'chat_nlu_source_total{value="cache"} 1' in lines
+    assert "chat_result_count_total 5" in lines
+    # Every sample follows the TYPE line of its metric family
+    families = set()
+    for line in lines:
+        if line.startswith("# TYPE "):
+            families.add(line.split()[2])
+        else:
+            name = line.split("{")[0].split()[0]
+            assert any(name == family or name.startswith(f"{family}_") for family in families), line
+
+
+def test_metrics_endpoint_listens_on_loopback_by_default():
+    sink = PrometheusSink(port=0)
+    try:
+        host, port = sink.server.server_address[:2]
+        assert host == "127.0.0.1"
+        sink.emit(finished_trace())
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            assert 'chat_turns_total{trace="chat_turn"} 1' in response.read().decode("utf-8")
+    finally:
+        sink.server.shutdown()
+        sink.server.server_close()